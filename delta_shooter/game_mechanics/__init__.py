@@ -1,4 +1,20 @@
+from .async_env import *
+from .batched_env import *
+from .collision import *
 from .file_saving_loading import *
+from .headless import *
+from .inference import *
+from .lazy_import import *
 from .models import *
+from .observation import *
+from .offscreen import *
+from .profiling import *
+from .replay import *
+from .replay_buffer import *
+from .scenario import *
 from .shooter_env import *
 from .shooter_utils import *
+from .spectator import *
+from .tournament import *
+from .trajectory import *
+from .vec_env import *
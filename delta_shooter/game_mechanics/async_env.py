@@ -0,0 +1,88 @@
+import asyncio
+import inspect
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+
+import torch
+from game_mechanics.models import Seed
+from game_mechanics.shooter_env import OpponentMove, ShooterEnv
+
+# A choose_move function, or a coroutine function (e.g. one that asks a server for the move)
+AsyncPolicy = Callable[..., Union[Optional[int], Awaitable[Optional[int]]]]
+
+
+async def _resolve(move: Any) -> Optional[int]:
+    return await move if inspect.isawaitable(move) else move
+
+
+class AsyncShooterEnv(ShooterEnv):
+    """ShooterEnv whose `step()` is a coroutine that awaits the opponent's move.
+
+    `opponent_choose_move` can be a plain function or a coroutine function, so games whose
+    opponents wait on I/O (e.g. an RPC call) can be played concurrently on one event loop.
+    """
+
+    def __init__(self, opponent_choose_move: AsyncPolicy, **kwargs: Any):
+        # The graphical game sleeps between frames, which would block the event loop
+        assert not kwargs.get("render"), "AsyncShooterEnv can't render, use spectate instead"
+        super().__init__(opponent_choose_move, **kwargs)
+
+    async def step(  # type: ignore[override]
+        self, action: Optional[int]
+    ) -> Tuple[torch.Tensor, float, bool, Dict]:
+        reward = 0
+        for _ in range(self.frame_skip):
+            self._step(action, self.player1)
+            reward += self._tick(await self._choose_opponent_move_async())
+            if self.done:
+                break
+        return self.observation_player1, reward, self.done, self._step_info()
+
+    async def _choose_opponent_move_async(self) -> OpponentMove:
+        """_choose_opponent_move(), awaiting the moves. With more than two players every living
+        opponent's move is awaited at once."""
+        if self._opponent_ticks % self.opponent_frame_skip == 0:
+            if self.n_players == 2:
+                self.last_opponent_move = await _resolve(
+                    self.opponent_choose_move(state=self.observation_player2)
+                )
+            else:
+                states = self.observations()
+                self.last_opponent_move = list(
+                    await asyncio.gather(
+                        *(
+                            _resolve(
+                                None if ship.dead else self.opponent_choose_move(state=states[idx])
+                            )
+                            for idx, ship in enumerate(self.players[1:], start=1)
+                        )
+                    )
+                )
+        self._opponent_ticks += 1
+        return self.last_opponent_move
+
+
+async def play_shooter_async(
+    your_choose_move: AsyncPolicy,
+    opponent_choose_move: AsyncPolicy,
+    include_barriers: bool = True,
+    half_game_size: bool = False,
+    seed: Seed = None,
+) -> float:
+    """play_shooter() for policies that may be coroutine functions. Run many games at once with
+    e.g. `asyncio.gather(*(play_shooter_async(...) for _ in range(n_games)))`.
+
+    Returns: total_return, which is the sum of return from the game
+    """
+    env = AsyncShooterEnv(
+        opponent_choose_move,
+        include_barriers=include_barriers,
+        half_sized_game=half_game_size,
+        seed=seed,
+    )
+    total_return = 0.0
+    state, _, done, _ = env.reset()
+    while not done:
+        action = await _resolve(your_choose_move(state))
+        state, reward, done, _ = await env.step(action)
+        total_return += reward
+    return total_return
@@ -0,0 +1,348 @@
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import torch
+from game_mechanics.collision import legacy_hits, swept_hits
+from game_mechanics.headless import (
+    BULLET_RADIUS,
+    COS_ANTICLOCKWISE,
+    COS_CLOCKWISE,
+    SHIP_RADIUS,
+    SIN_ANTICLOCKWISE,
+    SIN_CLOCKWISE,
+)
+from game_mechanics.models import (
+    HEADING_ANGLES,
+    N_HEADINGS,
+    Seed,
+    Spaceship,
+    get_barrier_geometry,
+    get_spawn_orientations,
+    get_spawn_points,
+    heading_of,
+)
+from game_mechanics.observation import ANGLE_COS, ANGLE_SIN, normalise
+
+# Heading of each spawn orientation
+SPAWN_HEADINGS = tuple(heading_of(orientation) for orientation in get_spawn_orientations())
+
+# Angle reported in the observation for each heading, as an index into ANGLE_SIN/ANGLE_COS
+_HEADING_ANGLE = np.array(HEADING_ANGLES) % 360
+
+
+def choose_moves_batched(
+    opponent_choose_move: Callable, states: torch.Tensor
+) -> List[Optional[int]]:
+    """Choose the opponent's moves for a (B, n_observations) batch of states in one call.
+
+    `opponent_choose_move` takes the whole batch and returns B moves (a list, array or tensor).
+    It is run under torch.no_grad() so that networks do a single inference-only forward pass.
+    """
+    with torch.no_grad():
+        moves = opponent_choose_move(state=states)
+    if isinstance(moves, (torch.Tensor, np.ndarray)):
+        moves = moves.tolist()
+    assert len(moves) == len(states), f"Expected {len(states)} moves, got {len(moves)}"
+    return list(moves)
+
+
+class BatchedShooterEnv:
+    """Steps `num_envs` games of shooter at once, storing the game state in NumPy arrays.
+
+    Follows exactly the same rules as ShooterEnv (so a single game played with the same seed and
+    moves is identical), but ships and bullets are rows of `(num_envs, ...)` arrays rather than
+    GameObjects. Finished games are reset automatically, the final observation of a finished game
+    is returned in `info["terminal_observation"]`.
+
+    With `batched_opponent=True`, `opponent_choose_move` is called once per step with the
+    (num_envs, n_observations) states of every opponent and must return num_envs moves.
+    """
+
+    def __init__(
+        self,
+        opponent_choose_move: Callable,
+        num_envs: int,
+        include_barriers: bool = True,
+        half_sized_game: bool = False,
+        batched_opponent: bool = False,
+        seed: Union[Seed, Sequence[Seed]] = None,
+        legacy_collisions: bool = False,
+        num_bullets: Optional[int] = None,
+    ):
+        assert num_envs > 0, "num_envs must be positive"
+        self.opponent_choose_move = opponent_choose_move
+        self.batched_opponent = batched_opponent
+        self.num_envs = num_envs
+        self.include_barriers = include_barriers
+        self.game_size = (300, 225) if half_sized_game else (600, 450)
+        self.barrier_geometry = get_barrier_geometry(self.game_size, include_barriers)
+        self.barriers = self.barrier_geometry.barriers
+
+        self.ship_radius = SHIP_RADIUS
+        self.bullet_radius = BULLET_RADIUS
+        # As ShooterEnv(legacy_collisions=...)
+        self.legacy_collisions = legacy_collisions
+
+        self._spawn_points = np.array(get_spawn_points(self.game_size), dtype=np.float64)
+        self._spawn_directions = np.array(
+            [(v[0], v[1]) for v in get_spawn_orientations()], dtype=np.float64
+        )
+
+        # As ShooterEnv(num_bullets=...)
+        self.num_bullets = n_bullets = Spaceship.NUM_BULLETS if num_bullets is None else num_bullets
+        # Axis 1 is the player (0 == player1, 1 == player2)
+        self.ship_position = np.zeros((num_envs, 2, 2))
+        self.ship_direction = np.zeros((num_envs, 2, 2))
+        self.ship_heading = np.zeros((num_envs, 2), dtype=np.int64)
+        self.dead = np.zeros((num_envs, 2), dtype=bool)
+        # Bullet slots are kept in firing order, live bullets first (like Spaceship.bullets)
+        self.bullet_position = np.zeros((num_envs, 2, n_bullets, 2))
+        # Where each bullet's last move started, for swept collisions
+        self.bullet_last_position = np.zeros((num_envs, 2, n_bullets, 2))
+        self.bullet_velocity = np.zeros((num_envs, 2, n_bullets, 2))
+        self.bullet_alive = np.zeros((num_envs, 2, n_bullets), dtype=bool)
+        self.bullet_hit_barrier = np.zeros((num_envs, 2, n_bullets), dtype=bool)
+        self.dones = np.zeros(num_envs, dtype=bool)
+
+        self.reset(seed)
+
+    @property
+    def n_observations(self) -> int:
+        return (2 + self.num_bullets * 2) * 4
+
+    def reset(
+        self, seed: Union[Seed, Sequence[Seed]] = None
+    ) -> Tuple[torch.Tensor, np.ndarray, np.ndarray, Dict]:
+        """Start a new game in every env.
+
+        Each env has its own random generator. Pass `seed` to reseed them: either one seed per env
+        (env i then plays exactly as ShooterEnv(seed=seed[i]) would), or a single seed that
+        independent per-env seeds are spawned from.
+        """
+        if seed is not None or not hasattr(self, "rngs"):
+            self.rngs = [np.random.default_rng(env_seed) for env_seed in self._spawn_seeds(seed)]
+        self._reset_envs(np.arange(self.num_envs))
+        return (
+            self.observation_player1,
+            np.zeros(self.num_envs, dtype=np.float32),
+            np.zeros(self.num_envs, dtype=bool),
+            {},
+        )
+
+    def _spawn_seeds(self, seed: Union[Seed, Sequence[Seed]]) -> List[Seed]:
+        if isinstance(seed, np.random.SeedSequence):
+            return seed.spawn(self.num_envs)
+        if seed is None or isinstance(seed, (int, np.integer)):
+            return np.random.SeedSequence(seed).spawn(self.num_envs)
+        assert len(seed) == self.num_envs, f"Expected one seed per env ({self.num_envs})"
+        return list(seed)
+
+    def _reset_envs(self, env_idx: Sequence[int]) -> None:
+        # Draws from each env's generator in the same order as ShooterEnv.reset()
+        opposite_spawn = (1, 0, 3, 2)
+        n_orientations = len(self._spawn_directions)
+        for idx in env_idx:
+            rng = self.rngs[idx]
+            player1_idx = int(rng.integers(4))
+            player2_idx = opposite_spawn[player1_idx]
+            orientation1 = int(rng.integers(n_orientations))
+            orientation2 = int(rng.integers(n_orientations))
+
+            self.ship_position[idx, 0] = self._spawn_points[player1_idx]
+            self.ship_position[idx, 1] = self._spawn_points[player2_idx]
+            self.ship_direction[idx, 0] = self._spawn_directions[orientation1]
+            self.ship_direction[idx, 1] = self._spawn_directions[orientation2]
+            self.ship_heading[idx] = (SPAWN_HEADINGS[orientation1], SPAWN_HEADINGS[orientation2])
+
+        self.dead[env_idx] = False
+        self.bullet_alive[env_idx] = False
+        self.bullet_hit_barrier[env_idx] = False
+        self.dones[env_idx] = False
+
+    def step(
+        self, actions: Sequence[Optional[int]]
+    ) -> Tuple[torch.Tensor, np.ndarray, np.ndarray, Dict]:
+        """Takes one step in every game.
+
+        `actions` holds one move (0-5, or None to not move) per game for player1.
+        """
+        assert len(actions) == self.num_envs, f"Expected {self.num_envs} actions"
+        self._take_actions(self._validate_actions(actions), player=0)
+
+        opponent_states = self.observation_player2
+        if self.batched_opponent:
+            opponent_moves = choose_moves_batched(self.opponent_choose_move, opponent_states)
+        else:
+            opponent_moves = [
+                self.opponent_choose_move(state=opponent_states[idx])
+                for idx in range(self.num_envs)
+            ]
+        self._take_actions(self._validate_actions(opponent_moves), player=1)
+
+        rewards = self._process_game_logic()
+
+        terminal_observation = self.observation_player1
+        done_idx = np.flatnonzero(self.dones)
+        dones = self.dones.copy()
+        if len(done_idx):
+            self._reset_envs(done_idx)
+            observation = self.observation_player1
+        else:
+            observation = terminal_observation
+
+        return observation, rewards, dones, {"terminal_observation": terminal_observation}
+
+    @staticmethod
+    def _validate_actions(actions: Sequence[Optional[int]]) -> np.ndarray:
+        """Convert to an array where -1 means no move (None, as used by the human player)."""
+        validated = np.empty(len(actions), dtype=np.int64)
+        for idx, action in enumerate(actions):
+            if action is None:
+                validated[idx] = -1
+                continue
+            assert (
+                isinstance(action, (int, np.integer)) and 0 <= action < 6
+            ), f"Action should be an integer 0-5. Got {action}"
+            validated[idx] = action
+        return validated
+
+    def _take_actions(self, actions: np.ndarray, player: int) -> None:
+        position = self.ship_position[:, player]
+        direction = self.ship_direction[:, player]
+
+        for clockwise, action in ((True, 0), (False, 1)):
+            rotating = actions == action
+            if rotating.any():
+                cos, sin = (
+                    (COS_CLOCKWISE, SIN_CLOCKWISE)
+                    if clockwise
+                    else (COS_ANTICLOCKWISE, SIN_ANTICLOCKWISE)
+                )
+                x, y = direction[rotating, 0], direction[rotating, 1]
+                direction[rotating] = np.stack((cos * x - sin * y, sin * x + cos * y), axis=-1)
+                self.ship_heading[rotating, player] = (
+                    self.ship_heading[rotating, player] + (1 if clockwise else -1)
+                ) % N_HEADINGS
+
+        # Forward, strafe left (direction rotated by -90) and strafe right (rotated by 90)
+        moving = np.isin(actions, (2, 4, 5))
+        if moving.any():
+            step = direction[moving].copy()
+            move = actions[moving]
+            step[move == 4] = np.stack((step[move == 4, 1], -step[move == 4, 0]), axis=-1)
+            step[move == 5] = np.stack((-step[move == 5, 1], step[move == 5, 0]), axis=-1)
+            new_position = position[moving] + step * self.ship_radius
+            blocked = self.barrier_geometry.hits(position[moving], new_position, self.ship_radius)
+            moved = np.flatnonzero(moving)[~blocked]
+            position[moved] = new_position[~blocked]
+
+        shooting = np.flatnonzero((actions == 3) & ~self.bullet_alive[:, player].all(axis=1))
+        if len(shooting):
+            jitter = np.array(
+                [self.rngs[idx].normal(0, Spaceship.SHOOTING_JITTER, size=2) for idx in shooting]
+            )
+            slot = self.bullet_alive[shooting, player].sum(axis=1)
+            self.bullet_position[shooting, player, slot] = position[shooting]
+            self.bullet_velocity[shooting, player, slot] = (
+                direction[shooting] * Spaceship.BULLET_SPEED + jitter
+            )
+            self.bullet_alive[shooting, player, slot] = True
+            self.bullet_hit_barrier[shooting, player, slot] = False
+
+    def _process_game_logic(self) -> np.ndarray:
+        width, height = self.game_size
+        self.ship_position[..., 0] = np.minimum(
+            np.maximum(self.ship_position[..., 0], self.ship_radius), width - self.ship_radius
+        )
+        self.ship_position[..., 1] = np.minimum(
+            np.maximum(self.ship_position[..., 1], self.ship_radius), height - self.ship_radius
+        )
+
+        alive = self.bullet_alive
+        new_position = self.bullet_position + self.bullet_velocity
+        hit_barrier = self.barrier_geometry.hits(
+            self.bullet_position, new_position, self.bullet_radius
+        )
+        hit_barrier &= alive
+        self.bullet_hit_barrier |= hit_barrier
+        moving = alive & ~hit_barrier
+        self.bullet_last_position[alive] = self.bullet_position[alive]
+        self.bullet_position[moving] = new_position[moving]
+
+        # Rect.collidepoint() truncates coordinates towards zero
+        x, y = self.bullet_position[..., 0], self.bullet_position[..., 1]
+        out_of_bounds = ~((x > -1) & (x < width) & (y > -1) & (y < height))
+        culled = alive & (out_of_bounds | self.bullet_hit_barrier)
+
+        # Hits on the opposing ship, as in ShooterEnv._update_bullets()
+        opponent = self.ship_position[:, ::-1, None, :]
+        if self.legacy_collisions:
+            # Legacy ShooterEnvs skip (so keep) the bullet after each removed one until the next
+            # tick, test the survivors at the end of their move and count a win per bullet
+            visited = np.ones(alive.shape[:2], dtype=bool)
+            for slot in range(alive.shape[2]):
+                culled[..., slot] &= visited
+                visited = ~culled[..., slot]
+            hits = legacy_hits(self.bullet_position, opponent, self.bullet_radius, self.ship_radius)
+            n_hits = (hits & alive & ~culled).sum(axis=2)
+        else:
+            hits = swept_hits(
+                self.bullet_last_position,
+                self.bullet_position,
+                opponent,
+                self.bullet_radius + self.ship_radius,
+            )
+            n_hits = (hits & alive).any(axis=2).astype(np.int64)
+        self._compact_bullets(alive & ~culled)
+
+        self.dead[:, 1] |= n_hits[:, 0] > 0
+        self.dead[:, 0] |= n_hits[:, 1] > 0
+        total_hits = n_hits.sum(axis=1)
+        self.dones |= total_hits > 0
+        # Reservoir dogs endings (both players winning) give no reward
+        return np.where(total_hits == 1, np.where(n_hits[:, 0] == 1, 1.0, -1.0), 0.0).astype(
+            np.float32
+        )
+
+    def _compact_bullets(self, keep: np.ndarray) -> None:
+        """Shift the surviving bullets to the front of their slots, preserving firing order."""
+        order = np.argsort(~keep, axis=2, kind="stable")
+        self.bullet_position = np.take_along_axis(self.bullet_position, order[..., None], axis=2)
+        self.bullet_last_position = np.take_along_axis(
+            self.bullet_last_position, order[..., None], axis=2
+        )
+        self.bullet_velocity = np.take_along_axis(self.bullet_velocity, order[..., None], axis=2)
+        self.bullet_hit_barrier = np.take_along_axis(self.bullet_hit_barrier, order, axis=2)
+        self.bullet_alive = np.take_along_axis(keep, order, axis=2)
+
+    def _observations(self, player: int) -> torch.Tensor:
+        """(num_envs, n_observations) observations from the point of view of `player`."""
+        order = (player, 1 - player)
+        width, height = self.game_size
+        n_objects = 2 + 2 * self.num_bullets
+
+        features = np.empty((self.num_envs, n_objects, 4))
+        ships = self.ship_position[:, order]
+        features[:, :2, 0] = normalise(ships[..., 0], width)
+        features[:, :2, 1] = normalise(ships[..., 1], height)
+        angle = _HEADING_ANGLE[self.ship_heading[:, order]]
+        features[:, :2, 2] = ANGLE_SIN[angle]
+        features[:, :2, 3] = ANGLE_COS[angle]
+
+        # Bullets always face up. Unfired bullets are at (0, 0)
+        alive = self.bullet_alive[:, order].reshape(self.num_envs, -1)
+        bullets = self.bullet_position[:, order].reshape(self.num_envs, -1, 2) * alive[..., None]
+        features[:, 2:, 0] = normalise(bullets[..., 0], width)
+        features[:, 2:, 1] = normalise(bullets[..., 1], height)
+        features[:, 2:, 2] = 0.0
+        features[:, 2:, 3] = 1.0
+
+        return torch.from_numpy(features.reshape(self.num_envs, -1).astype(np.float32))
+
+    @property
+    def observation_player1(self) -> torch.Tensor:
+        return self._observations(player=0)
+
+    @property
+    def observation_player2(self) -> torch.Tensor:
+        return self._observations(player=1)
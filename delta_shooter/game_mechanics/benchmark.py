@@ -0,0 +1,332 @@
+"""Throughput benchmarks for the shooter env.
+
+Run from the `delta_shooter` folder with:
+
+    python -m game_mechanics.benchmark --output results.json
+
+Results are written to `--output` (or printed) as JSON, so runs can be compared between releases.
+"""
+import argparse
+import itertools
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import torch
+from game_mechanics.inference import optimize_for_inference
+from game_mechanics.shooter_env import ShooterEnv, choose_move_randomly, play_shooter
+from torch import nn
+
+
+def choose_move_constant(state: torch.Tensor) -> int:
+    """Always rotates, so the opponent costs (almost) nothing."""
+    return 0
+
+
+class MLPOpponent:
+    """A small untrained torch MLP that acts greedily, the cost of a typical network opponent."""
+
+    def __init__(self, n_observations: int = 24, hidden_size: int = 64, n_actions: int = 6):
+        self.network = nn.Sequential(
+            nn.Linear(n_observations, hidden_size),
+            nn.ReLU(),
+            nn.Linear(hidden_size, hidden_size),
+            nn.ReLU(),
+            nn.Linear(hidden_size, n_actions),
+        )
+        self.network.eval()
+
+    def __call__(self, state: torch.Tensor) -> int:
+        with torch.no_grad():
+            return int(self.network(state).argmax())
+
+
+class OptimizedMLPOpponent(MLPOpponent):
+    """MLPOpponent, run with optimize_for_inference()."""
+
+    def __init__(self, mode: str = "auto"):
+        super().__init__()
+        self.optimized = optimize_for_inference(self.network, mode)
+
+    def __call__(self, state: torch.Tensor) -> int:
+        return int(self.optimized(state).argmax())
+
+
+# How long `import game_mechanics` may spend on top of importing numpy and torch, which it can't do
+# without, checked by `--check-import-budget`. Nothing else heavy (e.g. pygame) should be imported
+# until it's needed
+IMPORT_BUDGET_SECONDS = 0.25
+
+OPPONENTS: Dict[str, Callable[[], Callable]] = {
+    "random": lambda: choose_move_randomly,
+    "constant": lambda: choose_move_constant,
+    "mlp": MLPOpponent,
+    "mlp_numpy": lambda: OptimizedMLPOpponent("numpy"),
+    "mlp_script": lambda: OptimizedMLPOpponent("script"),
+}
+
+
+def _timed(fn: Callable[[], int], repeats: int) -> Dict[str, float]:
+    """Best of `repeats` runs of `fn`, which returns the number of operations it ran."""
+    best_seconds, n_ops = float("inf"), 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        n_ops = fn()
+        best_seconds = min(best_seconds, time.perf_counter() - start)
+    return {
+        "n": n_ops,
+        "seconds": best_seconds,
+        "per_second": n_ops / best_seconds,
+        "us_per_op": 1e6 * best_seconds / n_ops,
+    }
+
+
+def benchmark_step(
+    opponent: str,
+    half_sized_game: bool,
+    include_barriers: bool,
+    n_steps: int,
+    repeats: int = 3,
+    seed: int = 0,
+) -> Dict[str, float]:
+    """ShooterEnv.step() throughput, resetting whenever a game ends."""
+    env = ShooterEnv(
+        OPPONENTS[opponent](),
+        include_barriers=include_barriers,
+        half_sized_game=half_sized_game,
+        seed=seed,
+    )
+    actions = np.random.default_rng(seed).integers(6, size=n_steps).tolist()
+
+    def run() -> int:
+        random.seed(seed)
+        env.reset(seed=seed)
+        for action in actions:
+            _, _, done, _ = env.step(action)
+            if done:
+                env.reset()
+        return n_steps
+
+    return _timed(run, repeats)
+
+
+def benchmark_reset(
+    half_sized_game: bool, include_barriers: bool, n_resets: int, repeats: int = 3, seed: int = 0
+) -> Dict[str, float]:
+    """ShooterEnv.reset() throughput."""
+    env = ShooterEnv(
+        choose_move_constant,
+        include_barriers=include_barriers,
+        half_sized_game=half_sized_game,
+        seed=seed,
+    )
+
+    def run() -> int:
+        for _ in range(n_resets):
+            env.reset()
+        return n_resets
+
+    return _timed(run, repeats)
+
+
+def benchmark_observation(n_observations: int, repeats: int = 3, seed: int = 0) -> Dict[str, float]:
+    """Building the observation alone (player1's, mid-game with bullets in flight)."""
+    env = ShooterEnv(choose_move_constant, include_barriers=False, half_sized_game=False, seed=seed)
+    env.reset()
+    env.step(3)
+
+    def run() -> int:
+        for _ in range(n_observations):
+            env.observation_player1
+        return n_observations
+
+    return _timed(run, repeats)
+
+
+def benchmark_play_shooter(n_games: int, repeats: int = 3, seed: int = 0) -> Dict[str, float]:
+    """play_shooter() end to end, random vs random in the half sized arena without barriers
+    (so games finish quickly). Reports games per second, and the steps played."""
+    n_steps = 0
+
+    def count_steps(state: torch.Tensor) -> int:
+        nonlocal n_steps
+        n_steps += 1
+        return choose_move_randomly(state)
+
+    def run() -> int:
+        nonlocal n_steps
+        random.seed(seed)
+        np.random.seed(seed)
+        n_steps = 0
+        for _ in range(n_games):
+            play_shooter(
+                count_steps, choose_move_randomly, half_game_size=True, include_barriers=False
+            )
+        return n_games
+
+    result = _timed(run, repeats)
+    result["n_steps"] = n_steps
+    return result
+
+
+def benchmark_import(repeats: int = 3) -> Dict[str, Any]:
+    """Time for a fresh interpreter to `import game_mechanics`.
+
+    `overhead_seconds` only counts the modules that importing numpy and torch doesn't (which is
+    far less noisy than subtracting the time to import those), measured with `-X importtime`.
+    """
+
+    def run(*args: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [sys.executable, *args],
+            cwd=Path(__file__).parent.parent,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+
+    baseline = set(
+        json.loads(
+            run("-c", "import json, sys, numpy, torch; print(json.dumps(list(sys.modules)))").stdout
+        )
+    )
+    seconds, overhead_seconds = float("inf"), float("inf")
+    modules: List[str] = []
+    for _ in range(repeats):
+        # Lines of "import time: <self us> | <cumulative us> | <indented module name>"
+        timings = [
+            line.split(":", 1)[1].split("|")
+            for line in run("-X", "importtime", "-c", "import game_mechanics").stderr.splitlines()
+            if line.startswith("import time:") and "[us]" not in line
+        ]
+        total_us = sum(
+            int(cumulative) for _, cumulative, name in timings if name.strip() == "game_mechanics"
+        )
+        modules = [name.strip() for _, _, name in timings if name.strip() not in baseline]
+        own_us = sum(int(self_us) for self_us, _, name in timings if name.strip() not in baseline)
+        seconds = min(seconds, total_us / 1e6)
+        overhead_seconds = min(overhead_seconds, own_us / 1e6)
+    return {
+        "seconds": seconds,
+        "overhead_seconds": overhead_seconds,
+        "budget_seconds": IMPORT_BUDGET_SECONDS,
+        "n_modules": len(modules),
+        "imports_pygame": "pygame" in modules,
+    }
+
+
+def run_benchmarks(
+    n_steps: int = 5_000,
+    n_resets: int = 1_000,
+    n_observations: int = 20_000,
+    n_games: int = 20,
+    repeats: int = 3,
+    opponents: Optional[List[str]] = None,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Runs every benchmark and returns the results (and the environment they ran in) as a
+    JSON-serialisable dict."""
+    opponents = opponents or list(OPPONENTS)
+    # Single threaded for comparable timings, restoring the caller's setting afterwards
+    num_threads = torch.get_num_threads()
+    torch.set_num_threads(1)
+    try:
+        configs = list(itertools.product([True, False], [False, True]))
+
+        results: List[Dict[str, Any]] = []
+        for opponent, (half_sized_game, include_barriers) in itertools.product(opponents, configs):
+            results.append(
+                {
+                    "benchmark": "step",
+                    "opponent": opponent,
+                    "half_sized_game": half_sized_game,
+                    "include_barriers": include_barriers,
+                    **benchmark_step(
+                        opponent, half_sized_game, include_barriers, n_steps, repeats, seed
+                    ),
+                }
+            )
+        for half_sized_game, include_barriers in configs:
+            results.append(
+                {
+                    "benchmark": "reset",
+                    "half_sized_game": half_sized_game,
+                    "include_barriers": include_barriers,
+                    **benchmark_reset(half_sized_game, include_barriers, n_resets, repeats, seed),
+                }
+            )
+        results.append(
+            {"benchmark": "observation", **benchmark_observation(n_observations, repeats, seed)}
+        )
+        results.append(
+            {"benchmark": "play_shooter", **benchmark_play_shooter(n_games, repeats, seed)}
+        )
+        results.append({"benchmark": "import", **benchmark_import(repeats)})
+    finally:
+        torch.set_num_threads(num_threads)
+
+    return {
+        "metadata": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "torch": torch.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "repeats": repeats,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the shooter env's throughput.")
+    parser.add_argument("--steps", type=int, default=5_000, help="steps per step benchmark")
+    parser.add_argument("--resets", type=int, default=1_000)
+    parser.add_argument("--observations", type=int, default=20_000)
+    parser.add_argument("--games", type=int, default=20, help="games of play_shooter()")
+    parser.add_argument("--repeats", type=int, default=3, help="the fastest repeat is reported")
+    parser.add_argument("--opponents", nargs="+", choices=list(OPPONENTS), default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="write the JSON here instead of stdout")
+    parser.add_argument(
+        "--check-import-budget",
+        action="store_true",
+        help="exit with an error if importing takes longer than IMPORT_BUDGET_SECONDS",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        n_steps=args.steps,
+        n_resets=args.resets,
+        n_observations=args.observations,
+        n_games=args.games,
+        repeats=args.repeats,
+        opponents=args.opponents,
+        seed=args.seed,
+    )
+    output = json.dumps(results, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+    if args.check_import_budget:
+        (imported,) = [result for result in results["results"] if result["benchmark"] == "import"]
+        if imported["overhead_seconds"] > imported["budget_seconds"]:
+            sys.exit(
+                f"import game_mechanics took {imported['overhead_seconds']:.3f}s on top of numpy "
+                f"and torch, over the {imported['budget_seconds']}s budget"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Slack added to the bounding box rejection test, so that rounding in the exact test
+# (Barrier.hit_barrier) can never disagree with it
+BOUNDING_BOX_MARGIN = 1.0
+
+# Arenas with more barriers than this index them in a SpatialHash of BARRIER_CELL_SIZE cells,
+# rather than testing every barrier's bounding box
+SPATIAL_HASH_MIN_BARRIERS = 8
+BARRIER_CELL_SIZE = 64
+
+# Scales both radii in the legacy bullet vs ship test (GameObject.collides_with()), where it
+# stands in for the bullet's path between ticks
+FUDGE_FACTOR = 1.5
+
+
+def ccw(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """Vectorised models.ccw() over the last axis."""
+    return (c[..., 1] - a[..., 1]) * (b[..., 0] - a[..., 0]) > (b[..., 1] - a[..., 1]) * (
+        c[..., 0] - a[..., 0]
+    )
+
+
+def intersect(a: np.ndarray, b: np.ndarray, c: np.ndarray, d: np.ndarray) -> np.ndarray:
+    """Vectorised models.intersect()."""
+    return (ccw(a, c, d) != ccw(b, c, d)) & (ccw(a, b, c) != ccw(a, b, d))
+
+
+class SpatialHash:
+    """A uniform grid of square cells, each listing the objects whose bounding box overlaps it.
+
+    `query()` returns the objects in the cells a box overlaps (a superset of those whose boxes
+    overlap it), so an exact test only has to be made against nearby objects rather than all of
+    them. With cells about the size of a query, that's close to constant work per query however
+    many objects there are.
+    """
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], List[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def _span(self, low: float, high: float) -> range:
+        return range(int(low // self.cell_size), int(high // self.cell_size) + 1)
+
+    def clear(self) -> None:
+        self.cells.clear()
+
+    def insert(
+        self,
+        item: Any,
+        min_x: float,
+        min_y: float,
+        max_x: Optional[float] = None,
+        max_y: Optional[float] = None,
+    ) -> None:
+        """Add `item` with the bounding box (min_x, min_y, max_x, max_y), or at the point
+        (min_x, min_y) if no maximum is given."""
+        max_x = min_x if max_x is None else max_x
+        max_y = min_y if max_y is None else max_y
+        cells = self.cells
+        for cell_x in self._span(min_x, max_x):
+            for cell_y in self._span(min_y, max_y):
+                bucket = cells.get((cell_x, cell_y))
+                if bucket is None:
+                    cells[cell_x, cell_y] = [item]
+                else:
+                    bucket.append(item)
+
+    def query(self, min_x: float, min_y: float, max_x: float, max_y: float) -> List[Any]:
+        """Every item in a cell the box overlaps, each once, in the order they were inserted
+        within each cell."""
+        cells = self.cells
+        found: Dict[int, Any] = {}
+        for cell_x in self._span(min_x, max_x):
+            for cell_y in self._span(min_y, max_y):
+                bucket = cells.get((cell_x, cell_y))
+                if bucket is not None:
+                    for item in bucket:
+                        found.setdefault(id(item), item)
+        return list(found.values())
+
+
+class BarrierGeometry:
+    """The barriers of an arena packed into arrays, for movement vs barrier collision queries.
+
+    `hit()` tests one movement against every barrier, `hits()` tests any number of movements
+    against every barrier in one vectorised call. Both give exactly the same answer as calling
+    Barrier.hit_barrier() on each barrier.
+
+    Arenas with many barriers (more than SPATIAL_HASH_MIN_BARRIERS) index them in a SpatialHash,
+    so `hit()` only looks at the barriers near a movement.
+    """
+
+    def __init__(self, barriers: Sequence[Any]):
+        self.barriers = list(barriers)
+        # (n_barriers, 4 corners, xy)
+        self.corners = np.array(
+            [[b.corner1, b.corner2, b.corner3, b.corner4] for b in self.barriers], dtype=np.float64
+        ).reshape(-1, 4, 2)
+        # Barrier bounding boxes (min_x, min_y, max_x, max_y), for the scalar query
+        self._boxes: Tuple[Tuple[float, float, float, float, Any], ...] = tuple(
+            (b.corner1[0], b.corner1[1], b.corner4[0], b.corner4[1], b) for b in self.barriers
+        )
+        self._grid: Optional[SpatialHash] = None
+        if len(self.barriers) > SPATIAL_HASH_MIN_BARRIERS:
+            self._grid = SpatialHash(BARRIER_CELL_SIZE)
+            for box in self._boxes:
+                self._grid.insert(box, *box[:4])
+
+    def __len__(self) -> int:
+        return len(self.barriers)
+
+    def hit(self, pos: Any, new_pos: Any, radius: float) -> bool:
+        """Whether moving an object of `radius` from `pos` to `new_pos` hits any barrier."""
+        if not self._boxes:
+            return False
+        x, y, new_x, new_y = pos[0], pos[1], new_pos[0], new_pos[1]
+        margin = radius + BOUNDING_BOX_MARGIN
+        min_x, max_x = (x, new_x) if x < new_x else (new_x, x)
+        min_y, max_y = (y, new_y) if y < new_y else (new_y, y)
+        boxes = self._boxes
+        if self._grid is not None:
+            # Any box overlapping the movement's box (grown by the margin) shares a cell with it
+            boxes = self._grid.query(min_x - margin, min_y - margin, max_x + margin, max_y + margin)
+        for box_min_x, box_min_y, box_max_x, box_max_y, barrier in boxes:
+            # The movement can't reach a barrier its bounding box doesn't overlap
+            if (
+                max_x < box_min_x - margin
+                or min_x > box_max_x + margin
+                or max_y < box_min_y - margin
+                or min_y > box_max_y + margin
+            ):
+                continue
+            if barrier.hit_barrier(pos, new_pos, radius):
+                return True
+        return False
+
+    def hits(self, pos: np.ndarray, new_pos: np.ndarray, radius: float) -> np.ndarray:
+        """Vectorised hit() for (..., 2) arrays of positions, returns a (...) bool array."""
+        if not len(self.barriers):
+            return np.zeros(pos.shape[:-1], dtype=bool)
+        # Broadcast the movements against every barrier on a new second-to-last axis
+        pos = pos[..., None, :]
+        new_pos = new_pos[..., None, :]
+        corner1, corner2, corner3, corner4 = (self.corners[:, idx] for idx in range(4))
+        inside = (
+            (new_pos[..., 0] > corner1[:, 0] - radius)
+            & (new_pos[..., 0] < corner4[:, 0] + radius)
+            & (new_pos[..., 1] > corner1[:, 1] - radius)
+            & (new_pos[..., 1] < corner4[:, 1] + radius)
+        )
+        crossing = intersect(corner1, corner2, pos, new_pos) | intersect(
+            corner3, corner4, pos, new_pos
+        )
+        return (inside | crossing).any(axis=-1)
+
+
+def _segment_point_distance_sq(x0: Any, y0: Any, x1: Any, y1: Any, cx: Any, cy: Any, t: Any) -> Any:
+    """Squared distance from (cx, cy) to the point `t` of the way from (x0, y0) to (x1, y1)."""
+    px = x0 + t * (x1 - x0) - cx
+    py = y0 + t * (y1 - y0) - cy
+    return px * px + py * py
+
+
+def swept_hit(start: Any, end: Any, centre: Any, radius: float) -> bool:
+    """Whether an object moving from `start` to `end` this tick passes within `radius` of
+    `centre` at any point of its movement (segment vs circle), rather than only where it ends.
+
+    For a bullet vs a ship `radius` is the sum of their radii, so a bullet can't skip over a ship
+    however fast it moves.
+    """
+    x0, y0, x1, y1 = start[0], start[1], end[0], end[1]
+    cx, cy = centre[0], centre[1]
+    dx, dy = x1 - x0, y1 - y0
+    length_sq = dx * dx + dy * dy
+    # Closest point of the segment to the centre, as a fraction of the way along it
+    if length_sq > 0:
+        t = min(max(((cx - x0) * dx + (cy - y0) * dy) / length_sq, 0.0), 1.0)
+    else:
+        t = 0.0
+    return _segment_point_distance_sq(x0, y0, x1, y1, cx, cy, t) < radius * radius
+
+
+def swept_hits(start: np.ndarray, end: np.ndarray, centre: np.ndarray, radius: float) -> np.ndarray:
+    """Vectorised swept_hit() for broadcastable (..., 2) arrays, returns a (...) bool array.
+
+    Gives exactly the same answer as swept_hit() on each element.
+    """
+    x0, y0, x1, y1 = start[..., 0], start[..., 1], end[..., 0], end[..., 1]
+    cx, cy = centre[..., 0], centre[..., 1]
+    dx, dy = x1 - x0, y1 - y0
+    length_sq = dx * dx + dy * dy
+    moved = length_sq > 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = ((cx - x0) * dx + (cy - y0) * dy) / length_sq
+    t = np.where(moved, np.minimum(np.maximum(t, 0.0), 1.0), 0.0)
+    return _segment_point_distance_sq(x0, y0, x1, y1, cx, cy, t) < radius * radius
+
+
+def legacy_hit(position: Any, centre: Any, radius: float, other_radius: float) -> bool:
+    """The original end of tick test: within FUDGE_FACTOR times the summed radii."""
+    dx, dy = position[0] - centre[0], position[1] - centre[1]
+    distance = math.sqrt(dx * dx + dy * dy)
+    return distance < (radius * FUDGE_FACTOR) + (other_radius * FUDGE_FACTOR)
+
+
+def legacy_hits(
+    position: np.ndarray, centre: np.ndarray, radius: float, other_radius: float
+) -> np.ndarray:
+    """Vectorised legacy_hit()."""
+    offset = position - centre
+    distance = np.sqrt(offset[..., 0] * offset[..., 0] + offset[..., 1] * offset[..., 1])
+    return distance < (radius * FUDGE_FACTOR) + (other_radius * FUDGE_FACTOR)
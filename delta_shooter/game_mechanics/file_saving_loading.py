@@ -1,39 +1,79 @@
-import copy
+import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Dict, Optional, Tuple, Union
 
 import numpy as np
 import torch
+from game_mechanics.inference import InferenceModel, optimize_for_inference
 from torch import nn
 
 HERE = Path(__file__).parent.parent.resolve()
 
+# Models loaded for opponents in this process, keyed by (path, modification time, size, inode) so
+# a file that's been saved over is loaded again. Least recently used first.
+_CacheKey = Tuple[str, int, int, int]
+_MODEL_CACHE: "OrderedDict[_CacheKey, nn.Module]" = OrderedDict()
+_MODEL_CACHE_LOCK = threading.Lock()
+_model_cache_size: Optional[int] = 32
+_model_cache_stats = {"hits": 0, "misses": 0}
+
 
 class ChooseMoveCheckpoint:
-    def __init__(self, checkpoint_name: str, choose_move: Callable):
-        self.neural_network = copy.deepcopy(load_checkpoint(checkpoint_name))
+    """Opponent that chooses moves with a checkpointed network.
+
+    Checkpoints of the same file share one (cached) network, which is only ever run under
+    torch.inference_mode(), so creating many of them is cheap.
+
+    With `optimize` (an inference mode, see optimize_for_inference()), moves are chosen with an
+    optimized copy of the network instead, and `num_threads` sets torch's thread count.
+    """
+
+    def __init__(
+        self,
+        checkpoint_name: str,
+        choose_move: Callable,
+        optimize: Optional[str] = None,
+        num_threads: Optional[int] = None,
+    ):
+        self.neural_network: Union[nn.Module, InferenceModel] = load_model(HERE / checkpoint_name)
+        if optimize is not None:
+            self.neural_network = optimize_for_inference(self.neural_network, optimize, num_threads)
         self._choose_move = choose_move
 
     def __call__(self, state: np.ndarray) -> int:
-        return self._choose_move(state, self.neural_network)
+        with torch.inference_mode():
+            return self._choose_move(state, self.neural_network)
 
 
 def checkpoint_model(model: nn.Module, checkpoint_name: str) -> None:
-    torch.save(model, HERE / checkpoint_name)
+    _atomic_save(model, HERE / checkpoint_name)
 
 
 def load_checkpoint(checkpoint_name: str) -> nn.Module:
-    return torch.load(HERE / checkpoint_name)
+    """A new copy of a checkpointed model, so it can be trained."""
+    return _torch_load(HERE / checkpoint_name)
 
 
-def load_network(team_name: str, network_folder: Path = HERE) -> nn.Module:
+def load_network(
+    team_name: str,
+    network_folder: Path = HERE,
+    optimize: Optional[str] = None,
+    num_threads: Optional[int] = None,
+) -> Union[nn.Module, InferenceModel]:
+    """Load a new copy of a network saved by save_network(), in eval mode. With `optimize`, an
+    InferenceModel of the (cached) network for opponents to choose moves with (see
+    optimize_for_inference())."""
     net_path = network_folder / f"{team_name}_network.pt"
     assert (
         net_path.exists()
     ), f"Network saved using TEAM_NAME='{team_name}' doesn't exist! ({net_path})"
-    model = torch.load(net_path)
-    model.eval()
-    return model
+    if optimize is not None:
+        return optimize_for_inference(load_model(net_path), optimize, num_threads)
+    network = _torch_load(net_path)
+    network.eval()
+    return network
 
 
 def save_network(network: nn.Module, team_name: str) -> None:
@@ -45,9 +85,85 @@ def save_network(network: nn.Module, team_name: str) -> None:
     n_retries = 5
     for attempt in range(n_retries):
         try:
-            torch.save(network, net_path)
-            load_network(team_name)
+            _atomic_save(network, net_path)
+            # Checks the file loads, and leaves it in the cache for opponents to use
+            load_model(net_path)
             return
         except Exception:
             if attempt == n_retries - 1:
                 raise
+
+
+def _atomic_save(model: nn.Module, path: Path) -> None:
+    # Loaded models memory-map their file, so it's never written over in place: the new version
+    # goes to a temporary file that then replaces it, and models of the old one keep their weights
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        torch.save(model, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def _torch_load(path: Path) -> nn.Module:
+    # Memory-map the weights rather than reading them all in. Only files saved in torch's
+    # zipfile format (the default since torch 1.6) can be memory-mapped, by torch 2.1+
+    try:
+        return torch.load(path, mmap=True, weights_only=False)
+    except (RuntimeError, TypeError):
+        return torch.load(path, weights_only=False)
+
+
+def load_model(path: Union[str, Path]) -> nn.Module:
+    """Load a model saved with torch.save(), in eval mode.
+
+    Models are cached per process (see set_model_cache_size()), so loading the same unchanged
+    file again returns the same model object, shared by every opponent of that file. Don't train
+    a model returned by this, load it with load_checkpoint() or load_network() instead.
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    # Saves replace the file, so a new version has a new inode even within the same mtime tick
+    key = (str(path), stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    with _MODEL_CACHE_LOCK:
+        if key in _MODEL_CACHE:
+            _MODEL_CACHE.move_to_end(key)
+            _model_cache_stats["hits"] += 1
+            return _MODEL_CACHE[key]
+        _model_cache_stats["misses"] += 1
+
+    model = _torch_load(path)
+    model.eval()
+
+    with _MODEL_CACHE_LOCK:
+        # Drop older versions of the file
+        for stale_key in [cached for cached in _MODEL_CACHE if cached[0] == key[0]]:
+            del _MODEL_CACHE[stale_key]
+        if _model_cache_size != 0:
+            _MODEL_CACHE[key] = model
+        _evict()
+    return model
+
+
+def _evict() -> None:
+    while _model_cache_size is not None and len(_MODEL_CACHE) > _model_cache_size:
+        _MODEL_CACHE.popitem(last=False)
+
+
+def set_model_cache_size(max_size: Optional[int]) -> None:
+    """Keep at most `max_size` models loaded (None for no limit, 0 to turn caching off)."""
+    global _model_cache_size
+    with _MODEL_CACHE_LOCK:
+        _model_cache_size = max_size
+        _evict()
+
+
+def clear_model_cache() -> None:
+    with _MODEL_CACHE_LOCK:
+        _MODEL_CACHE.clear()
+        _model_cache_stats.update(hits=0, misses=0)
+
+
+def model_cache_info() -> Dict[str, Optional[int]]:
+    with _MODEL_CACHE_LOCK:
+        return {**_model_cache_stats, "size": len(_MODEL_CACHE), "max_size": _model_cache_size}
@@ -0,0 +1,250 @@
+import math
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+from game_mechanics.collision import BarrierGeometry, legacy_hit
+from game_mechanics.models import (
+    N_HEADINGS,
+    BulletSlots,
+    Coord,
+    DummyBullet,
+    DummyScreen,
+    DummyShip,
+    Spaceship,
+    get_barrier_geometry,
+    heading_angle,
+    heading_of,
+)
+
+# The constants Vector2.rotate_ip() uses to turn by +-ANGLE_TURN degrees, so that headless ships
+# turn exactly as graphical ones do
+COS_CLOCKWISE = math.cos(Spaceship.ANGLE_TURN * math.pi / 180.0)
+SIN_CLOCKWISE = math.sin(Spaceship.ANGLE_TURN * math.pi / 180.0)
+COS_ANTICLOCKWISE = math.cos((360 - Spaceship.ANGLE_TURN) * math.pi / 180.0)
+SIN_ANTICLOCKWISE = math.sin((360 - Spaceship.ANGLE_TURN) * math.pi / 180.0)
+
+SHIP_RADIUS = int(DummyShip().get_width() / 2)
+BULLET_RADIUS = int(DummyBullet().get_width() / 2)
+
+
+class HeadlessBullet:
+    """Bullet for games that aren't rendered: plain floats in __slots__, no sprite or Vector2.
+
+    Moves, hits barriers and collides exactly like models.Bullet.
+    """
+
+    __slots__ = ("x", "y", "last_x", "last_y", "vx", "vy", "hit_barrier", "barrier_geometry")
+
+    name = "bullet"
+    radius = BULLET_RADIUS
+    # Bullets always face up
+    angle = 0
+
+    def __init__(
+        self, x: float, y: float, vx: float, vy: float, barrier_geometry: BarrierGeometry
+    ) -> None:
+        self.barrier_geometry = barrier_geometry
+        self.fire(x, y, vx, vy)
+
+    def fire(self, x: float, y: float, vx: float, vy: float) -> None:
+        """(Re)start the bullet at (x, y), so spent bullets can be reused."""
+        self.x = x
+        self.y = y
+        self.last_x = x
+        self.last_y = y
+        self.vx = vx
+        self.vy = vy
+        self.hit_barrier = False
+
+    @property
+    def position(self) -> Tuple[float, float]:
+        return self.x, self.y
+
+    @property
+    def last_position(self) -> Tuple[float, float]:
+        return self.last_x, self.last_y
+
+    @property
+    def velocity(self) -> Tuple[float, float]:
+        return self.vx, self.vy
+
+    def move(self, surface: Any) -> None:
+        self.last_x, self.last_y = self.x, self.y
+        new_x, new_y = self.x + self.vx, self.y + self.vy
+        if self.barrier_geometry.hit((self.x, self.y), (new_x, new_y), self.radius):
+            self.hit_barrier = True
+            return
+        self.x, self.y = new_x, new_y
+
+    def collides_with(self, other_obj: Any) -> bool:
+        """Fudge factor stops bullets skipping over objects."""
+        return legacy_hit((self.x, self.y), other_obj.position, self.radius, other_obj.radius)
+
+
+class HeadlessSpaceship:
+    """Spaceship for games that aren't rendered: plain floats in __slots__, no sprite, sound or
+    Vector2.
+
+    Has the same interface (position, angle, bullets, dead, collides_with, the moves...) and
+    moves exactly like models.Spaceship, so games play out identically with or without
+    rendering. Vectors (position, direction, velocity) are (x, y) tuples rather than Vector2s,
+    so only indexing and unpacking them works the same.
+    """
+
+    __slots__ = (
+        "x",
+        "y",
+        "dx",
+        "dy",
+        "heading",
+        "vx",
+        "vy",
+        "starting_position",
+        "starting_orientation",
+        "player",
+        "dead",
+        "bullets",
+        "num_bullets",
+        "game_size",
+        "include_barriers",
+        "barrier_geometry",
+        "rng",
+    )
+
+    ANGLE_TURN = Spaceship.ANGLE_TURN
+    ACCELERATION = Spaceship.ACCELERATION
+    BULLET_SPEED = Spaceship.BULLET_SPEED
+    SHOOTING_JITTER = Spaceship.SHOOTING_JITTER
+    NUM_BULLETS = Spaceship.NUM_BULLETS
+
+    name = "spaceship"
+    radius = SHIP_RADIUS
+    graphical = False
+
+    def __init__(
+        self,
+        starting_position: Tuple[int, int],
+        starting_orientation: Coord,
+        player: int,
+        game_size: Tuple[int, int],
+        graphical: bool = False,
+        include_barriers: bool = True,
+        rng: Optional[np.random.Generator] = None,
+        num_bullets: Optional[int] = None,
+        barrier_geometry: Optional[BarrierGeometry] = None,
+    ) -> None:
+        assert not graphical, "Use models.Spaceship for graphical games"
+        self.starting_position = starting_position
+        self.starting_orientation = starting_orientation
+        self.player = player
+        self.dead = False
+        self.vx = self.vy = 0.0
+        self.game_size = game_size
+        self.include_barriers = include_barriers
+        if barrier_geometry is None:
+            barrier_geometry = get_barrier_geometry(game_size, include_barriers)
+        self.barrier_geometry = barrier_geometry
+        # Source of the shooting jitter, the global numpy random state unless given
+        self.rng = np.random if rng is None else rng
+        self.num_bullets = self.NUM_BULLETS if num_bullets is None else num_bullets
+        self.reset()
+
+    def reset(self) -> None:
+        self.x, self.y = float(self.starting_position[0]), float(self.starting_position[1])
+        self.dx = float(self.starting_orientation[0])
+        self.dy = float(self.starting_orientation[1])
+        self.heading = heading_of(self.starting_orientation)
+        self.bullets = BulletSlots(self.num_bullets)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, HeadlessSpaceship):
+            raise NotImplemented
+        return self.player == other.player
+
+    @property
+    def position(self) -> Tuple[float, float]:
+        return self.x, self.y
+
+    @property
+    def direction(self) -> Tuple[float, float]:
+        return self.dx, self.dy
+
+    @property
+    def velocity(self) -> Tuple[float, float]:
+        return self.vx, self.vy
+
+    @property
+    def barriers(self) -> List[Any]:
+        return self.barrier_geometry.barriers
+
+    @property
+    def angle(self) -> int:
+        return heading_angle(self.heading, self.dy)
+
+    def stop(self) -> None:
+        self.vx = self.vy = 0.0
+
+    def rotate(self, clockwise: bool = True) -> None:
+        if clockwise:
+            cos, sin = COS_CLOCKWISE, SIN_CLOCKWISE
+            self.heading = (self.heading + 1) % N_HEADINGS
+        else:
+            cos, sin = COS_ANTICLOCKWISE, SIN_ANTICLOCKWISE
+            self.heading = (self.heading - 1) % N_HEADINGS
+        # Rotated like Vector2.rotate_ip(), rather than looked up from the heading, so positions
+        # are the same down to the last bit
+        dx, dy = self.dx, self.dy
+        self.dx = cos * dx - sin * dy
+        self.dy = sin * dx + cos * dy
+
+    def accelerate(self) -> None:
+        self.vx += self.dx * self.ACCELERATION
+        self.vy += self.dy * self.ACCELERATION
+
+    def _move_by(self, step_x: float, step_y: float) -> None:
+        new_position = (self.x + step_x, self.y + step_y)
+        if self.barrier_geometry.hit((self.x, self.y), new_position, self.radius):
+            return
+        self.x, self.y = new_position
+
+    def move_forward(self) -> None:
+        self._move_by(self.dx * self.radius, self.dy * self.radius)
+
+    def strafe_left(self) -> None:
+        # Direction rotated by -90 degrees
+        self._move_by(self.dy * self.radius, -self.dx * self.radius)
+
+    def strafe_right(self) -> None:
+        # Direction rotated by 90 degrees
+        self._move_by(-self.dy * self.radius, self.dx * self.radius)
+
+    def move(self, surface: DummyScreen) -> None:
+        # Same as edge_barriers()
+        width, height = surface.get_size()
+        self.x = min(width - self.radius, max(0 + self.radius, self.x + self.vx))
+        self.y = min(height - self.radius, max(0 + self.radius, self.y + self.vy))
+
+    def collides_with(self, other_obj: Any) -> bool:
+        """Fudge factor stops bullets skipping over objects."""
+        return legacy_hit((self.x, self.y), other_obj.position, self.radius, other_obj.radius)
+
+    def shoot(self) -> None:
+        # Limit number of bullets
+        bullets = self.bullets
+        if bullets.full:
+            return
+        jitter_x = self.rng.normal(0, self.SHOOTING_JITTER)
+        jitter_y = self.rng.normal(0, self.SHOOTING_JITTER)
+        position_velocity = (
+            self.x,
+            self.y,
+            self.dx * self.BULLET_SPEED + self.vx + jitter_x,
+            self.dy * self.BULLET_SPEED + self.vy + jitter_y,
+        )
+        # Reuses the bullet object in the free slot once it's been fired before
+        bullet = bullets.spare()
+        if bullet is None:
+            bullet = HeadlessBullet(*position_velocity, self.barrier_geometry)
+        else:
+            bullet.fire(*position_velocity)
+        bullets.add(bullet)
@@ -0,0 +1,138 @@
+import copy
+import warnings
+from typing import Any, Callable, List, Optional, Tuple
+
+import numpy as np
+import torch
+from torch import nn
+
+INFERENCE_MODES = ("auto", "numpy", "script", "trace", "eager")
+
+# Elementwise activations the NumPy forward pass knows, by module type
+_NUMPY_ACTIVATIONS = {
+    nn.ReLU: lambda x: np.maximum(x, 0, out=x),
+    nn.Tanh: lambda x: np.tanh(x, out=x),
+    nn.Sigmoid: lambda x: np.reciprocal(1 + np.exp(-x)),
+    nn.Identity: lambda x: x,
+}
+
+
+class NumpyMLP:
+    """Forward pass of an MLP (an `nn.Sequential` of Linear layers and elementwise activations)
+    in NumPy, which skips torch's per-op dispatch overhead on single small inputs."""
+
+    def __init__(self, model: nn.Sequential):
+        self.layers: List[Tuple[str, Any]] = []
+        for module in model:
+            if isinstance(module, nn.Linear):
+                weight = module.weight.detach().cpu().numpy().astype(np.float32)
+                bias = None
+                if module.bias is not None:
+                    bias = module.bias.detach().cpu().numpy().astype(np.float32)
+                # Transposed once here so the forward pass is a plain x @ W
+                self.layers.append(("linear", (np.ascontiguousarray(weight.T), bias)))
+            elif isinstance(module, nn.LeakyReLU):
+                slope = module.negative_slope
+                self.layers.append(("activation", lambda x, s=slope: np.where(x > 0, x, s * x)))
+            elif isinstance(module, nn.Softmax) and module.dim in (-1, None):
+                self.layers.append(("activation", _softmax))
+            elif type(module) in _NUMPY_ACTIVATIONS:
+                self.layers.append(("activation", _NUMPY_ACTIVATIONS[type(module)]))
+            else:
+                raise ValueError(f"Can't run {type(module).__name__} layers in NumPy")
+
+    def __call__(self, x: Any) -> torch.Tensor:
+        out = np.asarray(x, dtype=np.float32)
+        for kind, layer in self.layers:
+            if kind == "linear":
+                weight, bias = layer
+                out = out @ weight
+                if bias is not None:
+                    out += bias
+            else:
+                out = layer(out)
+        return torch.from_numpy(out)
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    x = np.exp(x - x.max(axis=-1, keepdims=True))
+    return x / x.sum(axis=-1, keepdims=True)
+
+
+class InferenceModel:
+    """A network prepared for inference: called like the original module, always in
+    `torch.inference_mode()`.
+
+    It returns tensors just as the module did, so `choose_move(state, network)` functions work
+    unchanged with either.
+    """
+
+    def __init__(self, forward: Callable, mode: str):
+        self.forward = forward
+        self.mode = mode
+
+    def __call__(self, *inputs: Any) -> Any:
+        with torch.inference_mode():
+            return self.forward(*inputs)
+
+    def __repr__(self) -> str:
+        return f"InferenceModel(mode={self.mode!r})"
+
+
+def _input_size(model: nn.Module) -> int:
+    for module in model.modules():
+        if isinstance(module, nn.Linear):
+            return module.in_features
+    raise ValueError("Can't tell the model's input size, pass an example_input to trace it with")
+
+
+def optimize_for_inference(
+    model: nn.Module,
+    mode: str = "auto",
+    num_threads: Optional[int] = None,
+    example_input: Optional[torch.Tensor] = None,
+) -> InferenceModel:
+    """Wrap `model` to run as fast as possible on single observations.
+
+    mode:
+        "numpy": a NumPy forward pass, for `nn.Sequential` MLPs (see NumpyMLP).
+        "script": `torch.jit.script`, then frozen.
+        "trace": `torch.jit.trace` on `example_input` (by default zeros the size of the first
+            nn.Linear's input), then frozen. Only valid if the forward pass doesn't branch on its
+            input.
+        "eager": the module as it is.
+        "auto": the first of numpy, script and eager that works for this model.
+
+    num_threads: if given, sets the number of torch threads for the whole process (once, here,
+        rather than on every call). One is fastest for small networks, and avoids oversubscribing
+        the CPU when envs run in many processes. None leaves torch's setting alone.
+    """
+    assert mode in INFERENCE_MODES, f"mode must be one of {INFERENCE_MODES}, not {mode}"
+    if num_threads is not None:
+        torch.set_num_threads(num_threads)
+    model = copy.deepcopy(model).eval()
+    if mode in ("auto", "numpy"):
+        try:
+            if not isinstance(model, nn.Sequential):
+                raise ValueError("Only nn.Sequential models can be run in NumPy")
+            return InferenceModel(NumpyMLP(model), "numpy")
+        except ValueError:
+            if mode == "numpy":
+                raise
+    # Newer versions of torch warn that TorchScript is deprecated
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)
+        if mode in ("auto", "script"):
+            try:
+                scripted = torch.jit.freeze(torch.jit.script(model))
+                return InferenceModel(scripted, "script")
+            except Exception:
+                if mode == "script":
+                    raise
+        if mode == "trace":
+            if example_input is None:
+                example_input = torch.zeros(_input_size(model))
+            with torch.no_grad():
+                traced = torch.jit.freeze(torch.jit.trace(model, example_input))
+            return InferenceModel(traced, "trace")
+    return InferenceModel(model, "eager")
@@ -0,0 +1,33 @@
+import importlib
+from types import ModuleType
+from typing import Any, Optional
+
+
+class LazyModule:
+    """Stands in for a module that's only imported the first time one of its attributes is used.
+
+    Games that aren't rendered never touch pygame, so they don't pay for importing it (or see its
+    banner). Attributes are cached on first use, so later lookups cost no more than a module's.
+    """
+
+    def __init__(self, name: str):
+        self.__name = name
+        self.__module: Optional[ModuleType] = None
+
+    @property
+    def is_imported(self) -> bool:
+        return self.__module is not None
+
+    def __getattr__(self, attr: str) -> Any:
+        if self.__module is None:
+            self.__module = importlib.import_module(self.__name)
+        value = getattr(self.__module, attr)
+        setattr(self, attr, value)
+        return value
+
+    def __repr__(self) -> str:
+        state = "imported" if self.is_imported else "not imported yet"
+        return f"<lazy module {self.__name!r} ({state})>"
+
+
+pygame: Any = LazyModule("pygame")
@@ -1,18 +1,27 @@
+from __future__ import annotations
+
+import math
 from abc import ABC, abstractmethod
-from typing import Any, List, Literal, Tuple, Union
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Iterator, List, Literal, Optional, Sequence, Tuple, Union
 
 import numpy as np
+from game_mechanics.collision import BarrierGeometry, legacy_hit
+from game_mechanics.shooter_utils import edge_barriers, load_sound, load_sprite, rotated_sprite
 
-import pygame
-from game_mechanics.shooter_utils import edge_barriers, load_sound, load_sprite
-from pygame.math import Vector2
-from pygame.surface import Surface
-from pygame.transform import rotozoom
+if TYPE_CHECKING:
+    import pygame
+    from pygame.math import Vector2
+    from pygame.surface import Surface
+else:
+    # Only imported once something is drawn
+    from game_mechanics.lazy_import import pygame
 
-UP = Vector2(0, -1)
-DOWN = Vector2(0, 1)
-RIGHT = Vector2(1, 0)
-LEFT = Vector2(-1, 0)
+# Plain tuples, so that headless games never need pygame
+UP = (0.0, -1.0)
+DOWN = (0.0, 1.0)
+RIGHT = (1.0, 0.0)
+LEFT = (-1.0, 0.0)
 
 
 BLACK_COLOR = (0, 0, 0)
@@ -20,18 +29,40 @@ WHITE_COLOR = (255, 255, 255)
 NEON_GREEN = (57, 255, 20)
 
 # Types of coordinates used throughout
-Coord = Union[Vector2, Tuple[int, int]]
+Coord = Union["Vector2", Tuple[int, int]]
+# Anything np.random.default_rng() accepts
+Seed = Union[None, int, np.random.SeedSequence]
+
+
+class DummyRect:
+    """The parts of pygame.Rect a DummyScreen needs, without importing pygame."""
+
+    def __init__(self, left: int, top: int, width: int, height: int):
+        self.left, self.top, self.width, self.height = left, top, width, height
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+    def collidepoint(self, *point: Any) -> bool:
+        """Whether the point, (x, y) or x, y, is inside the rect. Like pygame.Rect, the
+        coordinates are truncated towards zero first."""
+        x, y = point if len(point) == 2 else point[0]
+        return (
+            self.left <= int(x) < self.left + self.width
+            and self.top <= int(y) < self.top + self.height
+        )
 
 
 class DummyScreen:
     def __init__(self, size: Tuple[int, int]):
         self.size = size
-        self.rect = pygame.Rect(0, 0, size[0], size[1])
+        self.rect = DummyRect(0, 0, size[0], size[1])
 
     def get_size(self) -> Tuple[int, int]:
         return self.size[0], self.size[1]
 
-    def get_rect(self) -> pygame.Rect:
+    def get_rect(self) -> DummyRect:
         return self.rect
 
 
@@ -69,14 +100,14 @@ class GameObject:
         self.set_position(starting_position)
         self.sprite = sprite
         self.radius = int(sprite.get_width() / 2)
-        self.velocity = Vector2(velocity)
+        self.velocity = pygame.Vector2(velocity)
         self.face_up()
 
     def set_position(self, position: Coord) -> None:
-        self.position = Vector2(position)
+        self.position = pygame.Vector2(position)
 
     def set_orientation(self, orientation: Vector2) -> None:
-        self.direction = Vector2(orientation)
+        self.direction = pygame.Vector2(orientation)
 
     def face_up(self) -> None:
         self.set_orientation(UP)
@@ -85,20 +116,76 @@ class GameObject:
     def angle(self) -> int:
         return round(self.direction.angle_to(UP))
 
-    def draw(self, surface: pygame.surface.Surface) -> None:
+    def draw(self, surface: pygame.surface.Surface) -> pygame.Rect:
         assert isinstance(self.sprite, pygame.Surface)
-        blit_position = self.position - Vector2(self.radius)
-        surface.blit(self.sprite, blit_position)
+        blit_position = self.position - pygame.Vector2(self.radius)
+        return surface.blit(self.sprite, blit_position)
 
     def move(self, surface: Union[pygame.surface.Surface, DummyScreen]) -> None:
-        self.position = edge_barriers(self.position + self.velocity, self.radius, surface)
+        # In place, rather than allocating a new Vector2 every tick
+        self.position += self.velocity
+        edge_barriers(self.position, self.radius, surface, out=self.position)
 
     def collides_with(self, other_obj: "GameObject") -> bool:
         """Fudge factor stops bullets skipping over objects."""
+        return legacy_hit(self.position, other_obj.position, self.radius, other_obj.radius)
+
+
+class BulletSlots:
+    """A ship's bullets, in a fixed number of slots (the most it can have in flight at once).
+
+    The live bullets fill the first `n_alive` slots in the order they were fired (`alive` is the
+    mask of those slots), so len(), iteration and indexing see the same sequence a list of the
+    live bullets would. Slots past them keep spent bullets, which headless ships fire again rather
+    than allocating new ones.
+    """
+
+    __slots__ = ("slots", "n_alive")
+
+    def __init__(self, capacity: int, spares: Sequence[Any] = ()):
+        assert capacity > 0 and len(spares) <= capacity, "Need a slot per bullet"
+        self.slots: List[Any] = [*spares, *([None] * (capacity - len(spares)))]
+        self.n_alive = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self.slots)
+
+    @property
+    def alive(self) -> List[bool]:
+        return [idx < self.n_alive for idx in range(len(self.slots))]
+
+    @property
+    def full(self) -> bool:
+        return self.n_alive == len(self.slots)
+
+    def __len__(self) -> int:
+        return self.n_alive
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.slots[: self.n_alive])
+
+    def __getitem__(self, idx: int) -> Any:
+        if idx < 0:
+            idx += self.n_alive
+        if not 0 <= idx < self.n_alive:
+            raise IndexError("bullet index out of range")
+        return self.slots[idx]
+
+    def __repr__(self) -> str:
+        return f"BulletSlots({list(self)!r}, capacity={self.capacity})"
+
+    def spare(self) -> Any:
+        """The spent bullet in the first free slot (None if that slot has never been used)."""
+        return self.slots[self.n_alive]
+
+    def add(self, bullet: Any) -> None:
+        assert not self.full, "No free bullet slot"
+        self.slots[self.n_alive] = bullet
+        self.n_alive += 1
 
-        fudge_factor = 1.5
-        distance = self.position.distance_to(other_obj.position)
-        return distance < (self.radius * fudge_factor) + (other_obj.radius * fudge_factor)
+    def clear(self) -> None:
+        self.n_alive = 0
 
 
 class Spaceship(GameObject):
@@ -116,6 +203,9 @@ class Spaceship(GameObject):
         game_size: Tuple[int, int],
         graphical: bool = True,
         include_barriers: bool = True,
+        rng: Optional[np.random.Generator] = None,
+        num_bullets: Optional[int] = None,
+        barrier_geometry: Optional[BarrierGeometry] = None,
     ) -> None:
 
         self.starting_position = starting_position
@@ -124,39 +214,61 @@ class Spaceship(GameObject):
         self.player = player
         self.dead = False
         self.name = "spaceship"
+        # Source of the shooting jitter, the global numpy random state unless given
+        self.rng = np.random if rng is None else rng
+        self.num_bullets = self.NUM_BULLETS if num_bullets is None else num_bullets
+
+        # Every opponent of player1 looks like player2
+        self.sprite_name = f"spaceship_player{min(player, 2)}"
 
         if self.graphical:
-            super().__init__(
-                starting_position, load_sprite(f"spaceship_player{player}"), Vector2(0)
-            )
+            super().__init__(starting_position, load_sprite(self.sprite_name), pygame.Vector2(0))
             try:
                 self.laser_sound = load_sound("laser")
             except pygame.error:
                 self.laser_sound = DummySound()
         else:
-            super().__init__(starting_position, DummyShip(), Vector2(0))
+            super().__init__(starting_position, DummyShip(), pygame.Vector2(0))
             self.laser_sound = DummySound()
 
         self.reset()
         self.include_barriers = include_barriers
         self.game_size = game_size
-        self.barriers = get_barriers(self.game_size) if self.include_barriers else []
+        # The arena's barriers, those of the standard arena of game_size unless given
+        if barrier_geometry is None:
+            barrier_geometry = get_barrier_geometry(self.game_size, self.include_barriers)
+        self.barrier_geometry = barrier_geometry
+        self.barriers = self.barrier_geometry.barriers
 
     def reset(self) -> None:
         self.set_position(self.starting_position)
         self.set_orientation(self.starting_orientation)
 
-        self.bullets: List[Bullet] = []
+        self.bullets = BulletSlots(self.num_bullets)
 
     def __eq__(self, other: Any) -> bool:
         if not isinstance(other, Spaceship):
             raise NotImplemented
         return self.player == other.player
 
+    def set_orientation(self, orientation: Coord) -> None:
+        super().set_orientation(orientation)
+        self.heading = heading_of(orientation)
+
+    @property
+    def angle(self) -> int:
+        return heading_angle(self.heading, self.direction.y)
+
     def rotate(self, clockwise: bool = True) -> None:
         sign = 1 if clockwise else -1
         angle = self.ANGLE_TURN * sign
+        # The direction is still rotated (rather than looked up from the heading), as that's
+        # what positions have always been computed from, down to the last bit
         self.direction.rotate_ip(angle)
+        self.heading = (self.heading + sign) % N_HEADINGS
+
+    def stop(self) -> None:
+        self.velocity *= 0
 
     def accelerate(self) -> None:
         self.velocity += self.direction * self.ACCELERATION
@@ -164,46 +276,43 @@ class Spaceship(GameObject):
     def move_forward(self) -> None:
         distance = self.radius
         new_position = self.position + self.direction * distance
-        for barrier in self.barriers:
-            if barrier.hit_barrier(self.position, new_position, self.radius):
-                return
+        if self.barrier_geometry.hit(self.position, new_position, self.radius):
+            return
         self.position = new_position
 
     def strafe_left(self) -> None:
         distance = self.radius
         new_position = self.position + (self.direction.rotate(-90) * distance)
-        for barrier in self.barriers:
-            if barrier.hit_barrier(self.position, new_position, self.radius):
-                return
+        if self.barrier_geometry.hit(self.position, new_position, self.radius):
+            return
         self.position = new_position
 
     def strafe_right(self) -> None:
         distance = self.radius
         new_position = self.position + (self.direction.rotate(90) * distance)
-        for barrier in self.barriers:
-            if barrier.hit_barrier(self.position, new_position, self.radius):
-                return
+        if self.barrier_geometry.hit(self.position, new_position, self.radius):
+            return
         self.position = new_position
 
-    def draw(self, surface: pygame.surface.Surface) -> None:
-        angle = self.direction.angle_to(UP)
+    def draw(self, surface: pygame.surface.Surface) -> pygame.Rect:
         assert isinstance(self.sprite, pygame.Surface)
-        rotated_surface = rotozoom(self.sprite, angle, 1.0)
-        rotated_surface_size = Vector2(rotated_surface.get_size())
+        # Ships only ever face multiples of ANGLE_TURN, so the rotated sprites are cached
+        rotated_surface = rotated_sprite(self.sprite_name, self.angle % 360)
+        rotated_surface_size = pygame.Vector2(rotated_surface.get_size())
         blit_position = self.position - rotated_surface_size * 0.5
-        surface.blit(rotated_surface, blit_position)
+        return surface.blit(rotated_surface, blit_position)
 
     def shoot(self) -> None:
         # Limit number of bullets
-        if len(self.bullets) == self.NUM_BULLETS:
+        if self.bullets.full:
             return
         bullet_velocity = (
             self.direction * self.BULLET_SPEED
             + self.velocity
-            + Vector2(
+            + pygame.Vector2(
                 (
-                    np.random.normal(0, self.SHOOTING_JITTER),
-                    np.random.normal(0, self.SHOOTING_JITTER),
+                    self.rng.normal(0, self.SHOOTING_JITTER),
+                    self.rng.normal(0, self.SHOOTING_JITTER),
                 )
             )
         )
@@ -213,11 +322,39 @@ class Spaceship(GameObject):
             self.graphical,
             game_size=self.game_size,
             include_barriers=self.include_barriers,
+            barrier_geometry=self.barrier_geometry,
         )
-        self.bullets.append(bullet)
+        self.bullets.add(bullet)
         self.laser_sound.play()
 
 
+# Ships only ever face one of N_HEADINGS directions: heading k is k turns of ANGLE_TURN clockwise
+# from UP. The angle of a ship facing each heading is what direction.angle_to(UP) has always
+# given, in [-270, 90)
+N_HEADINGS = 360 // Spaceship.ANGLE_TURN
+HEADING_ANGLES = tuple(
+    (-Spaceship.ANGLE_TURN * heading + 270) % 360 - 270 for heading in range(N_HEADINGS)
+)
+LEFT_HEADING = 270 // Spaceship.ANGLE_TURN
+
+
+def heading_angle(heading: int, direction_y: float) -> int:
+    """The angle of a ship facing `heading`, as round(direction.angle_to(UP)).
+
+    Facing LEFT, angle_to() gives -270 or 90 depending on which side of 0 rounding has left the
+    direction's y, so that's the one heading that needs `direction_y`.
+    """
+    if heading == LEFT_HEADING and math.copysign(1.0, direction_y) < 0:
+        return 90
+    return HEADING_ANGLES[heading]
+
+
+def heading_of(direction: Coord) -> int:
+    """Heading of the direction a ship can face that's nearest to `direction`."""
+    clockwise_from_up = math.degrees(math.atan2(direction[0], -direction[1]))
+    return round(clockwise_from_up / Spaceship.ANGLE_TURN) % N_HEADINGS
+
+
 class Bullet(GameObject):
     def __init__(
         self,
@@ -226,6 +363,7 @@ class Bullet(GameObject):
         graphical: bool,
         game_size: Tuple[int, int],
         include_barriers: bool = True,
+        barrier_geometry: Optional[BarrierGeometry] = None,
     ):
         self.hit_barrier = False
         if graphical:
@@ -233,14 +371,19 @@ class Bullet(GameObject):
         else:
             super().__init__(position, DummyBullet(), velocity)
         self.name = "bullet"
-        self.barriers = get_barriers(game_size) if include_barriers else []
+        if barrier_geometry is None:
+            barrier_geometry = get_barrier_geometry(game_size, include_barriers)
+        self.barrier_geometry = barrier_geometry
+        self.barriers = self.barrier_geometry.barriers
+        # Where the last move() started, for swept collisions
+        self.last_position = self.position
 
     def move(self, surface: Any) -> None:
+        self.last_position = self.position
         new_position = self.position + self.velocity
-        for barrier in self.barriers:
-            if barrier.hit_barrier(self.position, new_position, self.radius):
-                self.hit_barrier = True
-                return
+        if self.barrier_geometry.hit(self.position, new_position, self.radius):
+            self.hit_barrier = True
+            return
         self.set_position(new_position)
 
 
@@ -300,17 +443,30 @@ class Barrier:
             or intersect(self.corner3, self.corner4, pos, new_pos)
         )
 
-    def draw(self, screen: pygame.surface.Surface) -> None:
-        pygame.draw.line(screen, NEON_GREEN, self.corner1, self.corner2, width=self.width)
+    def draw(self, screen: pygame.surface.Surface) -> pygame.Rect:
+        return pygame.draw.line(screen, NEON_GREEN, self.corner1, self.corner2, width=self.width)
 
     def move(self, screen: pygame.surface.Surface) -> None:
         pass
 
 
 def get_barriers(game_size: Tuple[int, int]) -> List[Barrier]:
+    return list(_barrier_layout(tuple(game_size)))
+
+
+@lru_cache(maxsize=None)
+def get_barrier_geometry(
+    game_size: Tuple[int, int], include_barriers: bool = True
+) -> BarrierGeometry:
+    """The barriers of an arena, built once and shared by everything in it."""
+    return BarrierGeometry(_barrier_layout(tuple(game_size)) if include_barriers else ())
+
+
+@lru_cache(maxsize=None)
+def _barrier_layout(game_size: Tuple[int, int]) -> Tuple[Barrier, ...]:
 
     barrier_length = int(game_size[1] * 0.4)
-    return [
+    return (
         Barrier(
             orientation="vertical",
             center=(int(game_size[0] * 0.2), int(game_size[1] * 0.5)),
@@ -331,7 +487,7 @@ def get_barriers(game_size: Tuple[int, int]) -> List[Barrier]:
             center=(int(game_size[0] * 0.5), int(game_size[1] * 0.8)),
             length=barrier_length,
         ),
-    ]
+    )
 
 
 def get_spawn_points(game_size: Tuple[int, int]) -> List[Tuple[int, int]]:
@@ -343,5 +499,5 @@ def get_spawn_points(game_size: Tuple[int, int]) -> List[Tuple[int, int]]:
     ]
 
 
-def get_spawn_orientations() -> List[Vector2]:
+def get_spawn_orientations() -> List[Tuple[float, float]]:
     return [RIGHT, LEFT, DOWN, UP]
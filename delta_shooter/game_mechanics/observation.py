@@ -0,0 +1,164 @@
+import math
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import torch
+from game_mechanics.models import Spaceship
+
+# sin & cos of every whole-degree angle, computed exactly as the observation always has been
+ANGLE_SIN = np.array([math.sin(math.pi * angle / 180) for angle in range(360)])
+ANGLE_COS = np.array([math.cos(math.pi * angle / 180) for angle in range(360)])
+_SIN_COS = list(zip(ANGLE_SIN.tolist(), ANGLE_COS.tolist()))
+
+ObservationBuffer = Union[np.ndarray, torch.Tensor]
+
+
+class PaddingBullet:
+    """Stands in for unfired bullets: a bullet at (0, 0), facing up."""
+
+    position = (0.0, 0.0)
+    angle = 0
+
+
+def normalise(x: np.ndarray, max_x: float) -> np.ndarray:
+    """Normalise x to be between -1 and 1.
+
+    (x must always be positive)
+    """
+    return 2 * (x / max_x) - 1
+
+
+def _as_array(out: ObservationBuffer) -> np.ndarray:
+    """NumPy view onto `out`, so results are written into it without a copy."""
+    if isinstance(out, torch.Tensor):
+        assert out.device.type == "cpu", "Observations can only be written into CPU tensors"
+        return out.numpy()
+    return out
+
+
+class ObservationEncoder:
+    """Builds the observations of both players from one table of object features.
+
+    Each object is a row of (x, y, sin(angle), cos(angle)). Player1's observation is the table in
+    order [player1, player2, player1's bullets, player2's bullets], player2's is the same rows
+    permuted so that they come first.
+
+    The table is built with plain Python floats (the same IEEE doubles NumPy would use, so the
+    result is identical) as that's several times faster than NumPy on 24 numbers.
+
+    Games of `n_players` use `encode_all()`: the table of every ship then every ship's bullets is
+    built once, in Python, and each player's observation gathered from it by NumPy (the player
+    first, then the others in turn), so the Python work grows linearly with the number of ships.
+    """
+
+    def __init__(
+        self,
+        game_size: Tuple[int, int],
+        num_bullets: int = Spaceship.NUM_BULLETS,
+        n_players: int = 2,
+    ):
+        self.game_size = game_size
+        self.num_bullets = num_bullets
+        self.n_players = n_players
+        self.n_objects = n_players * (1 + num_bullets)
+        self.n_observations = self.n_objects * 4
+
+        # Unfired bullets are represented by this object
+        self.padding = PaddingBullet()
+        self._padding_row = self._row(self.padding)
+        # Slices of the flattened table, in player2's order
+        ships, bullets1, bullets2 = 4 * 2, 4 * (2 + num_bullets), self.n_observations
+        self._player2_slices = [
+            slice(4, 8),
+            slice(0, 4),
+            slice(bullets1, bullets2),
+            slice(ships, bullets1),
+        ]
+        self._gather = self._gather_indices()
+
+    def _gather_indices(self) -> np.ndarray:
+        """(n_players, n_observations) indices of each player's observation in encode_all()'s
+        flattened table."""
+        n_players, num_bullets = self.n_players, self.num_bullets
+        rows = []
+        for player in range(n_players):
+            order = [(player + offset) % n_players for offset in range(n_players)]
+            bullets = [
+                n_players + ship * num_bullets + idx for ship in order for idx in range(num_bullets)
+            ]
+            rows.append(order + bullets)
+        return (np.array(rows)[..., None] * 4 + np.arange(4)).reshape(n_players, -1)
+
+    def _row(self, game_object: Any) -> Tuple[float, ...]:
+        x, y = game_object.position[0], game_object.position[1]
+        width, height = self.game_size
+        sin, cos = _SIN_COS[game_object.angle % 360]
+        # normalise()
+        return (2 * (x / width) - 1, 2 * (y / height) - 1, sin, cos)
+
+    def _build_features(self, player1: Spaceship, player2: Spaceship) -> List[float]:
+        """The flattened table, in player1's order."""
+        features = [*self._row(player1), *self._row(player2)]
+        for ship in (player1, player2):
+            # Straight from the ship's BulletSlots, the live bullets fill its first slots
+            slots, n_alive = ship.bullets.slots, ship.bullets.n_alive
+            for idx in range(self.num_bullets):
+                features += self._row(slots[idx]) if idx < n_alive else self._padding_row
+        return features
+
+    def encode(
+        self,
+        player1: Spaceship,
+        player2: Spaceship,
+        out: Optional[ObservationBuffer] = None,
+    ) -> ObservationBuffer:
+        """Observations of both players, as a (2, n_observations) array.
+
+        If `out` (a NumPy array or CPU tensor of that shape) is given, they are written into it.
+        """
+        features = self._build_features(player1, player2)
+        if out is None:
+            out = np.empty((2, self.n_observations), dtype=np.float32)
+        buffer = _as_array(out)
+        buffer[0] = features
+        buffer[1] = [value for rows in self._player2_slices for value in features[rows]]
+        return out
+
+    def encode_player(
+        self,
+        player: Spaceship,
+        opponent: Spaceship,
+        out: Optional[ObservationBuffer] = None,
+    ) -> ObservationBuffer:
+        """Observation from the point of view of `player`, as a (n_observations,) array."""
+        if out is None:
+            out = np.empty(self.n_observations, dtype=np.float32)
+        _as_array(out)[:] = self._build_features(player, opponent)
+        return out
+
+    def encode_all(
+        self,
+        ships: Sequence[Spaceship],
+        out: Optional[ObservationBuffer] = None,
+        player: Optional[int] = None,
+    ) -> ObservationBuffer:
+        """Observations of every ship in an `n_players` game, as a (n_players, n_observations)
+        array, or only that of `ships[player]` (as a (n_observations,) array) if given.
+
+        Dead ships, and their bullets, are represented like unfired bullets. If `out` is given,
+        the observations are written into it.
+        """
+        assert len(ships) == self.n_players, f"Expected {self.n_players} ships"
+        features = []
+        for ship in ships:
+            features += self._padding_row if ship.dead else self._row(ship)
+        for ship in ships:
+            slots, n_alive = ship.bullets.slots, ship.bullets.n_alive
+            for idx in range(self.num_bullets):
+                features += self._row(slots[idx]) if idx < n_alive else self._padding_row
+
+        gather = self._gather if player is None else self._gather[player]
+        if out is None:
+            out = np.empty(gather.shape, dtype=np.float32)
+        np.take(np.array(features, dtype=np.float32), gather, out=_as_array(out))
+        return out
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Optional, Tuple
+
+import numpy as np
+from game_mechanics.models import NEON_GREEN, Spaceship, get_barrier_geometry
+from game_mechanics.shooter_utils import ASSET_PATH
+
+if TYPE_CHECKING:
+    import pygame
+else:
+    from game_mechanics.lazy_import import pygame
+
+N_ANGLES = 360 // Spaceship.ANGLE_TURN
+# Channels of the occupancy grid, from the point of view of the player it's rendered for
+OCCUPANCY_CHANNELS = ("player", "opponent", "player_bullets", "opponent_bullets", "barriers")
+OCCUPANCY_CELL_SIZE = 10
+
+# A sprite as (RGB (h, w, 3) uint8, alpha (h, w, 1) uint16) arrays
+SpriteArrays = Tuple[np.ndarray, np.ndarray]
+
+
+def _sprite_arrays(surface: pygame.Surface) -> SpriteArrays:
+    # surfarray is indexed (x, y), swap to the usual (row, column)
+    rgb = pygame.surfarray.array3d(surface).transpose(1, 0, 2)
+    alpha = pygame.surfarray.array_alpha(surface).T[..., None].astype(np.uint16)
+    return np.ascontiguousarray(rgb), alpha
+
+
+@lru_cache(maxsize=None)
+def load_sprite_arrays(name: str) -> SpriteArrays:
+    """A sprite as arrays, loaded without converting it for a display (so no video driver)."""
+    return _sprite_arrays(pygame.image.load(ASSET_PATH / f"sprites/{name}.png"))
+
+
+@lru_cache(maxsize=None)
+def rotated_sprite_arrays(name: str) -> Tuple[SpriteArrays, ...]:
+    """The sprite rotated (like Spaceship.draw()) to each of the N_ANGLES angles a ship can face,
+    indexed by angle // Spaceship.ANGLE_TURN."""
+    sprite = pygame.image.load(ASSET_PATH / f"sprites/{name}.png")
+    return tuple(
+        _sprite_arrays(pygame.transform.rotozoom(sprite, idx * Spaceship.ANGLE_TURN, 1.0))
+        for idx in range(N_ANGLES)
+    )
+
+
+@lru_cache(maxsize=None)
+def _static_layers(
+    game_size: Tuple[int, int], include_barriers: bool, background: bool
+) -> Tuple[np.ndarray, np.ndarray]:
+    """The background image and the mask of pixels the barriers are drawn over."""
+    width, height = game_size
+    if background:
+        space = pygame.surfarray.array3d(pygame.image.load(ASSET_PATH / "sprites/space.png"))
+        # Blitted at (0, 0) so the arena shows the top left of the image
+        background_rgb = np.ascontiguousarray(space[:width, :height].transpose(1, 0, 2))
+    else:
+        background_rgb = np.zeros((height, width, 3), dtype=np.uint8)
+
+    surface = pygame.Surface(game_size)
+    for barrier in get_barrier_geometry(game_size, include_barriers).barriers:
+        barrier.draw(surface)
+    barrier_mask = pygame.surfarray.array3d(surface).any(axis=-1).T
+    return background_rgb, barrier_mask
+
+
+def _heading_index(ship: Any) -> int:
+    return round(ship.angle / Spaceship.ANGLE_TURN) % N_ANGLES
+
+
+class OffscreenRenderer:
+    """Draws games into NumPy arrays without a display, for agents that learn from pixels.
+
+    `rgb()` draws the arena as the graphical game does (sprites alpha-blended in NumPy, using
+    sprites pre-rotated to every angle a ship can face). `occupancy()` rasterises it into a low
+    resolution grid with a channel per object type (see OCCUPANCY_CHANNELS).
+
+    Only pygame's image loading and software drawing are used, so this works with no display or
+    SDL video driver.
+    """
+
+    def __init__(
+        self, game_size: Tuple[int, int], include_barriers: bool = True, background: bool = True
+    ):
+        self.game_size = game_size
+        self.background, self.barrier_mask = _static_layers(
+            tuple(game_size), include_barriers, background
+        )
+        self.ship_sprites = {
+            player: rotated_sprite_arrays(f"spaceship_player{player}") for player in (1, 2)
+        }
+        self.bullet_sprite = load_sprite_arrays("bullet")
+        self.barrier_geometry = get_barrier_geometry(game_size, include_barriers)
+
+    def rgb(self, player1: Any, player2: Any, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Draw the game as a (height, width, 3) uint8 RGB array."""
+        if out is None:
+            out = self.background.copy()
+        else:
+            out[:] = self.background
+
+        for ship in (player1, player2):
+            if ship.dead:
+                continue
+            sprite = self.ship_sprites[ship.player][_heading_index(ship)]
+            self._blend(out, sprite, ship.position)
+            for bullet in ship.bullets:
+                self._blend(out, self.bullet_sprite, bullet.position)
+
+        # Barriers are drawn last, on top of everything
+        out[self.barrier_mask] = NEON_GREEN
+        return out
+
+    @staticmethod
+    def _blend(out: np.ndarray, sprite: SpriteArrays, center: Any) -> None:
+        """Alpha-blend `sprite` into `out` centred on `center`, clipped to the arena."""
+        rgb, alpha = sprite
+        height, width = alpha.shape[:2]
+        top, left = int(center[1] - height / 2), int(center[0] - width / 2)
+        y0, x0 = max(top, 0), max(left, 0)
+        y1, x1 = min(top + height, out.shape[0]), min(left + width, out.shape[1])
+        if y0 >= y1 or x0 >= x1:
+            return
+        src_rgb = rgb[y0 - top : y1 - top, x0 - left : x1 - left]
+        src_alpha = alpha[y0 - top : y1 - top, x0 - left : x1 - left]
+        dst = out[y0:y1, x0:x1]
+        dst[:] = (src_rgb * src_alpha + dst * (255 - src_alpha) + 127) // 255
+
+    def occupancy(
+        self,
+        player: Any,
+        opponent: Any,
+        cell_size: int = OCCUPANCY_CELL_SIZE,
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Rasterise the game from `player`'s point of view into a float32 array of shape
+        (len(OCCUPANCY_CHANNELS), height // cell_size, width // cell_size).
+
+        A cell is 1 when its centre is inside an object (or the object is inside the cell).
+        """
+        grid_shape = (self.game_size[1] // cell_size, self.game_size[0] // cell_size)
+        if out is None:
+            out = np.zeros((len(OCCUPANCY_CHANNELS), *grid_shape), dtype=np.float32)
+        else:
+            out[:] = 0
+        centres_y, centres_x = self._cell_centres(grid_shape, cell_size)
+
+        for channel, ship in ((0, player), (1, opponent)):
+            if ship.dead:
+                continue
+            self._fill_disk(
+                out[channel], centres_x, centres_y, ship.position, ship.radius, cell_size
+            )
+            for bullet in ship.bullets:
+                self._fill_disk(
+                    out[channel + 2],
+                    centres_x,
+                    centres_y,
+                    bullet.position,
+                    bullet.radius,
+                    cell_size,
+                )
+
+        corners = self.barrier_geometry.corners
+        for (min_x, min_y), (max_x, max_y) in zip(corners[:, 0], corners[:, 3]):
+            out[4, self._cells(min_y, max_y, cell_size), self._cells(min_x, max_x, cell_size)] = 1
+        return out
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _cell_centres(grid_shape: Tuple[int, int], cell_size: int) -> Tuple[np.ndarray, np.ndarray]:
+        centres = [(np.arange(n) + 0.5) * cell_size for n in grid_shape]
+        return centres[0][:, None], centres[1][None, :]
+
+    @staticmethod
+    def _cells(low: float, high: float, cell_size: int) -> slice:
+        return slice(max(int(low // cell_size), 0), max(int(high // cell_size) + 1, 0))
+
+    @staticmethod
+    def _fill_disk(
+        channel: np.ndarray,
+        centres_x: np.ndarray,
+        centres_y: np.ndarray,
+        position: Any,
+        radius: float,
+        cell_size: int,
+    ) -> None:
+        x, y = position[0], position[1]
+        channel[((centres_x - x) ** 2 + (centres_y - y) ** 2) <= radius**2] = 1
+        row, column = int(y // cell_size), int(x // cell_size)
+        if 0 <= row < channel.shape[0] and 0 <= column < channel.shape[1]:
+            channel[row, column] = 1
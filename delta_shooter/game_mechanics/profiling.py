@@ -0,0 +1,59 @@
+import functools
+import inspect
+import time
+from collections import defaultdict
+from typing import Any, Callable, DefaultDict, Dict
+
+
+class PhaseProfiler:
+    """Cumulative wall-clock time (in nanoseconds) and call counts per named phase.
+
+    Phases are timed by wrapping the functions that run them with `wrap()`. Nothing is wrapped
+    until profiling is switched on, so there is no overhead when it's off.
+    """
+
+    def __init__(self) -> None:
+        self.total_ns: DefaultDict[str, int] = defaultdict(int)
+        self.calls: DefaultDict[str, int] = defaultdict(int)
+
+    def wrap(self, phase: str, fn: Callable) -> Callable:
+        total_ns, calls = self.total_ns, self.calls
+
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def timed_async(*args: Any, **kwargs: Any) -> Any:
+                start = time.perf_counter_ns()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    total_ns[phase] += time.perf_counter_ns() - start
+                    calls[phase] += 1
+
+            return timed_async
+
+        @functools.wraps(fn)
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                total_ns[phase] += time.perf_counter_ns() - start
+                calls[phase] += 1
+
+        return timed
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """{phase: {"calls": ..., "total_ns": ..., "mean_ns": ...}} for every phase that ran."""
+        return {
+            phase: {
+                "calls": self.calls[phase],
+                "total_ns": self.total_ns[phase],
+                "mean_ns": self.total_ns[phase] // max(self.calls[phase], 1),
+            }
+            for phase in self.total_ns
+        }
+
+    def reset(self) -> None:
+        self.total_ns.clear()
+        self.calls.clear()
@@ -0,0 +1,124 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import torch
+from game_mechanics.shooter_env import NO_MOVE, ShooterEnv
+
+
+def _encode_moves(moves: List[Optional[int]]) -> np.ndarray:
+    return np.array([NO_MOVE if move is None else move for move in moves], dtype=np.int8)
+
+
+def _decode_move(move: int) -> Optional[int]:
+    return None if move == NO_MOVE else int(move)
+
+
+@dataclass
+class Replay:
+    """A game stored as its seed and the moves of both players.
+
+    Games are deterministic given the env's seed, so this is all that's needed to re-simulate a
+    game exactly (headless, at full speed) with `replay_game()` or `replay_states()`.
+    """
+
+    seed: int
+    actions: np.ndarray
+    opponent_actions: np.ndarray
+    include_barriers: bool = True
+    half_sized_game: bool = False
+    legacy_collisions: bool = False
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+    def save(self, path: Union[str, Path]) -> None:
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                seed=self.seed,
+                actions=self.actions,
+                opponent_actions=self.opponent_actions,
+                include_barriers=self.include_barriers,
+                half_sized_game=self.half_sized_game,
+                legacy_collisions=self.legacy_collisions,
+            )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "Replay":
+        with np.load(path) as data:
+            return cls(
+                seed=int(data["seed"]),
+                # Replays used to store moves as uint8, with 255 (-1 as an int8) for no move
+                actions=data["actions"].astype(np.int8),
+                opponent_actions=data["opponent_actions"].astype(np.int8),
+                include_barriers=bool(data["include_barriers"]),
+                half_sized_game=bool(data["half_sized_game"]),
+                # Replays saved before swept collisions were played with the legacy ones
+                legacy_collisions=bool(data.get("legacy_collisions", True)),
+            )
+
+
+def record_game(
+    your_choose_move: Callable[[torch.Tensor], Optional[int]],
+    opponent_choose_move: Callable[[torch.Tensor], Optional[int]],
+    seed: int,
+    include_barriers: bool = True,
+    half_sized_game: bool = False,
+    max_steps: Optional[int] = None,
+    legacy_collisions: bool = False,
+) -> Tuple[Replay, float]:
+    """Play a headless game from `seed` and record it.
+
+    Returns the replay and the total return for `your_choose_move`.
+    """
+    env = ShooterEnv(
+        opponent_choose_move,
+        include_barriers=include_barriers,
+        half_sized_game=half_sized_game,
+        seed=seed,
+        legacy_collisions=legacy_collisions,
+    )
+    state, _, done, _ = env.reset()
+    actions: List[Optional[int]] = []
+    opponent_actions: List[Optional[int]] = []
+    total_return = 0.0
+    while not done and (max_steps is None or len(actions) < max_steps):
+        action = your_choose_move(state)
+        state, reward, done, _ = env.step(action)
+        actions.append(action)
+        opponent_actions.append(env.last_opponent_move)
+        total_return += reward
+
+    replay = Replay(
+        seed=seed,
+        actions=_encode_moves(actions),
+        opponent_actions=_encode_moves(opponent_actions),
+        include_barriers=include_barriers,
+        half_sized_game=half_sized_game,
+        legacy_collisions=legacy_collisions,
+    )
+    return replay, total_return
+
+
+def replay_states(replay: Replay) -> Iterator[Tuple[torch.Tensor, float, bool]]:
+    """Re-simulate `replay` headless, yielding (state, reward, done) for player1 after each
+    step."""
+    opponent_moves = iter(replay.opponent_actions)
+    env = ShooterEnv(
+        lambda state: _decode_move(next(opponent_moves)),
+        include_barriers=replay.include_barriers,
+        half_sized_game=replay.half_sized_game,
+        seed=replay.seed,
+        legacy_collisions=replay.legacy_collisions,
+    )
+    env.reset()
+    for action in replay.actions:
+        state, reward, done, _ = env.step(_decode_move(action))
+        yield state, reward, done
+
+
+def replay_game(replay: Replay) -> float:
+    """Re-simulate `replay` headless and return player1's total return."""
+    return float(sum(reward for _, reward, _ in replay_states(replay)))
@@ -0,0 +1,224 @@
+import shutil
+import tempfile
+import weakref
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+import torch
+
+ArrayLike = Union[np.ndarray, torch.Tensor, Any]
+
+
+class SumTree:
+    """Binary tree where each node holds the sum of its children, over `capacity` leaf
+    priorities. Updating k priorities and sampling k leaves are both O(k log n) and vectorised
+    over k."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        # Leaves start at index `n_leaves` (a power of two), the root is index 1
+        self.n_leaves = 1 << max(capacity - 1, 0).bit_length()
+        self.tree = np.zeros(2 * self.n_leaves, dtype=np.float64)
+
+    @property
+    def total(self) -> float:
+        return float(self.tree[1])
+
+    def __getitem__(self, idx: ArrayLike) -> np.ndarray:
+        return self.tree[np.asarray(idx) + self.n_leaves]
+
+    def update(self, idx: ArrayLike, priorities: ArrayLike) -> None:
+        nodes = np.asarray(idx, dtype=np.int64) + self.n_leaves
+        self.tree[nodes] = priorities
+        # Recompute the sums on the path from each leaf up to the root, a level at a time
+        nodes = np.unique(nodes[nodes > 1] // 2)
+        while len(nodes):
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+            nodes = np.unique(nodes[nodes > 1] // 2)
+
+    def find(self, values: ArrayLike) -> np.ndarray:
+        """Index of the leaf whose cumulative priority range contains each value in
+        [0, total)."""
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        while nodes[0] < self.n_leaves:
+            left = 2 * nodes
+            left_sum = self.tree[left]
+            # Never into a subtree with no priority, which rounding (of values at or just below
+            # the total) could otherwise reach, finding a leaf that can't be sampled
+            go_right = (values >= left_sum) & (self.tree[left + 1] > 0)
+            values = np.where(go_right, values - left_sum, values)
+            nodes = np.where(go_right, left + 1, left)
+        return nodes - self.n_leaves
+
+
+class ReplayBuffer:
+    """Circular buffer of (s, a, r, s', done) transitions stored in `numpy.memmap` files, so it
+    can be bigger than RAM. Observations are `n_observations` long (an env's `n_observations`).
+
+    Without a `directory` the files go in a temporary one, deleted by `close()`.
+
+    Transitions are only ever added in batches of arrays (e.g. one step of a BatchedShooterEnv or
+    ShooterVecEnv), and sampled as batches of tensors. With `prioritized=True`, sampling is
+    proportional to priority**alpha (new transitions get the highest priority seen so far) and
+    importance sampling weights are returned; update them with `update_priorities()`.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        n_observations: int,
+        directory: Optional[Union[str, Path]] = None,
+        prioritized: bool = False,
+        alpha: float = 0.6,
+        epsilon: float = 1e-6,
+        seed: Optional[int] = None,
+    ):
+        self.capacity = capacity
+        self.n_observations = n_observations
+        # A temporary directory unless told where to put the files, removed by close() (or once
+        # the buffer is garbage collected)
+        if directory is None:
+            self.directory = Path(tempfile.mkdtemp(prefix="shooter_replay_"))
+            self._remove_directory = weakref.finalize(
+                self, shutil.rmtree, self.directory, ignore_errors=True
+            )
+        else:
+            self.directory = Path(directory)
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._remove_directory = None
+        self.observations = self._memmap("observations", np.float32, (capacity, n_observations))
+        self.next_observations = self._memmap(
+            "next_observations", np.float32, (capacity, n_observations)
+        )
+        self.actions = self._memmap("actions", np.int8, (capacity,))
+        self.rewards = self._memmap("rewards", np.float32, (capacity,))
+        self.dones = self._memmap("dones", np.bool_, (capacity,))
+        self.position = 0
+        self.size = 0
+
+        self.prioritized = prioritized
+        self.alpha = alpha
+        self.epsilon = epsilon
+        self.priorities = SumTree(capacity) if prioritized else None
+        self.max_priority = 1.0
+        self.rng = np.random.default_rng(seed)
+
+    def _memmap(self, name: str, dtype: Any, shape: tuple) -> np.memmap:
+        return np.memmap(self.directory / f"{name}.dat", dtype=dtype, mode="w+", shape=shape)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(
+        self,
+        observations: ArrayLike,
+        actions: ArrayLike,
+        rewards: ArrayLike,
+        next_observations: ArrayLike,
+        dones: ArrayLike,
+    ) -> np.ndarray:
+        """Add a batch of transitions, overwriting the oldest once full. Returns the indices they
+        were stored at."""
+        actions = np.asarray(actions)
+        n = len(actions)
+        assert n <= self.capacity, "Can't add more transitions than the buffer holds at once"
+        idx = (self.position + np.arange(n)) % self.capacity
+        # One or two contiguous slices, depending on whether the batch wraps around
+        first = min(n, self.capacity - self.position)
+        slices = [(slice(0, first), slice(self.position, self.position + first))]
+        if first < n:
+            slices.append((slice(first, n), slice(0, n - first)))
+        for array, values in (
+            (self.observations, observations),
+            (self.actions, actions),
+            (self.rewards, rewards),
+            (self.next_observations, next_observations),
+            (self.dones, dones),
+        ):
+            values = np.asarray(values)
+            for source, destination in slices:
+                array[destination] = values[source]
+
+        if self.priorities is not None:
+            self.priorities.update(idx, np.full(n, self.max_priority**self.alpha))
+        self.position = (self.position + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+        return idx
+
+    def add_vec_step(
+        self,
+        observations: ArrayLike,
+        actions: ArrayLike,
+        rewards: ArrayLike,
+        next_observations: ArrayLike,
+        dones: ArrayLike,
+        info: Dict[str, Any],
+    ) -> np.ndarray:
+        """Add one step of a BatchedShooterEnv / ShooterVecEnv. Finished games have already been
+        reset, so their s' is taken from info["terminal_observation"]."""
+        dones = np.asarray(dones)
+        next_observations = np.where(
+            dones[:, None],
+            np.asarray(info["terminal_observation"]),
+            np.asarray(next_observations),
+        )
+        return self.add(observations, actions, rewards, next_observations, dones)
+
+    def sample(self, batch_size: int, beta: float = 0.4) -> Dict[str, torch.Tensor]:
+        """A batch of {"observations", "actions", "rewards", "next_observations", "dones",
+        "indices", "weights"} tensors. Weights are all 1 unless prioritized."""
+        assert self.size > 0, "Can't sample from an empty buffer"
+        if self.priorities is None:
+            idx = self.rng.integers(self.size, size=batch_size)
+            weights = np.ones(batch_size, dtype=np.float32)
+        else:
+            # One sample from each of `batch_size` equal slices of the total priority
+            total = self.priorities.total
+            values = (np.arange(batch_size) + self.rng.random(batch_size)) * (total / batch_size)
+            idx = self.priorities.find(values)
+            probabilities = self.priorities[idx] / total
+            weights = (self.size * probabilities) ** -beta
+            weights = (weights / weights.max()).astype(np.float32)
+
+        # Fancy indexing copies out of the memmaps
+        return {
+            "observations": torch.from_numpy(self.observations[idx]),
+            "actions": torch.from_numpy(self.actions[idx].astype(np.int64)),
+            "rewards": torch.from_numpy(self.rewards[idx]),
+            "next_observations": torch.from_numpy(self.next_observations[idx]),
+            "dones": torch.from_numpy(self.dones[idx]),
+            "indices": torch.from_numpy(idx),
+            "weights": torch.from_numpy(weights),
+        }
+
+    def update_priorities(self, indices: ArrayLike, priorities: ArrayLike) -> None:
+        """Set the priorities (e.g. absolute TD errors) of sampled transitions."""
+        assert self.priorities is not None, "Only prioritized buffers have priorities"
+        priorities = np.abs(np.asarray(priorities, dtype=np.float64)) + self.epsilon
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.priorities.update(np.asarray(indices), priorities**self.alpha)
+
+    def flush(self) -> None:
+        """Write any changes to the memmaps out to disk."""
+        for array in (
+            self.observations,
+            self.next_observations,
+            self.actions,
+            self.rewards,
+            self.dones,
+        ):
+            array.flush()
+
+    def close(self) -> None:
+        """Flush the memmaps, and delete the files if they're in a temporary directory."""
+        self.flush()
+        if self._remove_directory is not None:
+            self._remove_directory()
+
+    def __enter__(self) -> "ReplayBuffer":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
@@ -0,0 +1,144 @@
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+from game_mechanics.collision import BarrierGeometry
+from game_mechanics.headless import SHIP_RADIUS
+from game_mechanics.models import (
+    Barrier,
+    Seed,
+    get_barrier_geometry,
+    get_spawn_orientations,
+    get_spawn_points,
+)
+
+# A ship's spawn point and the direction it faces
+Spawn = Tuple[Tuple[int, int], Tuple[float, float]]
+
+
+@dataclass(frozen=True, eq=False)
+class Scenario:
+    """An arena and who plays in it: its size, barriers, spawn points and number of players.
+
+    Spawn points come in opposite pairs (0 & 1, 2 & 3...). Each game player1 spawns at a random
+    point and player2 at the one opposite it, further players take the next pairs (wrapping
+    around), so there must be an even number of spawn points and at least one per player. Each
+    player faces a random one of `spawn_orientations`.
+    """
+
+    game_size: Tuple[int, int]
+    barriers: Tuple[Barrier, ...]
+    spawn_points: Tuple[Tuple[int, int], ...]
+    n_players: int = 2
+    spawn_orientations: Tuple[Tuple[float, float], ...] = tuple(get_spawn_orientations())
+
+    def __post_init__(self) -> None:
+        assert self.n_players >= 2, "Need at least 2 players"
+        assert len(self.spawn_points) % 2 == 0, "Spawn points come in opposite pairs"
+        assert len(self.spawn_points) >= self.n_players, "Need a spawn point per player"
+
+    @classmethod
+    def classic(cls, half_sized_game: bool = False, include_barriers: bool = True) -> "Scenario":
+        """The standard two player arena (what ShooterEnv plays when not given a scenario)."""
+        return _classic_scenario(half_sized_game, include_barriers)
+
+    @classmethod
+    def random(
+        cls,
+        game_size: Tuple[int, int],
+        n_players: int,
+        n_barriers: int,
+        seed: Seed = None,
+        barrier_length: Optional[int] = None,
+    ) -> "Scenario":
+        """A `game_size` arena with `n_barriers` randomly placed barriers that don't overlap, and
+        spawn points for `n_players` (each pair mirrored through the centre) clear of them."""
+        rng = np.random.default_rng(seed)
+        width, height = game_size
+        length = barrier_length or int(min(game_size) * 0.15)
+        # Space kept around barriers (and spawn points), so a ship always fits between them
+        clearance = 2 * SHIP_RADIUS
+
+        barriers: List[Barrier] = []
+        attempts = 0
+        while len(barriers) < n_barriers:
+            attempts += 1
+            if attempts > 100 * n_barriers:
+                raise ValueError(f"Couldn't fit {n_barriers} barriers into a {game_size} arena")
+            centre = (
+                int(rng.integers(length, width - length)),
+                int(rng.integers(length, height - length)),
+            )
+            orientation = "vertical" if rng.random() < 0.5 else "horizontal"
+            barrier = Barrier(orientation=orientation, length=length, center=centre)
+            if not any(_overlap(barrier, other, clearance) for other in barriers):
+                barriers.append(barrier)
+
+        geometry = BarrierGeometry(barriers)
+
+        def is_clear(point: Tuple[int, int], others: List[Tuple[int, int]]) -> bool:
+            return not geometry.hit(point, point, clearance) and all(
+                np.hypot(point[0] - x, point[1] - y) > 2 * clearance for x, y in others
+            )
+
+        spawn_points: List[Tuple[int, int]] = []
+        attempts = 0
+        while len(spawn_points) < n_players:
+            attempts += 1
+            if attempts > 100 * n_players:
+                raise ValueError(f"Couldn't fit {n_players} spawn points into a {game_size} arena")
+            point = (
+                int(rng.integers(clearance, width - clearance)),
+                int(rng.integers(clearance, height - clearance)),
+            )
+            opposite = (width - point[0], height - point[1])
+            if is_clear(point, spawn_points) and is_clear(opposite, [*spawn_points, point]):
+                spawn_points += [point, opposite]
+
+        return cls(tuple(game_size), tuple(barriers), tuple(spawn_points), n_players)
+
+    @cached_property
+    def barrier_geometry(self) -> BarrierGeometry:
+        return BarrierGeometry(self.barriers)
+
+    @property
+    def is_classic(self) -> bool:
+        """Whether this is one of the standard two player arenas."""
+        return any(
+            self is _classic_scenario(half_sized_game, include_barriers)
+            for half_sized_game in (False, True)
+            for include_barriers in (False, True)
+        )
+
+    def spawn(self, rng: np.random.Generator) -> List[Spawn]:
+        """Where each player starts a game, drawn from `rng`."""
+        n_points = len(self.spawn_points)
+        first = int(rng.integers(n_points))
+        spawns = []
+        for player in range(self.n_players):
+            # Pairs of players spawn opposite each other, pair by pair from player1's point
+            point = ((first + 2 * (player // 2)) % n_points) ^ (player % 2)
+            orientation = self.spawn_orientations[rng.integers(len(self.spawn_orientations))]
+            spawns.append((self.spawn_points[point], orientation))
+        return spawns
+
+
+def _overlap(barrier: Barrier, other: Barrier, clearance: float) -> bool:
+    """Whether two barriers' bounding boxes are closer than `clearance`."""
+    return not (
+        barrier.corner4[0] + clearance < other.corner1[0]
+        or other.corner4[0] + clearance < barrier.corner1[0]
+        or barrier.corner4[1] + clearance < other.corner1[1]
+        or other.corner4[1] + clearance < barrier.corner1[1]
+    )
+
+
+@lru_cache(maxsize=None)
+def _classic_scenario(half_sized_game: bool, include_barriers: bool) -> Scenario:
+    game_size = (300, 225) if half_sized_game else (600, 450)
+    geometry = get_barrier_geometry(game_size, include_barriers)
+    scenario = Scenario(game_size, tuple(geometry.barriers), tuple(get_spawn_points(game_size)))
+    # Shares the geometry everything else in the arena uses
+    scenario.__dict__["barrier_geometry"] = geometry
+    return scenario
@@ -1,28 +1,45 @@
-import math
+from __future__ import annotations
+
 import random
 import time
-from pathlib import Path
-from typing import Callable, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
 
-import pygame
+import numpy as np
 import torch
-from game_mechanics.models import (
-    DummyBullet,
-    DummyScreen,
-    GameObject,
-    Spaceship,
-    get_barriers,
-    get_spawn_orientations,
-    get_spawn_points,
-)
+from game_mechanics.collision import SpatialHash, legacy_hit, swept_hit
+from game_mechanics.headless import HeadlessSpaceship
+from game_mechanics.models import Barrier, DummyScreen, GameObject, Seed, Spaceship
+from game_mechanics.observation import ObservationBuffer, ObservationEncoder, normalise
+from game_mechanics.offscreen import OCCUPANCY_CELL_SIZE, OffscreenRenderer
+from game_mechanics.profiling import PhaseProfiler
+from game_mechanics.scenario import Scenario
 from game_mechanics.shooter_utils import load_sprite, print_text
-from torch import nn
+from game_mechanics.spectator import (
+    GameSnapshot,
+    SnapshotQueue,
+    SpectatorWindow,
+    run_spectated,
+)
 
-HERE = Path(__file__).parent.parent.resolve()
+if TYPE_CHECKING:
+    import pygame
+else:
+    # Only imported when rendering (or playing as a human)
+    from game_mechanics.lazy_import import pygame
 
 BLACK_COLOR = (0, 0, 0)
 WHITE_COLOR = (255, 255, 255)
 
+# Size of the cells ships are bucketed into in games of more than two players, about the size of
+# the area a bullet can hit in one tick
+SHIP_CELL_SIZE = 128
+
+# The opponent's move, or with more than two players the move of each of player1's opponents
+OpponentMove = Union[Optional[int], List[Optional[int]]]
+
+# Stored in place of a None move (no move) in arrays of moves
+NO_MOVE = -1
+
 
 def play_shooter(
     your_choose_move: Callable[[torch.Tensor], int],
@@ -31,6 +48,8 @@ def play_shooter(
     render: bool = False,
     include_barriers: bool = True,
     half_game_size: bool = False,
+    spectate: bool = False,
+    spectator_fps: int = 30,
 ) -> float:
     """Play a game where moves are chosen by `your_choose_move()` and `opponent_choose_move()`.
 
@@ -42,51 +61,34 @@ def play_shooter(
         render: whether to render the game graphically
         game_speed_multiplier: multiplies the speed of the game. High == fast
                                (only has an effect when verbose=True)
+        spectate: play the game at full speed on another thread, while showing its latest
+                  state in a window at `spectator_fps` frames per second
 
     Returns: total_return, which is the sum of return from the game
     """
-    total_return = 0.0
+    snapshots = SnapshotQueue() if spectate else None
     env = ShooterEnv(
         opponent_choose_move,
-        render=render,
+        render=render and not spectate,
         game_speed_multiplier=game_speed_multiplier,
         include_barriers=include_barriers,
         half_sized_game=half_game_size,
+        snapshots=snapshots,
     )
 
-    state, _, done, _ = env.reset()
-    while not done:
-        action = your_choose_move(state)
-        state, reward, done, _ = env.step(action)
-        total_return += reward
-    return total_return
-
-
-def load_network(team_name: str, network_folder: Path = HERE) -> nn.Module:
-    net_path = network_folder / f"{team_name}_network.pt"
-    assert (
-        net_path.exists()
-    ), f"Network saved using TEAM_NAME='{team_name}' doesn't exist! ({net_path})"
-    model = torch.load(net_path)
-    model.eval()
-    return model
-
-
-def save_network(network: nn.Module, team_name: str) -> None:
-    assert isinstance(
-        network, nn.Module
-    ), f"train() function outputs an network type: {type(network)}"
-    assert "/" not in team_name, "Invalid TEAM_NAME. '/' are illegal in TEAM_NAME"
-    net_path = HERE / f"{team_name}_network.pt"
-    n_retries = 5
-    for attempt in range(n_retries):
-        try:
-            torch.save(network, net_path)
-            load_network(team_name)
-            return
-        except Exception:
-            if attempt == n_retries - 1:
-                raise
+    def play() -> float:
+        total_return = 0.0
+        state, _, done, _ = env.reset()
+        while not done:
+            action = your_choose_move(state)
+            state, reward, done, _ = env.step(action)
+            total_return += reward
+        return total_return
+
+    if snapshots is None:
+        return play()
+    window = SpectatorWindow(env.game_size, include_barriers, fps=spectator_fps)
+    return run_spectated(play, snapshots, window)
 
 
 def choose_move_randomly(state: torch.Tensor) -> int:
@@ -101,54 +103,117 @@ class ShooterEnv:
         game_speed_multiplier: float = 1,
         include_barriers: bool = True,
         half_sized_game: bool = False,
+        seed: Seed = None,
+        profile: bool = False,
+        frame_skip: int = 1,
+        opponent_frame_skip: int = 1,
+        dirty_rects: bool = False,
+        snapshots: Optional[SnapshotQueue] = None,
+        reuse_buffers: bool = False,
+        legacy_collisions: bool = False,
+        num_bullets: Optional[int] = None,
+        scenario: Optional[Scenario] = None,
     ):
+        assert frame_skip >= 1 and opponent_frame_skip >= 1, "Frame skips must be at least 1"
 
         self._render = render
+        # Only redraw (and update the display in) the areas that changed since the last frame
+        self.dirty_rects = dirty_rects
+        self._last_drawn: Optional[List[pygame.Rect]] = None
+        # A snapshot of every tick is pushed here, for a SpectatorWindow to draw
+        self.snapshots = snapshots
         self.opponent_choose_move = opponent_choose_move
         self.game_speed_multiplier = game_speed_multiplier
-        self.game_size = (300, 225) if half_sized_game else (600, 450)
+        # The arena and number of players. If given, replaces half_sized_game and include_barriers
+        if scenario is None:
+            scenario = Scenario.classic(half_sized_game, include_barriers)
+        self.scenario = scenario
+        self.n_players = scenario.n_players
+        assert self.n_players == 2 or not legacy_collisions, "Legacy collisions are for 2 players"
+        self.game_size = scenario.game_size
         if self._render:
             self.init_graphics()
         else:
             self.screen = DummyScreen(self.game_size)
 
         self.num_envs = 1
-        self.include_barriers = include_barriers
-        self.barriers = get_barriers(self.game_size) if include_barriers else []
+        # Ticks each action is repeated for, player1's per step() and the opponent's per move
+        self.frame_skip = frame_skip
+        self.opponent_frame_skip = opponent_frame_skip
+        self.include_barriers = bool(scenario.barriers)
+        self.barrier_geometry = scenario.barrier_geometry
+        self.barriers = self.barrier_geometry.barriers
+        # Bullets each ship can have in flight at once, Spaceship.NUM_BULLETS unless given
+        self.num_bullets = Spaceship.NUM_BULLETS if num_bullets is None else num_bullets
+        self.observation_encoder = ObservationEncoder(
+            self.game_size, self.num_bullets, self.n_players
+        )
+        # Live ships by where they are, for bullets to find those they might hit
+        self._ship_hash = SpatialHash(SHIP_CELL_SIZE)
+        self._arena = self.screen.get_rect()
+        # Bullets hit a ship anywhere along their path over the tick (see collision.swept_hit()).
+        # legacy_collisions uses the original end of tick distance test, with its fudge factor,
+        # to reproduce games played before swept collisions
+        self.legacy_collisions = legacy_collisions
+        # With reuse_buffers, observations are written into one preallocated tensor (and the
+        # same info dict is returned) every step, rather than allocating new ones. What's
+        # returned is then only valid until the next step(), so copy anything you keep
+        self.reuse_buffers = reuse_buffers
+        self._info: Dict = {}
+        if reuse_buffers:
+            self._observation_buffer = torch.zeros(self.n_players, self.n_observations)
+            self._observation_views = tuple(self._observation_buffer)
+            self._observation_arrays = tuple(self._observation_buffer.numpy())
+        # Spawns and shooting jitter are drawn from this env's own generator
+        self.rng = np.random.default_rng(seed)
+
+        self._offscreen_renderer: Optional[OffscreenRenderer] = None
+        self.profiler = PhaseProfiler()
+        self._profiled: List[Tuple[Any, str, Callable, bool]] = []
+        if profile:
+            self.enable_profiling()
 
         self.reset()
         if self._render:
             self._draw()
 
-    def reset(self) -> Tuple[torch.Tensor, float, bool, Dict]:
-        self.message = ""
+    def reset(self, seed: Seed = None) -> Tuple[torch.Tensor, float, bool, Dict]:
+        """Start a new game.
 
-        opposite_spawn = {0: 1, 1: 0, 2: 3, 3: 2}
-        player1_idx = random.choice(range(4))
-        # PLayer 2 spawns on the opposite side of the map
-        player2_idx = opposite_spawn[player1_idx]
-
-        spawn_points = get_spawn_points(self.game_size)
+        Pass `seed` to reseed the env's random generator, making the game reproducible.
+        """
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self.message = ""
 
-        self.player1 = Spaceship(
-            spawn_points[player1_idx],
-            random.choice(get_spawn_orientations()),
-            player=1,
-            game_size=self.game_size,
-            graphical=self._render,
-            include_barriers=self.include_barriers,
-        )
-        self.player2 = Spaceship(
-            spawn_points[player2_idx],
-            random.choice(get_spawn_orientations()),
-            player=2,
-            game_size=self.game_size,
-            graphical=self._render,
-            include_barriers=self.include_barriers,
-        )
+        # Games that aren't rendered use lightweight ships with the same behaviour
+        spaceship = Spaceship if self._render else HeadlessSpaceship
+        # Player2 spawns on the opposite side of the map (in the standard arena)
+        self.players = [
+            spaceship(
+                position,
+                orientation,
+                player=idx + 1,
+                game_size=self.game_size,
+                graphical=self._render,
+                include_barriers=self.include_barriers,
+                rng=self.rng,
+                num_bullets=self.num_bullets,
+                barrier_geometry=self.barrier_geometry,
+            )
+            for idx, (position, orientation) in enumerate(self.scenario.spawn(self.rng))
+        ]
+        self.player1, self.player2 = self.players[:2]
         self.done = False
         self.n_actions = 0
-        return self.observation_player1, 0.0, False, {}
+        self.last_opponent_move: OpponentMove = None
+        self._opponent_ticks = 0
+        # The next frame is drawn in full
+        self._last_drawn = None
+        self.n_ticks = 0
+        if self.snapshots is not None:
+            self.snapshots.put(self.snapshot())
+        return self.observation_player1, 0.0, False, self._step_info()
 
     def init_graphics(self) -> None:
         pygame.init()
@@ -171,56 +236,184 @@ class ShooterEnv:
 
     def step(self, action: Optional[int]) -> Tuple[torch.Tensor, float, bool, Dict]:
         """Action should be an integer 0-5 for all bot moves, None is made available for the human
-        player as it is too difficult to control otherwise."""
-
-        self._step(action, self.player1)
+        player as it is too difficult to control otherwise.
 
-        opponent_move = self.opponent_choose_move(state=self.observation_player2)
-        if opponent_move is not None:
-            self._step(opponent_move, self.player2)
+        The action is repeated for `frame_skip` ticks (fewer if the game ends first), and the
+        rewards of those ticks summed.
+        """
+        reward = 0
+        for _ in range(self.frame_skip):
+            self._step(action, self.player1)
+            reward += self._tick(self._choose_opponent_move())
+            if self.done:
+                break
+        return self.observation_player1, reward, self.done, self._step_info()
+
+    def _step_info(self) -> Dict:
+        return self._info if self.reuse_buffers else {}
+
+    def _choose_opponent_move(self) -> OpponentMove:
+        """The opponent picks a new move every `opponent_frame_skip` ticks, and repeats it in
+        between (without its observation being built).
+
+        With more than two players `opponent_choose_move` plays every opponent of player1, so a
+        move is chosen for each (None for those that are dead).
+        """
+        if self._opponent_ticks % self.opponent_frame_skip == 0:
+            if self.n_players == 2:
+                self.last_opponent_move = self.opponent_choose_move(state=self.observation_player2)
+            else:
+                states = self.observations()
+                self.last_opponent_move = [
+                    None if ship.dead else self.opponent_choose_move(state=states[idx])
+                    for idx, ship in enumerate(self.players[1:], start=1)
+                ]
+        self._opponent_ticks += 1
+        return self.last_opponent_move
+
+    def _finish_step(self, opponent_move: OpponentMove) -> Tuple[torch.Tensor, float, bool, Dict]:
+        """Second half of a single tick step(), once the opponent has chosen its move.
+
+        Split out so that the opponent's move can be chosen elsewhere (e.g. batched with the
+        opponent moves of other envs).
+        """
+        self.last_opponent_move = opponent_move
+        reward = self._tick(opponent_move)
+        return self.observation_player1, reward, self.done, self._step_info()
+
+    def _tick(self, opponent_move: OpponentMove) -> int:
+        """Moves the opponent then advances the game by one tick, returns player1's reward."""
+        if self.n_players > 2:
+            assert opponent_move is not None, "Expected a move per opponent"
+            for ship, move in zip(self.players[1:], opponent_move):
+                if not ship.dead:
+                    self._step(move, ship)
+            reward = self._process_free_for_all()
+        else:
+            if opponent_move is not None:
+                self._step(opponent_move, self.player2)
 
-        winners = self._process_game_logic()
+            winners = self._process_game_logic()
 
-        if winners is None or len(winners) > 1:  # Continuing game / Reservoir dogs ending
-            reward = 0
-        else:
+            if winners is None or len(winners) > 1:  # Continuing game / Reservoir dogs ending
+                reward = 0
+            else:
 
-            reward = 1 if winners[0] == self.player1 else -1
+                reward = 1 if winners[0] == self.player1 else -1
 
+        self.n_ticks += 1
+        if self.snapshots is not None:
+            self.snapshots.put(self.snapshot())
         if self._render:
             self._draw()
             time.sleep(0.05 / self.game_speed_multiplier)
 
-        return self.observation_player1, reward, self.done, {}
+        return reward
+
+    def snapshot(self) -> GameSnapshot:
+        assert self.scenario.is_classic, "Snapshots are only of the standard two player arenas"
+        return GameSnapshot.from_ships(
+            self.n_ticks, (self.player1, self.player2), self.message, self.done
+        )
+
+    def _profiled_phases(self) -> List[Tuple[Any, str, str]]:
+        """(owner, attribute, phase) of each function timed when profiling. Phases nest: "step"
+        includes all the others and "game_logic" includes "bullets"."""
+        return [
+            (self, "step", "step"),
+            (self, "_take_action", "take_action"),
+            (self, "opponent_choose_move", "opponent"),
+            (self, "_process_game_logic", "game_logic"),
+            (self, "_process_free_for_all", "game_logic"),
+            (self, "_update_bullets", "bullets"),
+            (self, "_update_bullets_free_for_all", "bullets"),
+            (self.observation_encoder, "encode", "observation"),
+            (self.observation_encoder, "encode_player", "observation"),
+            (self.observation_encoder, "encode_all", "observation"),
+        ]
+
+    def enable_profiling(self) -> None:
+        """Time each phase of step() (see profile_stats).
+
+        Works by shadowing the phases' functions with timed wrappers, so the env runs untouched
+        code while profiling is off.
+        """
+        if self._profiled:
+            return
+        for owner, attr, phase in self._profiled_phases():
+            original = getattr(owner, attr)
+            self._profiled.append((owner, attr, original, attr in vars(owner)))
+            setattr(owner, attr, self.profiler.wrap(phase, original))
+
+    def disable_profiling(self) -> None:
+        """Stop timing phases. The stats gathered so far are kept."""
+        for owner, attr, original, was_instance_attr in self._profiled:
+            if was_instance_attr:
+                setattr(owner, attr, original)
+            else:
+                delattr(owner, attr)
+        self._profiled = []
+
+    @property
+    def profiling(self) -> bool:
+        return bool(self._profiled)
+
+    @property
+    def profile_stats(self) -> Dict[str, Dict[str, int]]:
+        """Cumulative {phase: {"calls", "total_ns", "mean_ns"}} since profiling was enabled or
+        last reset."""
+        return self.profiler.stats()
+
+    def reset_profile(self) -> None:
+        self.profiler.reset()
 
     @property
     def total_game_bullets(self) -> int:
-        return self.player1.NUM_BULLETS * 2
+        return self.num_bullets * self.n_players
 
     @property
     def n_observations(self) -> int:
-        return (2 + self.total_game_bullets) * 3
+        return self.observation_encoder.n_observations
 
     @property
     def observation_player1(self) -> torch.Tensor:
-        prev_observation_player1 = torch.zeros((2 + Spaceship.NUM_BULLETS * 2) * 4)
-        bullets_p1 = self.player1.bullets + [GameObject((0, 0), DummyBullet(), 0)] * (
-            2 - len(self.player1.bullets)
-        )
-        bullets_p2 = self.player2.bullets + [GameObject((0, 0), DummyBullet(), 0)] * (
-            2 - len(self.player2.bullets)
-        )
-        for idx, object in enumerate([self.player1, self.player2, *bullets_p1, *bullets_p2]):
-            prev_observation_player1[idx * 4] = self.normalise(
-                object.position[0], self.game_size[0]
-            )
-            prev_observation_player1[idx * 4 + 1] = self.normalise(
-                object.position[1], self.game_size[1]
-            )
-            prev_observation_player1[idx * 4 + 2] = math.sin(math.pi * (object.angle % 360) / 180)
-            prev_observation_player1[idx * 4 + 3] = math.cos(math.pi * (object.angle % 360) / 180)
+        if self.n_players > 2:
+            return self._observation_of(0)
+        if self.reuse_buffers:
+            encode = self.observation_encoder.encode_player
+            encode(self.player1, self.player2, out=self._observation_arrays[0])
+            return self._observation_views[0]
+        return torch.from_numpy(self.observation_encoder.encode_player(self.player1, self.player2))
 
-        return prev_observation_player1
+    @property
+    def observation_player2(self) -> torch.Tensor:
+        if self.n_players > 2:
+            return self._observation_of(1)
+        if self.reuse_buffers:
+            encode = self.observation_encoder.encode_player
+            encode(self.player2, self.player1, out=self._observation_arrays[1])
+            return self._observation_views[1]
+        return torch.from_numpy(self.observation_encoder.encode_player(self.player2, self.player1))
+
+    def _observation_of(self, idx: int) -> torch.Tensor:
+        encode_all = self.observation_encoder.encode_all
+        if self.reuse_buffers:
+            encode_all(self.players, out=self._observation_arrays[idx], player=idx)
+            return self._observation_views[idx]
+        return torch.from_numpy(encode_all(self.players, player=idx))
+
+    def observations(self, out: Optional[ObservationBuffer] = None) -> ObservationBuffer:
+        """Observations of every player, stacked as a (n_players, n_observations) tensor.
+
+        Pass `out` (a tensor or NumPy array of that shape) to have them written into it instead.
+        """
+        if self.n_players > 2:
+            if out is None:
+                return torch.from_numpy(self.observation_encoder.encode_all(self.players))
+            return self.observation_encoder.encode_all(self.players, out=out)
+        if out is None:
+            return torch.from_numpy(self.observation_encoder.encode(self.player1, self.player2))
+        return self.observation_encoder.encode(self.player1, self.player2, out=out)
 
     @staticmethod
     def normalise(x: float, max_x: float) -> float:
@@ -228,33 +421,11 @@ class ShooterEnv:
 
         (x must always be positive)
         """
-        return 2 * (x / max_x) - 1
-
-    @property
-    def observation_player2(self) -> torch.Tensor:
-        prev_observation_player2 = torch.zeros((2 + Spaceship.NUM_BULLETS * 2) * 4)
-        bullets_p1 = self.player1.bullets + [GameObject((0, 0), DummyBullet(), 0)] * (
-            2 - len(self.player1.bullets)
-        )
-        bullets_p2 = self.player2.bullets + [GameObject((0, 0), DummyBullet(), 0)] * (
-            2 - len(self.player2.bullets)
-        )
-
-        for idx, object in enumerate([self.player2, self.player1, *bullets_p2, *bullets_p1]):
-            prev_observation_player2[idx * 4] = self.normalise(
-                object.position[0], self.game_size[0]
-            )
-            prev_observation_player2[idx * 4 + 1] = self.normalise(
-                object.position[1], self.game_size[1]
-            )
-            prev_observation_player2[idx * 4 + 2] = math.sin(math.pi * (object.angle % 360) / 180)
-            prev_observation_player2[idx * 4 + 3] = math.cos(math.pi * (object.angle % 360) / 180)
-
-        return prev_observation_player2
+        return normalise(x, max_x)
 
     def _take_action(self, action: int, player: Spaceship) -> None:
         self.n_actions += 1
-        player.velocity *= 0
+        player.stop()
         if action == 0:
             player.rotate(clockwise=True)
         elif action == 1:
@@ -268,68 +439,208 @@ class ShooterEnv:
         elif action == 5:
             player.strafe_right()
 
-    def _process_game_logic(self) -> Optional[List[Spaceship]]:
-        for game_object in self._get_game_objects():
-            game_object.move(self.screen)
+    def _update_bullets(self, ship: Spaceship, target: Spaceship) -> int:
+        """Move `ship`'s bullets, test them against `target` and cull those that hit a barrier or
+        left the arena, in one pass over its bullet slots. Returns the number that hit.
 
-        # Can get both players winning reservoir dogs style
-        winners = []
-
-        for bullet in self.player1.bullets:
-            if (
-                not self.screen.get_rect().collidepoint((bullet.position[0], bullet.position[1]))
-                or bullet.hit_barrier
-            ):
-                self.player1.bullets.remove(bullet)
+        The surviving bullets are compacted to the front of the slots in firing order.
+        """
+        arena = self._arena
+        legacy = self.legacy_collisions
+        bullets = ship.bullets
+        slots = bullets.slots
+        n_kept = n_hits = 0
+        skip = False
+        for idx in range(bullets.n_alive):
+            bullet = slots[idx]
+            bullet.move(self.screen)
+            position = bullet.position
+            culled = bullet.hit_barrier or not arena.collidepoint(position[0], position[1])
+            if legacy:
+                # Bullets used to be removed from the list being iterated over, which skipped
+                # (so kept) the bullet after each removed one until the next tick. Only the
+                # bullets that survived were tested, at the end of their move
+                culled = culled and not skip
+                skip = culled
+                hit = not culled and legacy_hit(
+                    position, target.position, bullet.radius, target.radius
+                )
+            else:
+                hit = swept_hit(
+                    bullet.last_position, position, target.position, bullet.radius + target.radius
+                )
+            n_hits += hit
+            if not culled:
+                # Swapped rather than overwritten, so the culled bullet's object can be reused
+                slots[idx], slots[n_kept] = slots[n_kept], bullet
+                n_kept += 1
+        bullets.n_alive = n_kept
+        return n_hits
 
-        for bullet in self.player2.bullets:
-            if (
-                not self.screen.get_rect().collidepoint(bullet.position[0], bullet.position[1])
-                or bullet.hit_barrier
-            ):
-                self.player2.bullets.remove(bullet)
+    def _process_game_logic(self) -> Optional[List[Spaceship]]:
+        # Ships move before any bullet, so bullets are tested against where ships end the tick
+        for ship in (self.player1, self.player2):
+            if not ship.dead:
+                ship.move(self.screen)
 
-        for bullet in self.player1.bullets:
-            if bullet.collides_with(self.player2):
-                self.done = True
+        # Can get both players winning reservoir dogs style
+        winners: List[Spaceship] = []
+        for ship, target in ((self.player1, self.player2), (self.player2, self.player1)):
+            if ship.dead:
+                continue
+            n_hits = self._update_bullets(ship, target)
+            if n_hits:
+                # Legacy collisions count a win per bullet, so two bullets hitting at once was
+                # a draw
+                winners += [ship] * n_hits if self.legacy_collisions else [ship]
+
+        for winner in winners:
+            self.done = True
+            if winner is self.player1:
                 self.message = "Player 1 wins!"
                 self.player2.dead = True
-                if self._render:
-                    self._draw()
-
-                winners.append(self.player1)
-
-        for bullet in self.player2.bullets:
-            if bullet.collides_with(self.player1):
-                self.done = True
+            else:
                 self.message += "Player 2 wins!"
-                winners.append(self.player2)
                 self.player1.dead = True
-                if self._render:
-                    self._draw()
+        if winners and self._render:
+            self._draw()
 
         return winners or None
 
+    def _update_bullets_free_for_all(
+        self, ship: Spaceship, max_ship_radius: float
+    ) -> List[Spaceship]:
+        """_update_bullets() for games of more than two players, where `ship`'s bullets can hit
+        any other ship. Only the ships near each bullet's path (found in `_ship_hash`, within
+        reach of a ship of up to `max_ship_radius`) are tested. Returns the ships hit."""
+        arena = self._arena
+        ships_near = self._ship_hash
+        bullets = ship.bullets
+        slots = bullets.slots
+        n_kept = 0
+        hit: List[Spaceship] = []
+        for idx in range(bullets.n_alive):
+            bullet = slots[idx]
+            bullet.move(self.screen)
+            start, end = bullet.last_position, bullet.position
+            x0, y0, x1, y1 = start[0], start[1], end[0], end[1]
+            reach = bullet.radius + max_ship_radius
+            for target in ships_near.query(
+                min(x0, x1) - reach, min(y0, y1) - reach, max(x0, x1) + reach, max(y0, y1) + reach
+            ):
+                if target is not ship and swept_hit(
+                    start, end, target.position, bullet.radius + target.radius
+                ):
+                    hit.append(target)
+            if not (bullet.hit_barrier or not arena.collidepoint(x1, y1)):
+                slots[idx], slots[n_kept] = slots[n_kept], bullet
+                n_kept += 1
+        bullets.n_alive = n_kept
+        return hit
+
+    def _process_free_for_all(self) -> int:
+        """The game logic of a tick with more than two players, returns player1's reward.
+
+        Every ship's bullets can hit every other ship. Ships that are hit die (and their bullets
+        vanish) but the game goes on without them until player1 dies (-1, or 0 if no one is left
+        alive) or is the last ship alive (+1).
+        """
+        live = [ship for ship in self.players if not ship.dead]
+        ships_near = self._ship_hash
+        ships_near.clear()
+        for ship in live:
+            ship.move(self.screen)
+            position = ship.position
+            ships_near.insert(ship, position[0], position[1])
+
+        max_ship_radius = max(ship.radius for ship in live)
+        hit: List[Spaceship] = []
+        for ship in live:
+            for target in self._update_bullets_free_for_all(ship, max_ship_radius):
+                if all(target is not other for other in hit):
+                    hit.append(target)
+        for ship in hit:
+            ship.dead = True
+            ship.bullets.clear()
+
+        survivors = [ship for ship in live if not ship.dead]
+        reward = 0
+        if self.player1.dead:
+            self.done = True
+            if survivors:
+                reward = -1
+                winner = f"Player {survivors[0].player} wins!"
+                self.message = winner if len(survivors) == 1 else "Player 1 loses!"
+        elif len(survivors) == 1:
+            self.done = True
+            reward = 1
+            self.message = "Player 1 wins!"
+        if hit and self._render:
+            self._draw()
+        return reward
+
+    def render_array(
+        self, mode: str = "rgb", player: int = 1, cell_size: int = OCCUPANCY_CELL_SIZE
+    ) -> np.ndarray:
+        """Draw the game into an array without a display.
+
+        mode="rgb" gives the (height, width, 3) uint8 image the graphical game shows, and
+        mode="occupancy" a low resolution (channels, height, width) grid from `player`'s point of
+        view (see OffscreenRenderer).
+        """
+        assert mode in {"rgb", "occupancy"}, f"Unknown render mode {mode}"
+        assert (
+            self.scenario.is_classic
+        ), "Only the standard two player arenas can be drawn offscreen"
+        if self._offscreen_renderer is None:
+            self._offscreen_renderer = OffscreenRenderer(self.game_size, self.include_barriers)
+        if mode == "rgb":
+            return self._offscreen_renderer.rgb(self.player1, self.player2)
+        player_ship, opponent = (
+            (self.player1, self.player2) if player == 1 else (self.player2, self.player1)
+        )
+        return self._offscreen_renderer.occupancy(player_ship, opponent, cell_size)
+
     def _draw(self) -> None:
         assert not isinstance(self.screen, DummyScreen), "Don't call _draw() with a dummy screen"
-        self.screen.blit(self.background, (0, 0))
-        for game_object in self._get_game_objects():
-            game_object.draw(self.screen)
+        if self.dirty_rects and self._last_drawn is not None and not self.message:
+            self._draw_dirty()
+        else:
+            self.screen.blit(self.background, (0, 0))
+            self._last_drawn = self._draw_game_objects()
 
-        if self.message:
-            print_text(self.screen, self.message, self.font)
+            if self.message:
+                print_text(self.screen, self.message, self.font)
 
-        pygame.display.flip()
+            pygame.display.flip()
         self.clock.tick(60)
 
+    def _draw_dirty(self) -> None:
+        """Erase the objects drawn last frame, draw the new frame and only update those areas of
+        the display."""
+        assert self._last_drawn is not None
+        for rect in self._last_drawn:
+            self.screen.blit(self.background, rect, area=rect)
+        drawn = self._draw_game_objects()
+        pygame.display.update(self._last_drawn + drawn)
+        self._last_drawn = drawn
+
+    def _draw_game_objects(self) -> List[pygame.Rect]:
+        """Draws every game object, returns the areas of those that move."""
+        drawn = []
+        for game_object in self._get_game_objects():
+            rect = game_object.draw(self.screen)
+            # Barriers never move, and are redrawn every frame
+            if not isinstance(game_object, Barrier):
+                drawn.append(rect)
+        return drawn
+
     def _get_game_objects(self) -> List[GameObject]:
 
         game_objects = []
-        if not self.player1.dead:
-            game_objects.extend([self.player1, *self.player1.bullets])
-
-        if not self.player2.dead:
-            game_objects.extend([self.player2, *self.player2.bullets])
+        for ship in self.players:
+            if not ship.dead:
+                game_objects.extend([ship, *ship.bullets])
 
         game_objects.extend(self.barriers)
         return game_objects
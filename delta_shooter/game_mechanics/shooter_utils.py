@@ -1,37 +1,52 @@
+from __future__ import annotations
+
 import random
+from functools import lru_cache
 from pathlib import Path
-from typing import TYPE_CHECKING, Tuple, Union
-
-import pygame
-from pygame import Color
-from pygame.image import load
-from pygame.math import Vector2
-from pygame.mixer import Sound
-from pygame.surface import Surface
+from typing import TYPE_CHECKING, Optional, Tuple, Union
 
-# To avoid circular import
 if TYPE_CHECKING:
+    import pygame
+
+    # To avoid circular import
     from models import DummyScreen
+    from pygame import Color
+    from pygame.math import Vector2
+    from pygame.mixer import Sound
+    from pygame.surface import Surface
+else:
+    from game_mechanics.lazy_import import pygame
 
 ASSET_PATH = Path(__file__).parent.resolve() / "assets"
 
 
+@lru_cache(maxsize=None)
 def load_sprite(name: str, with_alpha: bool = True) -> Surface:
+    """Loaded from disk once per process, so don't draw onto the returned surface."""
     path = ASSET_PATH / f"sprites/{name}.png"
-    loaded_sprite = load(path)
+    loaded_sprite = pygame.image.load(path)
     return loaded_sprite.convert_alpha() if with_alpha else loaded_sprite.convert()
 
 
+@lru_cache(maxsize=None)
+def rotated_sprite(name: str, angle: int) -> Surface:
+    """Sprite `name` rotated anticlockwise by `angle` degrees, rotated once per process."""
+    return pygame.transform.rotozoom(load_sprite(name), angle, 1.0)
+
+
+@lru_cache(maxsize=None)
 def load_sound(name: str) -> Sound:
     path = ASSET_PATH / f"sounds/{name}.wav"
-    return Sound(str(path))
+    return pygame.mixer.Sound(str(path))
 
 
 def edge_barriers(
     position: Union[Vector2, Tuple[int, int]],
     radius: int,
     surface: Union[pygame.surface.Surface, "DummyScreen"],
+    out: Optional[Vector2] = None,
 ) -> Vector2:
+    """`position` clamped to inside the surface, written into `out` if given."""
     x, y = position[0], position[1]
 
     w, h = surface.get_size()
@@ -41,11 +56,14 @@ def edge_barriers(
 
     y = max(0 + radius, y)
     y = min(h - radius, y)
-    return Vector2(x, y)
+    if out is None:
+        return pygame.Vector2(x, y)
+    out.update(x, y)
+    return out
 
 
 def get_random_position(surface: pygame.surface.Surface) -> Vector2:
-    return Vector2(
+    return pygame.Vector2(
         random.randrange(surface.get_width()),
         random.randrange(surface.get_height()),
     )
@@ -54,16 +72,17 @@ def get_random_position(surface: pygame.surface.Surface) -> Vector2:
 def get_random_velocity(min_speed: int, max_speed: int) -> Vector2:
     speed = random.randint(min_speed, max_speed)
     angle = random.randrange(0, 360)
-    return Vector2(speed, 0).rotate(angle)
+    return pygame.Vector2(speed, 0).rotate(angle)
 
 
 def print_text(
     surface: pygame.surface.Surface,
     text: str,
     font: pygame.font.Font,
-    color: Color = Color("tomato"),
+    color: Optional[Color] = None,
 ) -> None:
-
+    if color is None:
+        color = pygame.Color("tomato")
     text_surface = font.render(text, False, color)
 
     rect = text_surface.get_rect()
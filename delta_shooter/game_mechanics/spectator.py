@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import queue
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Optional, Tuple, TypeVar
+
+from game_mechanics.models import get_barrier_geometry
+from game_mechanics.shooter_utils import load_sprite, print_text, rotated_sprite
+
+if TYPE_CHECKING:
+    import pygame
+else:
+    from game_mechanics.lazy_import import pygame
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class ShipSnapshot:
+    player: int
+    position: Tuple[float, float]
+    angle: int
+    dead: bool
+    bullets: Tuple[Tuple[float, float], ...]
+
+
+@dataclass(frozen=True)
+class GameSnapshot:
+    """Everything needed to draw one tick of a game, copied so the game can carry on."""
+
+    tick: int
+    ships: Tuple[ShipSnapshot, ...]
+    message: str
+    done: bool
+
+    @classmethod
+    def from_ships(cls, tick: int, ships: Any, message: str, done: bool) -> "GameSnapshot":
+        return cls(
+            tick=tick,
+            ships=tuple(
+                ShipSnapshot(
+                    player=ship.player,
+                    position=(ship.position[0], ship.position[1]),
+                    angle=ship.angle,
+                    dead=ship.dead,
+                    bullets=tuple(
+                        (bullet.position[0], bullet.position[1]) for bullet in ship.bullets
+                    ),
+                )
+                for ship in ships
+            ),
+            message=message,
+            done=done,
+        )
+
+
+class SpectatorClosed(Exception):
+    """Raised in the game when the spectator window has been closed, to stop it."""
+
+
+class SnapshotQueue:
+    """Bounded queue of snapshots that never blocks the game: when it's full the oldest
+    snapshot is dropped."""
+
+    def __init__(self, maxsize: int = 2):
+        self._queue: "queue.Queue[GameSnapshot]" = queue.Queue(maxsize)
+        self.closed = threading.Event()
+        self.stopped = threading.Event()
+        self.n_dropped = 0
+
+    def put(self, snapshot: GameSnapshot) -> None:
+        if self.stopped.is_set():
+            raise SpectatorClosed("The spectator window was closed")
+        while True:
+            try:
+                self._queue.put_nowait(snapshot)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.n_dropped += 1
+                except queue.Empty:
+                    pass
+
+    def latest(self, timeout: Optional[float] = None) -> Optional[GameSnapshot]:
+        """The newest snapshot (dropping any older ones), waiting up to `timeout` seconds for
+        one. None if there are none."""
+        try:
+            snapshot = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        while True:
+            try:
+                snapshot = self._queue.get_nowait()
+                self.n_dropped += 1
+            except queue.Empty:
+                return snapshot
+
+    def close(self) -> None:
+        """Called by the game when there will be no more snapshots."""
+        self.closed.set()
+
+    def stop(self) -> None:
+        """Called by the spectator when it stops watching, the game's next put() raises
+        SpectatorClosed."""
+        self.stopped.set()
+
+    @property
+    def finished(self) -> bool:
+        return self.closed.is_set() and self._queue.empty()
+
+
+class SpectatorWindow:
+    """Draws the latest snapshot from a SnapshotQueue at a fixed frame rate, independently of
+    how fast the game is being played."""
+
+    def __init__(
+        self,
+        game_size: Tuple[int, int],
+        include_barriers: bool = True,
+        fps: int = 30,
+    ):
+        self.fps = fps
+        pygame.init()
+        pygame.display.set_caption("Space Shooter")
+        self.screen = pygame.display.set_mode(game_size)
+        self.background = load_sprite("space", False)
+        self.bullet_sprite = load_sprite("bullet")
+        self.barriers = get_barrier_geometry(game_size, include_barriers).barriers
+        self.clock = pygame.time.Clock()
+        self.font = pygame.font.Font(None, 64)
+        self.n_frames = 0
+
+    def draw(self, snapshot: GameSnapshot) -> None:
+        self.screen.blit(self.background, (0, 0))
+        for ship in snapshot.ships:
+            if ship.dead:
+                continue
+            sprite = rotated_sprite(f"spaceship_player{ship.player}", ship.angle % 360)
+            width, height = sprite.get_size()
+            self.screen.blit(sprite, (ship.position[0] - width / 2, ship.position[1] - height / 2))
+            radius = self.bullet_sprite.get_width() / 2
+            for x, y in ship.bullets:
+                self.screen.blit(self.bullet_sprite, (x - radius, y - radius))
+        for barrier in self.barriers:
+            barrier.draw(self.screen)
+        if snapshot.message:
+            print_text(self.screen, snapshot.message, self.font)
+        pygame.display.flip()
+        self.n_frames += 1
+
+    def watch(self, snapshots: SnapshotQueue) -> None:
+        """Draw snapshots until the game has finished (or the window is closed, which stops
+        the game)."""
+        while not snapshots.finished:
+            if any(event.type == pygame.QUIT for event in pygame.event.get()):
+                snapshots.stop()
+                return
+            snapshot = snapshots.latest(timeout=1 / self.fps)
+            if snapshot is not None:
+                self.draw(snapshot)
+            self.clock.tick(self.fps)
+
+
+def run_spectated(
+    simulate: Callable[[], T], snapshots: SnapshotQueue, window: SpectatorWindow
+) -> T:
+    """Run `simulate` (which pushes snapshots) at full speed on its own thread while `window`
+    draws them on this one (the display must be used from the main thread).
+
+    Closing the window stops the game at its next snapshot, raising SpectatorClosed.
+    """
+    result: list = []
+    errors: list = []
+
+    def target() -> None:
+        try:
+            result.append(simulate())
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            snapshots.close()
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    window.watch(snapshots)
+    thread.join()
+    if errors:
+        raise errors[0]
+    return result[0]
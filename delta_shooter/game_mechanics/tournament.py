@@ -0,0 +1,244 @@
+import itertools
+import json
+import os
+import warnings
+import zlib
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import torch
+from game_mechanics.shooter_env import ShooterEnv
+
+# Policies of the current worker process, sent once by the pool initializer
+_WORKER_POLICIES: Dict[str, Callable] = {}
+
+
+@dataclass(frozen=True)
+class Match:
+    player1: str
+    player2: str
+    game: int
+    seed: int
+
+    @property
+    def key(self) -> Tuple[str, str, int]:
+        return self.player1, self.player2, self.game
+
+
+@dataclass(frozen=True)
+class MatchResult:
+    player1: str
+    player2: str
+    game: int
+    seed: int
+    # From player1's point of view: 1 win, -1 loss, 0 draw (both hit or ran out of steps)
+    reward: int
+    n_steps: int
+
+    @property
+    def key(self) -> Tuple[str, str, int]:
+        return self.player1, self.player2, self.game
+
+
+def play_match(
+    player1: Callable,
+    player2: Callable,
+    seed: int,
+    include_barriers: bool = True,
+    half_sized_game: bool = False,
+    max_steps: int = 2_000,
+) -> Tuple[int, int]:
+    """Play one seeded game, returns player1's reward and the number of steps played."""
+    env = ShooterEnv(
+        player2, include_barriers=include_barriers, half_sized_game=half_sized_game, seed=seed
+    )
+    state, reward, done, _ = env.reset()
+    n_steps = 0
+    while not done and n_steps < max_steps:
+        state, reward, done, _ = env.step(player1(state))
+        n_steps += 1
+    return int(reward), n_steps
+
+
+def _init_worker(policies: Dict[str, Callable]) -> None:
+    global _WORKER_POLICIES
+    _WORKER_POLICIES = policies
+    # Games are already spread over processes
+    torch.set_num_threads(1)
+
+
+def _play_in_worker(match: Match, env_kwargs: Dict) -> MatchResult:
+    reward, n_steps = play_match(
+        _WORKER_POLICIES[match.player1], _WORKER_POLICIES[match.player2], match.seed, **env_kwargs
+    )
+    return MatchResult(*match.key, seed=match.seed, reward=reward, n_steps=n_steps)
+
+
+def _is_complete(line: bytes) -> bool:
+    if not line.endswith(b"\n"):
+        return False
+    try:
+        json.loads(line)
+    except ValueError:
+        return False
+    return True
+
+
+class Tournament:
+    """Round-robin tournament between named policies (choose_move functions, or
+    ChooseMoveCheckpoints).
+
+    Every pair of policies plays `games_per_pairing` seeded games, swapping which of them is
+    player1 each game. `run()` plays the games over a pool of `num_workers` processes (or
+    in this process if `num_workers=0`) and yields results as they finish. Each result is appended
+    to `results_path` (JSON lines), and a tournament created with the same results file carries
+    on from where it stopped.
+
+    Policies are sent to each worker once, so they must be picklable (module-level functions,
+    ChooseMoveCheckpoint of a module-level function, ...).
+    """
+
+    def __init__(
+        self,
+        policies: Dict[str, Callable],
+        games_per_pairing: int = 10,
+        results_path: Optional[Union[str, Path]] = None,
+        num_workers: Optional[int] = None,
+        include_barriers: bool = True,
+        half_sized_game: bool = False,
+        max_steps: int = 2_000,
+        seed: int = 0,
+    ):
+        assert len(policies) > 1, "A tournament needs at least two policies"
+        self.policies = policies
+        self.games_per_pairing = games_per_pairing
+        self.results_path = None if results_path is None else Path(results_path)
+        self.num_workers = (os.cpu_count() or 1) if num_workers is None else num_workers
+        self.env_kwargs = {
+            "include_barriers": include_barriers,
+            "half_sized_game": half_sized_game,
+            "max_steps": max_steps,
+        }
+        self.seed = seed
+        self.results: Dict[Tuple[str, str, int], MatchResult] = {}
+        if self.results_path is not None and self.results_path.exists():
+            self._load_results()
+
+    def _match_seed(self, player1: str, player2: str, game: int) -> int:
+        # Depends only on the names, so a resumed tournament plays the same games
+        name_hash = zlib.crc32(f"{player1}\0{player2}\0{game}".encode())
+        return int(np.random.SeedSequence([self.seed, name_hash]).generate_state(1)[0])
+
+    def schedule(self) -> List[Match]:
+        matches = []
+        for name1, name2 in itertools.combinations(self.policies, 2):
+            for game in range(self.games_per_pairing):
+                player1, player2 = (name1, name2) if game % 2 == 0 else (name2, name1)
+                matches.append(
+                    Match(player1, player2, game, self._match_seed(player1, player2, game))
+                )
+        return matches
+
+    def pending(self) -> List[Match]:
+        return [match for match in self.schedule() if match.key not in self.results]
+
+    def _load_results(self) -> None:
+        assert self.results_path is not None
+        with open(self.results_path, "rb+") as f:
+            lines = f.readlines()
+            if lines and not _is_complete(lines[-1]):
+                # A run killed while recording a result leaves part of a line, which is dropped
+                # (so the next result starts on a line of its own) and its game played again
+                warnings.warn(f"Dropping an incomplete result from {self.results_path}")
+                f.truncate(f.tell() - len(lines.pop()))
+        for line in lines:
+            if not line.strip():
+                continue
+            result = MatchResult(**json.loads(line))
+            # Ignore games of policies that have since been dropped
+            if result.player1 in self.policies and result.player2 in self.policies:
+                self.results[result.key] = result
+
+    def _record(self, result: MatchResult) -> None:
+        self.results[result.key] = result
+        if self.results_path is not None:
+            with open(self.results_path, "a") as f:
+                f.write(json.dumps(asdict(result)) + "\n")
+
+    def run(self) -> Iterator[MatchResult]:
+        """Play every game that hasn't been played yet, yielding results as they finish."""
+        matches = self.pending()
+        if not matches:
+            return
+        if self.num_workers == 0:
+            for match in matches:
+                reward, n_steps = play_match(
+                    self.policies[match.player1],
+                    self.policies[match.player2],
+                    match.seed,
+                    **self.env_kwargs,
+                )
+                result = MatchResult(*match.key, seed=match.seed, reward=reward, n_steps=n_steps)
+                self._record(result)
+                yield result
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=self.num_workers, initializer=_init_worker, initargs=(self.policies,)
+        ) as executor:
+            futures: List[Future] = [
+                executor.submit(_play_in_worker, match, self.env_kwargs) for match in matches
+            ]
+            recorded = set()
+            try:
+                for future in as_completed(futures):
+                    result = future.result()
+                    self._record(result)
+                    recorded.add(future)
+                    yield result
+            finally:
+                # If the caller stopped early, don't play the games that haven't started, but keep
+                # the ones that finished so they aren't played again
+                executor.shutdown(cancel_futures=True)
+                for future in futures:
+                    if future in recorded or future.cancelled() or future.exception() is not None:
+                        continue
+                    self._record(future.result())
+
+    def play(self) -> Dict[str, Dict[str, float]]:
+        """Play the whole tournament, returns the table."""
+        for _ in self.run():
+            pass
+        return self.table()
+
+    def table(self) -> Dict[str, Dict[str, float]]:
+        """Win/draw/loss table, {name: {"played", "wins", "draws", "losses", "elo"}} with the best
+        Elo first."""
+        table = {name: {"played": 0, "wins": 0, "draws": 0, "losses": 0} for name in self.policies}
+        for result in self.results.values():
+            for name, reward in ((result.player1, result.reward), (result.player2, -result.reward)):
+                table[name]["played"] += 1
+                table[name]["wins" if reward > 0 else "losses" if reward < 0 else "draws"] += 1
+        ratings = self.elo()
+        return {
+            name: {**table[name], "elo": ratings[name]}
+            for name in sorted(table, key=ratings.__getitem__, reverse=True)
+        }
+
+    def elo(self, k_factor: float = 16, initial_rating: float = 1000) -> Dict[str, float]:
+        """Elo ratings, updated game by game in schedule order (so they don't depend on the order
+        games happened to finish in)."""
+        ratings = {name: float(initial_rating) for name in self.policies}
+        for match in self.schedule():
+            result = self.results.get(match.key)
+            if result is None:
+                continue
+            rating1, rating2 = ratings[result.player1], ratings[result.player2]
+            expected1 = 1 / (1 + 10 ** ((rating2 - rating1) / 400))
+            score1 = (result.reward + 1) / 2
+            ratings[result.player1] += k_factor * (score1 - expected1)
+            ratings[result.player2] -= k_factor * (score1 - expected1)
+        return ratings
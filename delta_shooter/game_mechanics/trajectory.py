@@ -0,0 +1,227 @@
+import os
+import queue
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import torch
+from game_mechanics.shooter_env import NO_MOVE, OpponentMove
+
+CHUNK_PATTERN = "chunk_{:06d}.npy"
+
+
+def transition_dtype(n_observations: int, n_opponents: int = 1) -> np.dtype:
+    """One fixed-width record per step, of an env with `n_observations` observations. With more
+    than one opponent (a free-for-all), `opponent_action` holds the move of each."""
+    return np.dtype(
+        [
+            ("observation", np.float32, (n_observations,)),
+            ("action", np.int8),
+            ("opponent_action", np.int8, (n_opponents,) if n_opponents > 1 else ()),
+            ("reward", np.float32),
+            ("done", np.bool_),
+        ]
+    )
+
+
+def _encode_action(action: OpponentMove) -> Union[int, List[int]]:
+    if isinstance(action, list):
+        return [NO_MOVE if move is None else int(move) for move in action]
+    return NO_MOVE if action is None else int(action)
+
+
+class TrajectoryWriter:
+    """Appends transitions to `directory` as chunks of `chunk_size` records, each saved as a
+    .npy file of transition_dtype() so it can be memory-mapped by TrajectoryReader. Records are
+    sized to the first transition appended.
+
+    Full chunks are written by a background thread, so `append()` only ever copies into an
+    in-memory buffer. Call `close()` (or use it in a `with` block) to write the last, partly
+    filled, chunk.
+    """
+
+    def __init__(
+        self, directory: Union[str, Path], chunk_size: int = 65_536, background: bool = True
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = chunk_size
+        # Carry on after any chunks already in the directory
+        self._n_chunks = len(_chunk_paths(self.directory))
+        self._dtype: Optional[np.dtype] = None
+        self._buffer = np.zeros(0)
+        self._n_buffered = 0
+        self.n_written = 0
+
+        self._queue: Optional["queue.Queue[Optional[Tuple[Path, np.ndarray]]]"] = None
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+        if background:
+            # At most 2 chunks waiting, so a slow disk bounds memory rather than growing it
+            self._queue = queue.Queue(maxsize=2)
+            self._thread = threading.Thread(target=self._write_chunks, daemon=True)
+            self._thread.start()
+
+    def append(
+        self,
+        observation: Union[torch.Tensor, np.ndarray],
+        action: Optional[int],
+        opponent_action: OpponentMove,
+        reward: float,
+        done: bool,
+    ) -> None:
+        if self._dtype is None:
+            n_opponents = len(opponent_action) if isinstance(opponent_action, list) else 1
+            self._dtype = transition_dtype(np.size(observation), n_opponents)
+            self._buffer = np.zeros(self.chunk_size, dtype=self._dtype)
+        record = self._buffer[self._n_buffered]
+        record["observation"] = observation
+        record["action"] = _encode_action(action)
+        record["opponent_action"] = _encode_action(opponent_action)
+        record["reward"] = reward
+        record["done"] = done
+        self._n_buffered += 1
+        if self._n_buffered == self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Hand the buffered transitions to be written as a chunk."""
+        if self._error is not None:
+            raise self._error
+        if self._n_buffered == 0:
+            return
+        path = self.directory / CHUNK_PATTERN.format(self._n_chunks)
+        chunk = self._buffer[: self._n_buffered]
+        self._n_chunks += 1
+        self.n_written += self._n_buffered
+        if self._queue is None:
+            _save_chunk(path, chunk)
+        else:
+            self._queue.put((path, chunk))
+            # The writer thread owns the old buffer now
+            self._buffer = np.zeros(self.chunk_size, dtype=self._dtype)
+        self._n_buffered = 0
+
+    def _write_chunks(self) -> None:
+        assert self._queue is not None
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            try:
+                _save_chunk(*item)
+            except BaseException as e:
+                self._error = e
+
+    def close(self) -> None:
+        self.flush()
+        if self._thread is not None and self._queue is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self) -> "TrajectoryWriter":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+def _save_chunk(path: Path, chunk: np.ndarray) -> None:
+    # Renamed into place once written, so readers never see a partial chunk
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "wb") as f:
+        np.save(f, chunk)
+    os.replace(tmp_path, path)
+
+
+def _chunk_paths(directory: Path) -> List[Path]:
+    return sorted(directory.glob(CHUNK_PATTERN.replace("{:06d}", "[0-9]" * 6)))
+
+
+class TrajectoryRecorder:
+    """Wraps a ShooterEnv so every step is recorded by a TrajectoryWriter.
+
+    Each record holds the observation the action was chosen from, the action, the opponent's
+    move, and the reward and done that followed.
+    """
+
+    def __init__(self, env: Any, writer: TrajectoryWriter):
+        self.env = env
+        self.writer = writer
+        # A copy, as envs with reuse_buffers overwrite the observation they returned
+        self._observation = np.empty(env.n_observations, dtype=np.float32)
+        self._has_observation = False
+
+    def reset(self, *args: Any, **kwargs: Any) -> Tuple[torch.Tensor, float, bool, Dict]:
+        observation, reward, done, info = self.env.reset(*args, **kwargs)
+        self._observation[:] = observation
+        self._has_observation = True
+        return observation, reward, done, info
+
+    def step(self, action: Optional[int]) -> Tuple[torch.Tensor, float, bool, Dict]:
+        assert self._has_observation, "Call reset() before step()"
+        observation, reward, done, info = self.env.step(action)
+        self.writer.append(self._observation, action, self.env.last_opponent_move, reward, done)
+        self._observation[:] = observation
+        return observation, reward, done, info
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.env, name)
+
+
+class TrajectoryReader:
+    """Reads the transitions written by TrajectoryWriter, memory-mapping each chunk."""
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self._chunks = [np.load(path, mmap_mode="r") for path in _chunk_paths(self.directory)]
+
+    def __len__(self) -> int:
+        return sum(len(chunk) for chunk in self._chunks)
+
+    def chunks(self) -> Iterator[np.ndarray]:
+        """Each chunk as a read-only memory-mapped array of transition_dtype(). Fields
+        (e.g. `chunk["observation"]`) are views, nothing is copied until used."""
+        yield from self._chunks
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        """One field of every transition, concatenated (so copied) into an array."""
+        return np.concatenate([chunk[field] for chunk in self._chunks])
+
+    def batches(
+        self, batch_size: int, shuffle: bool = False, seed: Optional[int] = None
+    ) -> Iterator[Dict[str, torch.Tensor]]:
+        """Yield {field: tensor} batches of `batch_size` transitions (the last may be smaller).
+
+        With `shuffle`, batches are drawn in a random order across all chunks.
+        """
+        offsets = np.cumsum([0] + [len(chunk) for chunk in self._chunks])
+        order = np.arange(offsets[-1])
+        if shuffle:
+            np.random.default_rng(seed).shuffle(order)
+        for start in range(0, len(order), batch_size):
+            idx = order[start : start + batch_size]
+            if not shuffle:
+                records = self._contiguous(offsets, idx[0], idx[-1] + 1)
+            else:
+                chunk_idx = np.searchsorted(offsets, idx, side="right") - 1
+                records = np.empty(len(idx), dtype=self._chunks[0].dtype)
+                for chunk in np.unique(chunk_idx):
+                    in_chunk = chunk_idx == chunk
+                    records[in_chunk] = self._chunks[chunk][idx[in_chunk] - offsets[chunk]]
+            yield {
+                field: torch.from_numpy(np.ascontiguousarray(records[field]))
+                for field in records.dtype.names
+            }
+
+    def _contiguous(self, offsets: np.ndarray, start: int, stop: int) -> np.ndarray:
+        parts = []
+        for chunk, chunk_start in zip(self._chunks, offsets):
+            lo, hi = max(start - chunk_start, 0), min(stop - chunk_start, len(chunk))
+            if lo < hi:
+                parts.append(chunk[lo:hi])
+        return np.concatenate(parts) if len(parts) > 1 else np.array(parts[0])
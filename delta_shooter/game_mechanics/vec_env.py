@@ -0,0 +1,294 @@
+import multiprocessing as mp
+import os
+import random
+import traceback
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+from game_mechanics.batched_env import choose_moves_batched
+from game_mechanics.models import Seed, Spaceship
+from game_mechanics.shooter_env import NO_MOVE, ShooterEnv
+
+
+class SharedBuffers:
+    """NumPy arrays for the actions, observations, rewards and dones of every env (and the
+    opponents' states and moves, when the opponent is batched), laid out in a single
+    `multiprocessing.shared_memory` block so workers never pickle them."""
+
+    def __init__(self, num_envs: int, n_observations: int, name: Optional[str] = None):
+        self.num_envs = num_envs
+        self.n_observations = n_observations
+        layout = [
+            ("observations", np.float32, (num_envs, n_observations)),
+            ("terminal_observations", np.float32, (num_envs, n_observations)),
+            ("rewards", np.float32, (num_envs,)),
+            ("dones", np.bool_, (num_envs,)),
+            ("actions", np.int64, (num_envs,)),
+            ("opponent_observations", np.float32, (num_envs, n_observations)),
+            ("opponent_actions", np.int64, (num_envs,)),
+        ]
+        self._names = [attr for attr, _, _ in layout]
+        offsets = []
+        size = 0
+        for _, dtype, shape in layout:
+            # Keep every array 8-byte aligned
+            size = -(-size // 8) * 8
+            offsets.append(size)
+            size += int(np.prod(shape)) * np.dtype(dtype).itemsize
+
+        self.owner = name is None
+        self.shm = SharedMemory(name=name, create=self.owner, size=size)
+        for (attr, dtype, shape), offset in zip(layout, offsets):
+            setattr(self, attr, np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset))
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def close(self) -> None:
+        # Drop the array views first, else the buffer can't be released
+        for attr in self._names:
+            setattr(self, attr, None)
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _to_move(action: np.int64) -> Optional[int]:
+    return None if action == NO_MOVE else int(action)
+
+
+def _worker(
+    remote: Connection,
+    parent_remote: Connection,
+    shm_name: str,
+    num_envs: int,
+    n_observations: int,
+    env_indices: Sequence[int],
+    opponent_choose_move: Callable,
+    env_kwargs: Dict[str, Any],
+    seed: Optional[int],
+    env_seeds: Sequence[Seed],
+) -> None:
+    parent_remote.close()
+    # Forked workers inherit the parent's random state, so opponents that use it would otherwise
+    # play identically in every worker
+    random.seed(seed)
+    np.random.seed(None if seed is None else seed % 2**32)
+    if seed is None:
+        torch.seed()
+    else:
+        torch.manual_seed(seed)
+
+    buffers = SharedBuffers(num_envs, n_observations, name=shm_name)
+    envs = [
+        ShooterEnv(opponent_choose_move, render=False, seed=env_seed, **env_kwargs)
+        for env_seed in env_seeds
+    ]
+
+    def write_result(
+        idx: int, env: ShooterEnv, result: Tuple[torch.Tensor, float, bool, Dict]
+    ) -> None:
+        state, reward, done, _ = result
+        buffers.terminal_observations[idx] = state
+        if done:
+            state, _, _, _ = env.reset()
+        buffers.observations[idx] = state
+        buffers.rewards[idx] = reward
+        buffers.dones[idx] = done
+
+    try:
+        while True:
+            command = remote.recv()
+            if command == "step":
+                for idx, env in zip(env_indices, envs):
+                    write_result(idx, env, env.step(_to_move(buffers.actions[idx])))
+            elif command == "act":
+                # Batched opponent: play player1's move, the parent then picks every opponent move
+                for idx, env in zip(env_indices, envs):
+                    env._step(_to_move(buffers.actions[idx]), env.player1)
+                    buffers.opponent_observations[idx] = env.observation_player2
+            elif command == "resolve":
+                for idx, env in zip(env_indices, envs):
+                    write_result(
+                        idx, env, env._finish_step(_to_move(buffers.opponent_actions[idx]))
+                    )
+            elif command == "reset":
+                for idx, env in zip(env_indices, envs):
+                    buffers.observations[idx], _, _, _ = env.reset()
+            elif command == "close":
+                break
+            else:
+                raise ValueError(f"Unknown command {command}")
+            remote.send(None)
+    except KeyboardInterrupt:
+        pass
+    except Exception:
+        remote.send(traceback.format_exc())
+    finally:
+        buffers.close()
+        remote.close()
+
+
+class ShooterVecEnv:
+    """Runs `num_envs` ShooterEnvs spread over a pool of `num_workers` subprocesses.
+
+    The opponent is sent to each worker once, when it starts. Actions, observations, rewards and
+    dones are exchanged through shared memory, workers are only sent a short command each step.
+    Finished games are reset automatically (the final observation of a finished game is in
+    `info["terminal_observation"]`), as in BatchedShooterEnv.
+
+    With `batched_opponent=True` the opponent stays in this process instead: each step the workers
+    play player1's moves, then `opponent_choose_move` is called once with the (num_envs,
+    n_observations) states of every opponent and must return num_envs moves.
+    """
+
+    def __init__(
+        self,
+        opponent_choose_move: Callable,
+        num_envs: int,
+        num_workers: Optional[int] = None,
+        include_barriers: bool = True,
+        half_sized_game: bool = False,
+        seed: Optional[int] = None,
+        start_method: Optional[str] = None,
+        batched_opponent: bool = False,
+        num_bullets: Optional[int] = None,
+    ):
+        num_workers = min(num_workers or os.cpu_count() or 1, num_envs)
+        assert num_workers > 0, "num_envs must be positive"
+        self.num_envs = num_envs
+        self.num_workers = num_workers
+        num_bullets = Spaceship.NUM_BULLETS if num_bullets is None else num_bullets
+        self.n_observations = (2 + num_bullets * 2) * 4
+        self.buffers = SharedBuffers(num_envs, self.n_observations)
+        self.opponent_choose_move = opponent_choose_move
+        self.batched_opponent = batched_opponent
+        self.closed = False
+        self._waiting = False
+
+        env_kwargs = {
+            "include_barriers": include_barriers,
+            "half_sized_game": half_sized_game,
+            "num_bullets": num_bullets,
+        }
+        # Every env gets an independent random generator
+        env_seeds = np.random.SeedSequence(seed).spawn(num_envs)
+        ctx = mp.get_context(start_method)
+        self.remotes: List[Connection] = []
+        self.processes: List[mp.process.BaseProcess] = []
+        for worker_idx, env_indices in enumerate(np.array_split(range(num_envs), num_workers)):
+            remote, worker_remote = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker,
+                args=(
+                    worker_remote,
+                    remote,
+                    self.buffers.name,
+                    num_envs,
+                    self.n_observations,
+                    env_indices.tolist(),
+                    # A batched opponent is run here, so doesn't need sending to the workers
+                    None if batched_opponent else opponent_choose_move,
+                    env_kwargs,
+                    None if seed is None else seed + worker_idx,
+                    [env_seeds[idx] for idx in env_indices],
+                ),
+                daemon=True,
+            )
+            process.start()
+            worker_remote.close()
+            self.remotes.append(remote)
+            self.processes.append(process)
+
+    def _send(self, command: str) -> None:
+        assert not self.closed, "ShooterVecEnv has been closed"
+        for remote in self.remotes:
+            remote.send(command)
+
+    def _wait(self) -> None:
+        # Every worker's reply is read, even after an error, so none are left in the pipes
+        errors = []
+        for worker_idx, remote in enumerate(self.remotes):
+            try:
+                error = remote.recv()
+            except (EOFError, OSError):
+                error = "The worker process died"
+            if error is not None:
+                errors.append(f"Worker {worker_idx}: {error}")
+        if errors:
+            # Failed workers have exited, so the env can't be used any more
+            self._waiting = False
+            self.close()
+            raise RuntimeError("ShooterVecEnv worker failed:\n" + "\n".join(errors))
+
+    def reset(self) -> Tuple[torch.Tensor, np.ndarray, np.ndarray, Dict]:
+        self._send("reset")
+        self._wait()
+        return (
+            torch.from_numpy(self.buffers.observations.copy()),
+            np.zeros(self.num_envs, dtype=np.float32),
+            np.zeros(self.num_envs, dtype=bool),
+            {},
+        )
+
+    def step_async(self, actions: Sequence[Optional[int]]) -> None:
+        """Start stepping every env, collect the results with `step_wait()`."""
+        assert len(actions) == self.num_envs, f"Expected {self.num_envs} actions"
+        self.buffers.actions[:] = [NO_MOVE if action is None else action for action in actions]
+        if self.batched_opponent:
+            self._send("act")
+            self._wait()
+            opponent_moves = choose_moves_batched(
+                self.opponent_choose_move, torch.from_numpy(self.buffers.opponent_observations)
+            )
+            self.buffers.opponent_actions[:] = [
+                NO_MOVE if move is None else move for move in opponent_moves
+            ]
+            self._send("resolve")
+        else:
+            self._send("step")
+        self._waiting = True
+
+    def step_wait(self) -> Tuple[torch.Tensor, np.ndarray, np.ndarray, Dict]:
+        assert self._waiting, "Call step_async() before step_wait()"
+        self._wait()
+        self._waiting = False
+        return (
+            torch.from_numpy(self.buffers.observations.copy()),
+            self.buffers.rewards.copy(),
+            self.buffers.dones.copy(),
+            {"terminal_observation": torch.from_numpy(self.buffers.terminal_observations.copy())},
+        )
+
+    def step(
+        self, actions: Sequence[Optional[int]]
+    ) -> Tuple[torch.Tensor, np.ndarray, np.ndarray, Dict]:
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        if self._waiting:
+            self._wait()
+        for remote in self.remotes:
+            try:
+                remote.send("close")
+            except (BrokenPipeError, EOFError):
+                pass
+        for process in self.processes:
+            process.join()
+        for remote in self.remotes:
+            remote.close()
+        self.buffers.close()
+        self.closed = True
+
+    def __enter__(self) -> "ShooterVecEnv":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
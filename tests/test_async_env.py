@@ -0,0 +1,93 @@
+import asyncio
+import random
+
+import torch
+
+from delta_shooter.game_mechanics import (
+    AsyncShooterEnv,
+    Scenario,
+    ShooterEnv,
+    play_shooter_async,
+)
+
+
+class StubRemotePolicy:
+    """Stands in for a policy served over RPC: each move takes a while to arrive."""
+
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, state: torch.Tensor) -> int:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0)
+        self.in_flight -= 1
+        return int(self.rng.random() * 6)
+
+
+def test_async_env_matches_sync_env() -> None:
+    actions = [3, 0, 2, 3, 1, 4, 3, 5] * 20
+
+    sync_opponent = random.Random(1)
+    env = ShooterEnv(lambda state: int(sync_opponent.random() * 6), half_sized_game=True, seed=0)
+    env.reset()
+    expected = [env.step(action) for action in actions]
+
+    async def play():
+        env = AsyncShooterEnv(StubRemotePolicy(1), half_sized_game=True, seed=0)
+        env.reset()
+        return [await env.step(action) for action in actions]
+
+    for (state, reward, done, _), (a_state, a_reward, a_done, _) in zip(
+        expected, asyncio.run(play())
+    ):
+        assert torch.equal(state, a_state) and reward == a_reward and done == a_done
+
+
+def test_games_run_concurrently() -> None:
+    opponent = StubRemotePolicy(0)
+
+    async def play_all():
+        return await asyncio.gather(
+            *(
+                play_shooter_async(
+                    StubRemotePolicy(seed),
+                    opponent,
+                    include_barriers=False,
+                    half_game_size=True,
+                    seed=seed,
+                )
+                for seed in range(8)
+            )
+        )
+
+    returns = asyncio.run(play_all())
+    assert len(returns) == 8 and set(returns) <= {-1, 0, 1}
+    # The opponent was waiting on moves for several games at once
+    assert opponent.max_in_flight > 1
+
+
+def test_async_env_plays_free_for_all() -> None:
+    scenario = Scenario.random((600, 450), n_players=4, n_barriers=3, seed=0)
+    actions = [3, 0, 2, 3, 1, 4, 3, 5] * 20
+
+    sync_opponent = random.Random(1)
+    env = ShooterEnv(lambda state: int(sync_opponent.random() * 6), scenario=scenario, seed=0)
+    env.reset()
+    expected = [env.step(action) for action in actions]
+
+    opponent = StubRemotePolicy(1)
+
+    async def play():
+        env = AsyncShooterEnv(opponent, scenario=scenario, seed=0)
+        env.reset()
+        return [await env.step(action) for action in actions]
+
+    for (state, reward, done, _), (a_state, a_reward, a_done, _) in zip(
+        expected, asyncio.run(play())
+    ):
+        assert torch.equal(state, a_state) and reward == a_reward and done == a_done
+    # Every opponent's move was awaited at once
+    assert opponent.max_in_flight == 3
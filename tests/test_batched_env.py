@@ -0,0 +1,120 @@
+import random
+from typing import Optional
+
+import numpy as np
+import torch
+
+from delta_shooter.game_mechanics import BatchedShooterEnv, ShooterEnv, choose_move_randomly
+
+
+def _play_single(
+    seed: int,
+    n_steps: int,
+    include_barriers: bool,
+    half_sized_game: bool,
+    legacy_collisions: bool = False,
+    num_bullets: Optional[int] = None,
+):
+    env = ShooterEnv(
+        choose_move_randomly,
+        include_barriers=include_barriers,
+        half_sized_game=half_sized_game,
+        seed=seed,
+        legacy_collisions=legacy_collisions,
+        num_bullets=num_bullets,
+    )
+    # The random opponent uses the global `random` module
+    random.seed(seed)
+    actions = random.Random(seed + 1)
+
+    state, _, _, _ = env.reset()
+    history = [(state, 0, False)]
+    for _ in range(n_steps):
+        state, reward, done, _ = env.step(int(actions.random() * 6))
+        history.append((state, reward, done))
+        if done:
+            state, _, _, _ = env.reset()
+            history.append((state, 0, False))
+    return history
+
+
+def _play_batched(
+    seed: int,
+    n_steps: int,
+    include_barriers: bool,
+    half_sized_game: bool,
+    legacy_collisions: bool = False,
+    num_bullets: Optional[int] = None,
+):
+    env = BatchedShooterEnv(
+        choose_move_randomly,
+        num_envs=1,
+        include_barriers=include_barriers,
+        half_sized_game=half_sized_game,
+        seed=[seed],
+        legacy_collisions=legacy_collisions,
+        num_bullets=num_bullets,
+    )
+    random.seed(seed)
+    actions = random.Random(seed + 1)
+
+    states, _, _, _ = env.reset()
+    history = [(states[0], 0, False)]
+    for _ in range(n_steps):
+        states, rewards, dones, info = env.step([int(actions.random() * 6)])
+        history.append((info["terminal_observation"][0], rewards[0], dones[0]))
+        if dones[0]:
+            history.append((states[0], 0, False))
+    return history
+
+
+def test_single_game_matches_shooter_env() -> None:
+    for seed, include_barriers, half_sized_game, legacy_collisions, num_bullets in [
+        (0, False, True, False, None),
+        (1, True, True, False, None),
+        (2, True, False, False, None),
+        (3, True, False, True, None),
+        (4, True, False, False, 6),
+        (5, False, True, True, 6),
+    ]:
+        args = (seed, 2_000, include_barriers, half_sized_game, legacy_collisions, num_bullets)
+        single = _play_single(*args)
+        batched = _play_batched(*args)
+        assert len(single) == len(batched)
+        for (state, reward, done), (b_state, b_reward, b_done) in zip(single, batched):
+            assert torch.equal(state, b_state)
+            assert reward == b_reward
+            assert done == b_done
+
+
+def test_batched_shapes_and_auto_reset() -> None:
+    env = BatchedShooterEnv(choose_move_randomly, num_envs=16, half_sized_game=True)
+    states, _, _, _ = env.reset()
+    assert states.shape == (16, env.n_observations)
+
+    n_done = 0
+    for _ in range(500):
+        states, rewards, dones, _ = env.step(np.random.randint(0, 6, size=16).tolist())
+        assert states.shape == (16, 24) and rewards.shape == (16,) and dones.shape == (16,)
+        assert set(np.unique(rewards)) <= {-1.0, 0.0, 1.0}
+        assert not env.dones.any()
+        n_done += dones.sum()
+    assert n_done > 0
+
+
+def test_batched_opponent_called_once_per_step() -> None:
+    network = torch.nn.Sequential(torch.nn.Linear(24, 16), torch.nn.ReLU(), torch.nn.Linear(16, 6))
+    batch_sizes = []
+
+    def batched_choose_move(state: torch.Tensor) -> torch.Tensor:
+        assert not torch.is_grad_enabled()
+        batch_sizes.append(len(state))
+        return network(state).argmax(dim=1)
+
+    env = BatchedShooterEnv(
+        batched_choose_move, num_envs=8, half_sized_game=True, batched_opponent=True
+    )
+    env.reset()
+    for _ in range(50):
+        env.step([choose_move_randomly(None) for _ in range(8)])
+    assert batch_sizes == [8] * 50
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+import torch
+
+from delta_shooter.game_mechanics import benchmark
+from delta_shooter.game_mechanics.benchmark import benchmark_import, main, run_benchmarks
+
+
+def test_benchmarks_run_and_serialise(tmp_path, monkeypatch) -> None:
+    num_threads = torch.get_num_threads()
+    torch.set_num_threads(2)
+    try:
+        results = run_benchmarks(
+            n_steps=50, n_resets=10, n_observations=10, n_games=1, repeats=1, opponents=["mlp"]
+        )
+        # Benchmarks run single threaded, without changing the caller's setting
+        assert torch.get_num_threads() == 2
+    finally:
+        torch.set_num_threads(num_threads)
+    assert {result["benchmark"] for result in results["results"]} == {
+        "step",
+        "reset",
+        "observation",
+        "play_shooter",
+        "import",
+    }
+    assert all(
+        result["per_second"] > 0 for result in results["results"] if result["benchmark"] != "import"
+    )
+
+    output = tmp_path / "results.json"
+    # Nothing can be imported within a budget of 0 seconds
+    monkeypatch.setattr(benchmark, "IMPORT_BUDGET_SECONDS", 0.0)
+    with pytest.raises(SystemExit, match="over the 0.0s budget"):
+        main(
+            ["--steps", "20", "--resets", "5", "--observations", "5", "--games", "1"]
+            + ["--repeats", "1", "--opponents", "constant", "--output", str(output)]
+            + ["--check-import-budget"]
+        )
+    assert json.loads(output.read_text())["metadata"]["repeats"] == 1
+
+
+def test_importing_does_not_import_pygame() -> None:
+    # How long importing takes is left to `--check-import-budget`, as timings are too noisy to test
+    assert not benchmark_import(repeats=1)["imports_pygame"]
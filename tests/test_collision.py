@@ -0,0 +1,128 @@
+import numpy as np
+
+from delta_shooter.game_mechanics import (
+    BULLET_RADIUS,
+    SHIP_RADIUS,
+    SPATIAL_HASH_MIN_BARRIERS,
+    HeadlessBullet,
+    Scenario,
+    ShooterEnv,
+    SpatialHash,
+    get_barrier_geometry,
+    get_barriers,
+    legacy_hit,
+    swept_hit,
+    swept_hits,
+)
+
+
+def test_barrier_queries_match_hit_barrier() -> None:
+    rng = np.random.default_rng(0)
+    for game_size in [(300, 225), (600, 450)]:
+        geometry = get_barrier_geometry(game_size)
+        assert geometry is get_barrier_geometry(game_size)
+
+        positions = rng.uniform(0, game_size, size=(5_000, 2))
+        new_positions = positions + rng.normal(0, 40, size=(5_000, 2))
+        for radius in [5, 20]:
+            expected = [
+                any(
+                    barrier.hit_barrier(pos, new_pos, radius) for barrier in get_barriers(game_size)
+                )
+                for pos, new_pos in zip(positions, new_positions)
+            ]
+            assert any(expected)
+            assert [
+                geometry.hit(pos, new_pos, radius) for pos, new_pos in zip(positions, new_positions)
+            ] == expected
+            assert geometry.hits(positions, new_positions, radius).tolist() == expected
+
+
+def test_no_barriers() -> None:
+    geometry = get_barrier_geometry((600, 450), include_barriers=False)
+    assert len(geometry) == 0
+    assert not geometry.hit((10, 10), (590, 440), 20)
+    assert not geometry.hits(np.zeros((3, 2)), np.ones((3, 2)), 20).any()
+
+
+def test_swept_hits_catch_bullets_passing_through_ships() -> None:
+    radius = BULLET_RADIUS + SHIP_RADIUS
+    ship = (100.0, 100.0)
+    # A slightly fast (jittered) bullet that passes the ship between two ticks
+    start, end = (68.0, 80.0), (132.0, 80.0)
+    assert swept_hit(start, end, ship, radius)
+    assert not legacy_hit(end, ship, BULLET_RADIUS, SHIP_RADIUS)
+    # Only the legacy test's fudge factor counts near misses
+    near_miss = (100.0, 100.0 + radius + 5)
+    assert not swept_hit(near_miss, near_miss, ship, radius)
+    assert legacy_hit(near_miss, ship, BULLET_RADIUS, SHIP_RADIUS)
+    # The closest point is clamped to the movement
+    assert not swept_hit((0.0, 100.0), (40.0, 100.0), ship, radius)
+
+
+def test_swept_hits_match_swept_hit() -> None:
+    rng = np.random.default_rng(0)
+    starts = rng.uniform(0, 600, size=(5_000, 2))
+    ends = starts + rng.normal(0, 60, size=(5_000, 2))
+    # Including bullets that didn't move (stopped by a barrier)
+    ends[::10] = starts[::10]
+    centres = rng.uniform(0, 600, size=(5_000, 2))
+    radius = BULLET_RADIUS + SHIP_RADIUS
+    expected = [swept_hit(*args, radius) for args in zip(starts, ends, centres)]
+    assert any(expected)
+    assert swept_hits(starts, ends, centres, radius).tolist() == expected
+
+
+def test_spatial_hash_finds_everything_near_a_box() -> None:
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-100, 700, size=(500, 2))
+    grid = SpatialHash(cell_size=64)
+    for idx, (x, y) in enumerate(points):
+        grid.insert(idx, x, y)
+    for min_x, min_y in rng.uniform(-100, 700, size=(50, 2)):
+        max_x, max_y = min_x + 110, min_y + 110
+        found = grid.query(min_x, min_y, max_x, max_y)
+        assert len(found) == len(set(found))
+        inside = (
+            (points[:, 0] >= min_x)
+            & (points[:, 0] <= max_x)
+            & (points[:, 1] >= min_y)
+            & (points[:, 1] <= max_y)
+        )
+        assert set(np.flatnonzero(inside)) <= set(found)
+
+
+def test_many_barriers_are_hashed() -> None:
+    scenario = Scenario.random((1800, 1350), n_players=4, n_barriers=40, seed=0)
+    geometry = scenario.barrier_geometry
+    assert len(geometry) == 40 > SPATIAL_HASH_MIN_BARRIERS
+
+    rng = np.random.default_rng(1)
+    positions = rng.uniform(0, (1800, 1350), size=(5_000, 2))
+    new_positions = positions + rng.normal(0, 60, size=(5_000, 2))
+    expected = [
+        any(barrier.hit_barrier(pos, new_pos, 20) for barrier in scenario.barriers)
+        for pos, new_pos in zip(positions, new_positions)
+    ]
+    assert any(expected)
+    assert [geometry.hit(*args, 20) for args in zip(positions, new_positions)] == expected
+
+
+def test_envs_score_near_misses_only_with_legacy_collisions() -> None:
+    for legacy_collisions in [True, False]:
+        env = ShooterEnv(
+            lambda state: None,
+            include_barriers=False,
+            half_sized_game=True,
+            seed=0,
+            legacy_collisions=legacy_collisions,
+        )
+        env.reset()
+        x, y = env.player2.position
+        # A bullet that stops just outside the ship (but within the legacy fudge factor)
+        near_miss = (x, y + BULLET_RADIUS + SHIP_RADIUS + 5)
+        geometry = env.player1.barrier_geometry
+        env.player1.bullets.add(HeadlessBullet(*near_miss, 0.0, 0.0, geometry))
+        _, reward, done, _ = env.step(None)
+        assert legacy_hit(near_miss, env.player2.position, BULLET_RADIUS, SHIP_RADIUS)
+        assert done == legacy_collisions and reward == int(legacy_collisions)
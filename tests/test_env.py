@@ -1,9 +1,27 @@
 # Test that no reward is given for two bots that don't shoot
 
 
+import math
 import random
-
-from delta_shooter.game_mechanics import ShooterEnv, choose_move_randomly
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from delta_shooter.game_mechanics import (
+    UP,
+    HeadlessBullet,
+    HeadlessSpaceship,
+    Replay,
+    ShooterEnv,
+    choose_move_randomly,
+    get_spawn_orientations,
+    heading_of,
+    record_game,
+    replay_game,
+)
 
 
 def non_shooter(state) -> int:
@@ -128,3 +146,229 @@ def test_reward_player_loses() -> None:
 
         assert done
         assert reward == -1
+
+
+def test_observations_written_into_buffer() -> None:
+
+    env = ShooterEnv(
+        choose_move_randomly,
+        render=False,
+        include_barriers=True,
+        half_sized_game=True,
+    )
+
+    buffer = torch.zeros((2, env.n_observations))
+    for _ in range(100):
+        state, _, done, _ = env.step(choose_move_randomly(None))
+        assert env.observations(out=buffer) is buffer
+        assert torch.equal(buffer[0], state)
+        assert torch.equal(buffer[1], env.observation_player2)
+        if done:
+            env.reset()
+
+
+def test_headless_entities() -> None:
+
+    env = ShooterEnv(
+        shoot_and_forward,
+        render=False,
+        include_barriers=False,
+        half_sized_game=True,
+    )
+
+    env.player1.shoot()
+    for game_object in [env.player1, env.player2, *env.player1.bullets]:
+        assert not hasattr(game_object, "__dict__")
+        assert len(game_object.position) == 2
+        assert isinstance(game_object.angle, int)
+    assert not env.player1.dead
+    assert env.player1.bullets[0].collides_with(env.player1)
+
+
+def test_headless_vectors_are_tuples() -> None:
+    # The supported surface of headless vectors: (x, y) tuples of floats, read by indexing or
+    # unpacking, and convertible to a Vector2 for anything more
+    from pygame.math import Vector2
+
+    env = ShooterEnv(shoot_and_forward, include_barriers=False, half_sized_game=True, seed=0)
+    env.reset()
+    env.step(3)
+    ship, bullet = env.player1, env.player1.bullets[0]
+    for vector in [ship.position, ship.direction, ship.velocity, bullet.position]:
+        assert type(vector) is tuple and len(vector) == 2
+        assert all(isinstance(value, float) for value in vector)
+        x, y = vector
+        assert Vector2(vector) == Vector2(x, y) == Vector2(vector[0], vector[1])
+    assert type(bullet.velocity) is tuple and type(bullet.last_position) is tuple
+
+
+def test_bullets_culled_and_scored_once_per_tick() -> None:
+    env = ShooterEnv(lambda state: None, include_barriers=False, half_sized_game=True, seed=0)
+    env.reset()
+    player1, player2 = env.player1, env.player2
+    geometry = player1.barrier_geometry
+
+    # Both leave the arena this tick
+    for _ in range(2):
+        player1.bullets.add(HeadlessBullet(5.0, 5.0, -60.0, 0.0, geometry))
+    env.step(None)
+    assert len(player1.bullets) == 0
+
+    # Two bullets hitting together are still one win
+    x, y = player2.position
+    for _ in range(2):
+        player1.bullets.add(HeadlessBullet(x - 40.0, y, 60.0, 0.0, geometry))
+    _, reward, done, _ = env.step(None)
+    assert done and reward == 1
+    assert player2.dead and not player1.dead
+
+
+def test_more_bullets_per_ship() -> None:
+    env = ShooterEnv(lambda state: None, include_barriers=False, seed=0, num_bullets=5)
+    state, _, _, _ = env.reset()
+    assert state.shape == (env.n_observations,) == ((2 + 2 * 5) * 4,)
+
+    bullets = env.player1.bullets
+    for _ in range(7):
+        env.player1.shoot()
+    assert len(bullets) == 5 and bullets.full
+    assert bullets.alive == [True] * 5
+    fired = list(bullets)
+    for _ in range(10):
+        env.step(None)
+    # The survivors stay in firing order
+    assert list(bullets) == [bullet for bullet in fired if bullet in list(bullets)]
+
+    # Spent bullets are fired again rather than allocating new ones
+    for _ in range(7):
+        env.player1.shoot()
+    assert bullets.full and {id(bullet) for bullet in bullets} == {id(bullet) for bullet in fired}
+
+
+def test_headings_track_directions() -> None:
+    for orientation in get_spawn_orientations():
+        ship = HeadlessSpaceship((100, 100), orientation, player=1, game_size=(600, 450))
+        for clockwise in [None] + [True] * 30 + [False] * 50:
+            if clockwise is not None:
+                ship.rotate(clockwise)
+            dx, dy = ship.direction
+            assert heading_of(ship.direction) == ship.heading
+            # What Vector2.angle_to(UP) gives, signed as it always has been
+            angle_to_up = math.degrees(math.atan2(UP[1], UP[0]) - math.atan2(dy, dx))
+            assert ship.angle == round(angle_to_up)
+
+
+def test_seeded_games_are_reproducible(tmp_path) -> None:
+    def play(seed: int):
+        env = ShooterEnv(lambda state: 3, half_sized_game=True, seed=seed)
+        states = [env.reset()[0]]
+        for action in [3, 0, 3, 2, 3, 1, 3] * 10:
+            states.append(env.step(action)[0])
+        return torch.stack(states)
+
+    assert torch.equal(play(3), play(3))
+    assert not torch.equal(play(3), play(4))
+
+    random.seed(5)
+    replay, total_return = record_game(
+        choose_move_randomly, choose_move_randomly, seed=5, half_sized_game=True, max_steps=500
+    )
+    replay.save(tmp_path / "replay.npz")
+    loaded = Replay.load(tmp_path / "replay.npz")
+    assert np.array_equal(loaded.actions, replay.actions) and loaded.seed == 5
+    assert replay_game(loaded) == total_return
+
+    # Replays that stored moves as uint8 (no move as 255) still load
+    replay.actions = replay.actions.astype(np.uint8)
+    replay.opponent_actions = replay.opponent_actions.astype(np.uint8)
+    replay.save(tmp_path / "uint8_replay.npz")
+    loaded = Replay.load(tmp_path / "uint8_replay.npz")
+    assert loaded.actions.dtype == np.int8 and replay_game(loaded) == total_return
+
+
+def test_profiling_phases() -> None:
+    env = ShooterEnv(choose_move_randomly, half_sized_game=True, seed=0, profile=True)
+    for action in [3, 0, 2, 3] * 5:
+        env.step(action)
+
+    stats = env.profile_stats
+    assert stats["step"]["calls"] == 20 and stats["opponent"]["calls"] == 20
+    assert stats["game_logic"]["calls"] == 20
+    # One pass over each ship's bullets per tick
+    assert stats["bullets"]["calls"] == 40
+    # The opponent's state and player1's each step, plus player1's from reset()
+    assert stats["observation"]["calls"] == 41
+    assert stats["step"]["total_ns"] >= stats["game_logic"]["total_ns"] > 0
+
+    env.disable_profiling()
+    assert "step" not in vars(env) and env.opponent_choose_move is choose_move_randomly
+    env.step(0)
+    assert env.profile_stats["step"]["calls"] == 20
+    env.reset_profile()
+    assert env.profile_stats == {}
+
+
+def test_frame_skip_repeats_actions() -> None:
+    opponent_calls = []
+
+    def counting_opponent(state) -> int:
+        opponent_calls.append(state)
+        return 2
+
+    def play(frame_skip: int, actions):
+        env = ShooterEnv(counting_opponent, half_sized_game=True, seed=1, frame_skip=frame_skip)
+        env.reset()
+        for action in actions:
+            state, _, _, _ = env.step(action)
+        return state
+
+    assert torch.equal(play(3, [0, 3]), play(1, [0, 0, 0, 3, 3, 3]))
+
+    opponent_calls.clear()
+    env = ShooterEnv(counting_opponent, seed=1, frame_skip=4, opponent_frame_skip=3)
+    for _ in range(3):
+        env.step(0)
+    # 12 ticks, the opponent chooses on ticks 0, 3, 6 and 9
+    assert len(opponent_calls) == 4 and env.last_opponent_move == 2
+
+
+def test_frame_skip_stops_when_done() -> None:
+    env = ShooterEnv(
+        non_shooter, include_barriers=False, half_sized_game=True, seed=2, frame_skip=5
+    )
+    done = False
+    while not done:
+        n_actions = env.n_actions
+        _, reward, done, _ = env.step(choose_move_randomly(None))
+    assert reward in {-1, 0, 1} and env.n_actions - n_actions <= 10
+
+
+def test_reused_buffers_match_fresh_ones() -> None:
+    def play(reuse_buffers: bool):
+        env = ShooterEnv(lambda state: 3, half_sized_game=True, seed=7, reuse_buffers=reuse_buffers)
+        steps = [env.reset()]
+        for action in [3, 0, 3, 2, 4, 3, 1, 5] * 10:
+            steps.append(env.step(action))
+        return steps
+
+    fresh, reused = play(False), play(True)
+    assert [step[1:3] for step in fresh] == [step[1:3] for step in reused]
+    # Every step returned the same tensor and info, holding the latest observation
+    assert all(step[0] is reused[0][0] and step[3] is reused[0][3] for step in reused)
+    assert torch.equal(reused[-1][0], fresh[-1][0])
+
+
+def test_headless_games_dont_import_pygame() -> None:
+    script = (
+        "import sys\n"
+        "from game_mechanics import ShooterEnv, choose_move_randomly\n"
+        "env = ShooterEnv(choose_move_randomly, seed=0)\n"
+        "for _ in range(100):\n"
+        "    env.step(choose_move_randomly(None))\n"
+        "assert 'pygame' not in sys.modules\n"
+    )
+    subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=Path(__file__).parent.parent / "delta_shooter",
+        check=True,
+    )
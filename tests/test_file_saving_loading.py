@@ -0,0 +1,156 @@
+import os
+
+import pytest
+import torch
+from torch import nn
+
+from delta_shooter.game_mechanics import (
+    ChooseMoveCheckpoint,
+    InferenceModel,
+    checkpoint_model,
+    clear_model_cache,
+    load_checkpoint,
+    load_model,
+    load_network,
+    model_cache_info,
+    optimize_for_inference,
+    set_model_cache_size,
+)
+
+
+def greedy(state: torch.Tensor, network: nn.Module) -> int:
+    return int(network(state).argmax())
+
+
+def test_models_are_cached_until_the_file_changes(tmp_path) -> None:
+    clear_model_cache()
+    path = tmp_path / "checkpoint.pt"
+    torch.save(nn.Linear(24, 6), path)
+
+    first = ChooseMoveCheckpoint(str(path), greedy)
+    second = ChooseMoveCheckpoint(str(path), greedy)
+    assert first.neural_network is second.neural_network
+    assert not first.neural_network.training
+    assert model_cache_info()["hits"] == 1 and model_cache_info()["misses"] == 1
+    assert first(torch.zeros(24)) in range(6)
+
+    # Saving over the checkpoint loads the new version
+    network = nn.Linear(24, 6)
+    torch.save(network, path)
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 1))
+    reloaded = load_model(path)
+    assert reloaded is not first.neural_network
+    assert torch.equal(reloaded.weight, network.weight)
+    assert model_cache_info()["size"] == 1
+
+
+def test_saving_over_a_checkpoint_leaves_loaded_models_alone(tmp_path) -> None:
+    clear_model_cache()
+    path = str(tmp_path / "checkpoint.pt")
+    checkpoint_model(nn.Sequential(nn.Linear(24, 256), nn.Linear(256, 6)), path)
+    opponent = ChooseMoveCheckpoint(path, greedy)
+    state = torch.randn(24)
+    with torch.inference_mode():
+        before = opponent.neural_network(state).clone()
+
+    # A smaller network, so the new file is shorter than the one the old model was loaded from
+    network = nn.Linear(24, 6)
+    checkpoint_model(network, path)
+    with torch.inference_mode():
+        assert torch.equal(opponent.neural_network(state), before)
+    assert torch.equal(ChooseMoveCheckpoint(path, greedy).neural_network.weight, network.weight)
+    assert [p.name for p in tmp_path.iterdir()] == ["checkpoint.pt"]
+
+
+def test_loaded_networks_can_be_trained_without_changing_opponents(tmp_path) -> None:
+    clear_model_cache()
+    torch.save(nn.Linear(24, 6), tmp_path / "team_network.pt")
+    opponent = ChooseMoveCheckpoint(str(tmp_path / "team_network.pt"), greedy)
+    weight = opponent.neural_network.weight.clone()
+
+    network = load_network("team", network_folder=tmp_path)
+    checkpoint = load_checkpoint(str(tmp_path / "team_network.pt"))
+    assert network is not opponent.neural_network and checkpoint is not network
+    assert not network.training
+    with torch.no_grad():
+        network.weight.add_(1)
+        checkpoint.weight.add_(1)
+    assert torch.equal(opponent.neural_network.weight, weight)
+    assert torch.equal(load_model(tmp_path / "team_network.pt").weight, weight)
+
+
+def test_resaves_within_one_mtime_tick_are_reloaded(tmp_path) -> None:
+    clear_model_cache()
+    path = tmp_path / "checkpoint.pt"
+    checkpoint_model(nn.Linear(24, 6), str(path))
+    first = load_model(path)
+    stat = path.stat()
+
+    # Same size and (on a filesystem with coarse timestamps) the same mtime
+    network = nn.Linear(24, 6)
+    checkpoint_model(network, str(path))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert path.stat().st_size == stat.st_size
+    reloaded = load_model(path)
+    assert reloaded is not first and torch.equal(reloaded.weight, network.weight)
+
+
+def test_model_cache_size_limit(tmp_path) -> None:
+    clear_model_cache()
+    paths = [tmp_path / f"checkpoint{idx}.pt" for idx in range(3)]
+    for path in paths:
+        torch.save(nn.Linear(24, 6), path)
+    try:
+        set_model_cache_size(2)
+        models = [load_model(path) for path in paths]
+        assert model_cache_info()["size"] == 2
+        assert load_model(paths[2]) is models[2]
+        # The least recently used was evicted
+        assert load_model(paths[0]) is not models[0]
+
+        set_model_cache_size(0)
+        assert load_model(paths[1]) is not load_model(paths[1])
+    finally:
+        set_model_cache_size(32)
+        clear_model_cache()
+
+
+def test_optimized_checkpoints_match_the_network(tmp_path) -> None:
+    clear_model_cache()
+    path = tmp_path / "checkpoint.pt"
+    network = nn.Sequential(nn.Linear(24, 16), nn.ReLU(), nn.Linear(16, 6), nn.Tanh())
+    torch.save(network, path)
+    state = torch.randn(24)
+
+    for mode in ["numpy", "script", "trace", "eager", "auto"]:
+        checkpoint = ChooseMoveCheckpoint(str(path), greedy, optimize=mode)
+        assert checkpoint.neural_network.mode == ("numpy" if mode == "auto" else mode)
+        assert torch.allclose(checkpoint.neural_network(state), network(state), atol=1e-5)
+        assert checkpoint(state) == greedy(state, network)
+    # The cached network is left as it was
+    assert isinstance(load_model(path), nn.Sequential)
+
+
+def test_threads_are_only_set_when_optimizing() -> None:
+    def forward(x: torch.Tensor) -> torch.Tensor:
+        assert torch.is_inference_mode_enabled()
+        return x
+
+    previous = torch.get_num_threads()
+    try:
+        model = optimize_for_inference(nn.Linear(24, 6), "eager", num_threads=previous + 1)
+        assert torch.get_num_threads() == previous + 1
+        # Calls leave the thread count alone
+        torch.set_num_threads(previous)
+        model(torch.zeros(24))
+        InferenceModel(forward, "eager")(torch.zeros(1))
+        assert torch.get_num_threads() == previous
+    finally:
+        torch.set_num_threads(previous)
+
+
+def test_numpy_mode_needs_an_mlp() -> None:
+    with pytest.raises(ValueError):
+        optimize_for_inference(nn.Sequential(nn.Conv1d(1, 1, 3)), "numpy")
+    # auto falls back to TorchScript
+    assert optimize_for_inference(nn.Sequential(nn.Conv1d(1, 1, 3))).mode == "script"
@@ -0,0 +1,41 @@
+import numpy as np
+import pygame
+
+from delta_shooter.game_mechanics import (
+    N_ANGLES,
+    OCCUPANCY_CHANNELS,
+    ShooterEnv,
+    rotated_sprite_arrays,
+)
+
+
+def test_rgb_without_display() -> None:
+    env = ShooterEnv(lambda state: 3, half_sized_game=True, seed=0)
+    env.step(3)
+    image = env.render_array()
+    assert image.shape == (225, 300, 3) and image.dtype == np.uint8
+    assert not pygame.display.get_init()
+
+    # The ships are drawn over the background
+    background = env._offscreen_renderer.background
+    for ship in (env.player1, env.player2):
+        x, y = int(ship.position[0]), int(ship.position[1])
+        assert (
+            image[y - 5 : y + 5, x - 5 : x + 5] != background[y - 5 : y + 5, x - 5 : x + 5]
+        ).any()
+
+    assert len(rotated_sprite_arrays("spaceship_player1")) == N_ANGLES
+
+
+def test_occupancy_grid() -> None:
+    env = ShooterEnv(lambda state: 0, seed=1)
+    env.step(3)
+    grid = env.render_array("occupancy", cell_size=10)
+    assert grid.shape == (len(OCCUPANCY_CHANNELS), 45, 60) and grid.dtype == np.float32
+    x, y = env.player1.position[0], env.player1.position[1]
+    assert grid[0, int(y // 10), int(x // 10)] == 1
+    assert grid[2].sum() > 0 and grid[3].sum() == 0
+    assert grid[4].sum() > 0
+
+    opponent_view = env.render_array("occupancy", player=2, cell_size=10)
+    assert np.array_equal(opponent_view[0], grid[1]) and np.array_equal(opponent_view[2], grid[3])
@@ -0,0 +1,85 @@
+from typing import Iterator
+
+import numpy as np
+import pygame
+import pytest
+
+from delta_shooter.game_mechanics import (
+    GameSnapshot,
+    ShooterEnv,
+    SnapshotQueue,
+    SpectatorClosed,
+    SpectatorWindow,
+    choose_move_randomly,
+    play_shooter,
+    run_spectated,
+)
+
+
+@pytest.fixture
+def dummy_display(monkeypatch) -> Iterator[None]:
+    """Renders without a screen (or sound card) for just this test."""
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    monkeypatch.setenv("SDL_AUDIODRIVER", "dummy")
+    yield
+    pygame.quit()
+
+
+def test_dirty_rect_frames_match_full_redraws(dummy_display) -> None:
+    env = ShooterEnv(
+        choose_move_randomly,
+        render=True,
+        game_speed_multiplier=1_000,
+        half_sized_game=True,
+        seed=0,
+        dirty_rects=True,
+    )
+    for action in [3, 0, 2, 3, 1, 5, 3, 4, 2, 2] * 3:
+        _, _, done, _ = env.step(action)
+        if done:
+            break
+        dirty_frame = pygame.surfarray.array3d(env.screen)
+        env._last_drawn = None
+        env._draw()
+        assert np.array_equal(dirty_frame, pygame.surfarray.array3d(env.screen))
+
+
+def test_snapshot_queue_drops_oldest() -> None:
+    snapshots = SnapshotQueue(maxsize=2)
+    env = ShooterEnv(choose_move_randomly, seed=0)
+    for tick in range(5):
+        snapshots.put(GameSnapshot(tick, env.snapshot().ships, "", False))
+    assert snapshots.n_dropped == 3
+    assert snapshots.latest().tick == 4 and snapshots.latest(timeout=0.01) is None
+    snapshots.close()
+    assert snapshots.finished
+
+
+def test_spectated_game_runs_to_the_end(dummy_display) -> None:
+    total_return = play_shooter(
+        choose_move_randomly,
+        choose_move_randomly,
+        include_barriers=False,
+        half_game_size=True,
+        spectate=True,
+        spectator_fps=200,
+    )
+    assert total_return in {-1, 0, 1}
+
+
+def test_closing_the_spectator_window_stops_the_game(dummy_display) -> None:
+    snapshots = SnapshotQueue()
+    # Neither player ever moves, so the game would never end by itself
+    env = ShooterEnv(
+        lambda state: None, include_barriers=False, half_sized_game=True, snapshots=snapshots
+    )
+
+    def simulate() -> None:
+        env.reset()
+        while True:
+            env.step(None)
+
+    window = SpectatorWindow(env.game_size, include_barriers=False, fps=200)
+    pygame.event.post(pygame.event.Event(pygame.QUIT))
+    with pytest.raises(SpectatorClosed):
+        run_spectated(simulate, snapshots, window)
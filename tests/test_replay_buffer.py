@@ -0,0 +1,76 @@
+import numpy as np
+import torch
+
+from delta_shooter.game_mechanics import (
+    BatchedShooterEnv,
+    ReplayBuffer,
+    SumTree,
+    choose_move_randomly,
+)
+
+
+def test_sum_tree_find() -> None:
+    rng = np.random.default_rng(0)
+    tree = SumTree(100)
+    priorities = rng.random(100)
+    tree.update(np.arange(100), priorities)
+    tree.update([3, 50], [5.0, 0.0])
+    priorities[[3, 50]] = [5.0, 0.0]
+    assert np.isclose(tree.total, priorities.sum())
+
+    values = rng.random(1_000) * tree.total
+    expected = np.searchsorted(np.cumsum(priorities), values, side="right")
+    assert np.array_equal(tree.find(values), expected)
+
+
+def test_sum_tree_never_finds_empty_leaves() -> None:
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        # Only some of the leaves filled, with priorities that round badly
+        tree = SumTree(100)
+        size = int(rng.integers(1, 100))
+        tree.update(np.arange(size), rng.random(size) ** 3 * rng.random() * 100)
+        values = [np.nextafter(tree.total, 0), tree.total * (1 - 1e-16), tree.total]
+        idx = tree.find(values)
+        assert (idx < size).all() and (tree[idx] > 0).all()
+
+
+def test_circular_overwrite(tmp_path) -> None:
+    buffer = ReplayBuffer(10, 24, directory=tmp_path)
+    for start in range(0, 25, 5):
+        steps = np.arange(start, start + 5)
+        observations = np.repeat(steps[:, None], 24, axis=1).astype(np.float32)
+        buffer.add(observations, steps % 6, steps, observations + 1, steps % 2 == 0)
+    assert len(buffer) == 10 and buffer.position == 5
+    assert sorted(buffer.rewards.tolist()) == list(range(15, 25))
+    assert (tmp_path / "observations.dat").exists()
+
+    batch = buffer.sample(32)
+    assert batch["observations"].shape == (32, 24)
+    assert torch.equal(batch["next_observations"], batch["observations"] + 1)
+    assert torch.equal(batch["observations"][:, 0], batch["rewards"])
+
+
+def test_prioritized_sampling_from_vec_env() -> None:
+    env = BatchedShooterEnv(choose_move_randomly, num_envs=8, half_sized_game=True, seed=0)
+    buffer = ReplayBuffer(256, env.n_observations, prioritized=True, seed=0)
+    states, _, _, _ = env.reset()
+    for _ in range(40):
+        actions = np.random.randint(0, 6, size=8)
+        next_states, rewards, dones, info = env.step(actions.tolist())
+        buffer.add_vec_step(states, actions, rewards, next_states, dones, info)
+        states = next_states
+    assert len(buffer) == 256
+
+    # Make one transition far more likely than the rest
+    buffer.update_priorities(np.arange(256), np.full(256, 0.01))
+    buffer.update_priorities([7], [10_000.0])
+    batch = buffer.sample(64)
+    assert (batch["indices"] == 7).float().mean() > 0.5
+    assert batch["weights"].max() == 1 and batch["weights"][batch["indices"] == 7].max() < 1
+
+    # Its temporary directory goes with it
+    directory = buffer.directory
+    assert (directory / "observations.dat").exists()
+    buffer.close()
+    assert not directory.exists()
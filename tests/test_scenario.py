@@ -0,0 +1,96 @@
+import numpy as np
+import torch
+
+from delta_shooter.game_mechanics import (
+    HeadlessBullet,
+    HeadlessSpaceship,
+    Scenario,
+    ShooterEnv,
+    choose_move_randomly,
+    get_spawn_points,
+)
+
+
+def test_classic_scenario_spawns_opposite() -> None:
+    scenario = Scenario.classic(half_sized_game=True)
+    assert scenario is Scenario.classic(half_sized_game=True) and scenario.is_classic
+    assert scenario.spawn_points == tuple(get_spawn_points((300, 225)))
+    opposite = {0: 1, 1: 0, 2: 3, 3: 2}
+    for seed in range(20):
+        (point1, _), (point2, _) = scenario.spawn(np.random.default_rng(seed))
+        points = scenario.spawn_points
+        assert point2 == points[opposite[points.index(point1)]]
+
+
+def test_random_scenario() -> None:
+    scenario = Scenario.random((1200, 900), n_players=7, n_barriers=20, seed=0)
+    assert len(scenario.barriers) == 20 and len(scenario.spawn_points) == 8
+    assert not scenario.is_classic
+    spawns = scenario.spawn(np.random.default_rng(0))
+    assert len({point for point, _ in spawns}) == 7
+    for point, _ in spawns:
+        assert not scenario.barrier_geometry.hit(point, point, 20)
+
+
+def test_free_for_all_games_finish() -> None:
+    scenario = Scenario.random((900, 675), n_players=6, n_barriers=10, seed=0)
+    env = ShooterEnv(choose_move_randomly, scenario=scenario, seed=0)
+    assert env.n_observations == 6 * (1 + 2) * 4
+    for _ in range(3):
+        state, _, done, _ = env.reset()
+        while not done:
+            state, reward, done, _ = env.step(choose_move_randomly(state))
+        assert reward in {-1, 0, 1}
+        assert env.player1.dead == (reward <= 0)
+        assert env.observations().shape == (6, env.n_observations)
+
+
+def test_free_for_all_hits() -> None:
+    scenario = Scenario.random((900, 675), n_players=4, n_barriers=0, seed=0)
+    env = ShooterEnv(lambda state: None, scenario=scenario, seed=0)
+    env.reset()
+    player1, player2, player3, player4 = env.players
+
+    def shoot_at(shooter, target) -> None:
+        x, y = target.position
+        shooter.bullets.add(HeadlessBullet(x - 40.0, y, 60.0, 0.0, shooter.barrier_geometry))
+
+    # Opponents can hit each other, and the game goes on without them
+    shoot_at(player2, player3)
+    state, reward, done, _ = env.step(None)
+    assert player3.dead and not done and reward == 0
+    # Dead ships are hidden from observations
+    assert torch.equal(state[8:12], torch.tensor([-1.0, -1.0, 0.0, 1.0]))
+
+    # Player1 wins by being the last ship alive
+    shoot_at(player1, player2)
+    shoot_at(player1, player4)
+    _, reward, done, _ = env.step(None)
+    assert done and reward == 1
+    assert not player1.dead and player2.dead and player4.dead
+
+
+def test_free_for_all_hits_use_the_target_radius() -> None:
+    scenario = Scenario.random((900, 675), n_players=4, n_barriers=0, seed=0)
+    env = ShooterEnv(lambda state: None, scenario=scenario, seed=0)
+    env.reset()
+    player1, player2, player3, _ = env.players
+
+    # A big target, shot at by a small ship
+    class BigShip(HeadlessSpaceship):
+        __slots__ = ()
+        radius = 3 * HeadlessSpaceship.radius
+
+    class SmallShip(HeadlessSpaceship):
+        __slots__ = ()
+        radius = HeadlessSpaceship.radius / 4
+
+    player3.__class__, player2.__class__ = BigShip, SmallShip
+
+    x, y = player3.position
+    miss_distance = player3.radius - 1
+    player2.bullets.add(
+        HeadlessBullet(x - 40.0, y + miss_distance, 60.0, 0.0, player2.barrier_geometry)
+    )
+    env.step(None)
+    assert player3.dead
@@ -0,0 +1,87 @@
+import random
+import time
+
+import pytest
+
+from delta_shooter.game_mechanics import Tournament, choose_move_randomly
+
+
+def always_shoot(state) -> int:
+    return 3
+
+
+def never_shoot(state) -> int:
+    return random.choice([0, 1, 2, 4, 5])
+
+
+POLICIES = {"random": choose_move_randomly, "shooter": always_shoot, "pacifist": never_shoot}
+
+
+def test_tournament_table_and_resume(tmp_path) -> None:
+    results_path = tmp_path / "results.jsonl"
+    kwargs = dict(games_per_pairing=4, include_barriers=False, half_sized_game=True, max_steps=300)
+    tournament = Tournament(POLICIES, results_path=results_path, num_workers=0, **kwargs)
+    results = list(tournament.run())
+    assert len(results) == 3 * 4
+
+    table = tournament.table()
+    assert all(row["played"] == 8 for row in table.values())
+    assert all(row["wins"] + row["draws"] + row["losses"] == 8 for row in table.values())
+    # Never shooting can't win a game
+    assert table["pacifist"]["wins"] == 0
+    assert list(table)[-1] == "pacifist"
+
+    # Resuming from the results file plays nothing new
+    resumed = Tournament(POLICIES, results_path=results_path, num_workers=0, **kwargs)
+    assert resumed.pending() == [] and list(resumed.run()) == []
+    assert resumed.table() == table
+
+
+def test_tournament_process_pool(tmp_path) -> None:
+    results_path = tmp_path / "results.jsonl"
+    kwargs = dict(games_per_pairing=2, include_barriers=False, half_sized_game=True, max_steps=100)
+    # Play half of the games, then finish the tournament over a process pool
+    partial = Tournament(POLICIES, results_path=results_path, num_workers=0, **kwargs)
+    for _, _ in zip(range(3), partial.run()):
+        pass
+
+    tournament = Tournament(POLICIES, results_path=results_path, num_workers=2, **kwargs)
+    assert len(tournament.pending()) == 3
+    assert len(list(tournament.run())) == 3
+    assert len(tournament.results) == 6
+    assert len(results_path.read_text().splitlines()) == 6
+
+
+def test_resume_after_a_result_was_cut_off(tmp_path) -> None:
+    results_path = tmp_path / "results.jsonl"
+    kwargs = dict(games_per_pairing=2, include_barriers=False, half_sized_game=True, max_steps=100)
+    tournament = Tournament(POLICIES, results_path=results_path, num_workers=0, **kwargs)
+    for _, _ in zip(range(3), tournament.run()):
+        pass
+    # Killed partway through writing the third result
+    text = results_path.read_text()
+    results_path.write_text(text[: len(text) - 20])
+
+    with pytest.warns(UserWarning, match="incomplete result"):
+        resumed = Tournament(POLICIES, results_path=results_path, num_workers=0, **kwargs)
+    assert len(resumed.results) == 2 and len(resumed.pending()) == 4
+    assert len(list(resumed.run())) == 4
+    assert len(Tournament(POLICIES, results_path=results_path, **kwargs).results) == 6
+
+
+def slow_random(state) -> int:
+    time.sleep(0.002)
+    return choose_move_randomly(state)
+
+
+def test_stopping_early_cancels_the_remaining_games(tmp_path) -> None:
+    results_path = tmp_path / "results.jsonl"
+    policies = {"random": slow_random, "shooter": always_shoot, "pacifist": never_shoot}
+    kwargs = dict(games_per_pairing=20, include_barriers=False, half_sized_game=True)
+    tournament = Tournament(policies, results_path=results_path, num_workers=2, **kwargs)
+    for _ in tournament.run():
+        break
+    # The games other workers were already playing were finished and kept (not just the one
+    # yielded), and the rest of the 60 were never played
+    n_recorded = len(results_path.read_text().splitlines())
+    assert 2 <= n_recorded < 10 and len(tournament.results) == n_recorded
@@ -0,0 +1,75 @@
+import numpy as np
+import torch
+
+from delta_shooter.game_mechanics import (
+    NO_MOVE,
+    Scenario,
+    ShooterEnv,
+    TrajectoryReader,
+    TrajectoryRecorder,
+    TrajectoryWriter,
+    choose_move_randomly,
+)
+
+
+def test_recorded_trajectories_read_back(tmp_path) -> None:
+    rng = np.random.default_rng(0)
+    states, actions, rewards, dones = [], [], [], []
+    with TrajectoryWriter(tmp_path, chunk_size=64) as writer:
+        env = TrajectoryRecorder(
+            ShooterEnv(choose_move_randomly, include_barriers=False, half_sized_game=True, seed=0),
+            writer,
+        )
+        state, _, _, _ = env.reset()
+        for _ in range(200):
+            action = int(rng.integers(6))
+            states.append(state)
+            actions.append(action)
+            state, reward, done, _ = env.step(action)
+            rewards.append(reward)
+            dones.append(done)
+            if done:
+                state, _, _, _ = env.reset()
+
+    reader = TrajectoryReader(tmp_path)
+    assert len(reader) == 200 and len(list(reader.chunks())) == 4
+    assert isinstance(next(reader.chunks()), np.memmap)
+    assert np.array_equal(reader["observation"], torch.stack(states).numpy())
+    assert reader["action"].tolist() == actions
+    assert reader["reward"].tolist() == rewards and reader["done"].tolist() == dones
+    assert set(reader["opponent_action"].tolist()) <= set(range(6))
+
+    batches = list(reader.batches(batch_size=50))
+    assert [len(batch["action"]) for batch in batches] == [50] * 4
+    assert torch.equal(batches[1]["observation"], torch.stack(states[50:100]))
+
+    shuffled = list(reader.batches(batch_size=30, shuffle=True, seed=0))
+    assert sorted(torch.cat([batch["action"] for batch in shuffled]).tolist()) == sorted(actions)
+
+
+def test_writer_appends_to_existing_chunks(tmp_path) -> None:
+    for _ in range(2):
+        with TrajectoryWriter(tmp_path, chunk_size=8, background=False) as writer:
+            for step in range(10):
+                writer.append(np.full(24, step, dtype=np.float32), step % 6, None, 0.0, False)
+    reader = TrajectoryReader(tmp_path)
+    assert len(reader) == 20 and len(list(reader.chunks())) == 4
+    assert reader["opponent_action"].tolist() == [-1] * 20
+
+
+def test_records_fit_the_env_observations(tmp_path) -> None:
+    scenario = Scenario.random((600, 450), n_players=4, n_barriers=2, seed=0)
+    with TrajectoryWriter(tmp_path, background=False) as writer:
+        env = TrajectoryRecorder(
+            ShooterEnv(choose_move_randomly, scenario=scenario, num_bullets=3, seed=0), writer
+        )
+        state, _, _, _ = env.reset()
+        for _ in range(10):
+            next_state, _, _, _ = env.step(None)
+    assert env.n_observations == 4 * (1 + 3) * 4
+    observations = TrajectoryReader(tmp_path)["observation"]
+    assert observations.shape == (10, env.n_observations)
+    assert np.array_equal(observations[0], state.numpy())
+    # No move is recorded as NO_MOVE, the same as replays and ShooterVecEnv store it
+    assert TrajectoryReader(tmp_path)["action"].tolist() == [NO_MOVE] * 10
+    assert TrajectoryReader(tmp_path)["opponent_action"].shape == (10, 3)
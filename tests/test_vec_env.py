@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+import pytest
+import torch
+
+from delta_shooter.game_mechanics import ShooterVecEnv, choose_move_randomly
+
+
+def test_vec_env_steps_and_resets() -> None:
+    with ShooterVecEnv(
+        choose_move_randomly, num_envs=6, num_workers=2, half_sized_game=True, seed=0
+    ) as env:
+        states, _, _, _ = env.reset()
+        assert states.shape == (6, env.n_observations)
+
+        rng = np.random.default_rng(0)
+        n_done = 0
+        for _ in range(300):
+            states, rewards, dones, info = env.step(rng.integers(0, 6, size=6).tolist())
+            assert states.shape == (6, 24) and rewards.shape == (6,) and dones.shape == (6,)
+            assert set(np.unique(rewards)) <= {-1.0, 0.0, 1.0}
+            assert torch.equal(states[~dones], info["terminal_observation"][~dones])
+            n_done += dones.sum()
+        assert n_done > 0
+    assert env.closed
+
+
+def test_vec_env_batched_opponent() -> None:
+    batch_sizes = []
+
+    def batched_choose_move(state: torch.Tensor) -> np.ndarray:
+        batch_sizes.append(state.shape)
+        return np.random.randint(0, 6, size=len(state))
+
+    with ShooterVecEnv(
+        batched_choose_move, num_envs=4, num_workers=2, half_sized_game=True, batched_opponent=True
+    ) as env:
+        env.reset()
+        for _ in range(50):
+            states, _, _, _ = env.step([3, 3, 3, 3])
+            assert states.shape == (4, 24)
+    assert batch_sizes == [(4, 24)] * 50
+
+
+def broken_opponent(state: torch.Tensor) -> int:
+    raise ValueError("broken opponent")
+
+
+def dying_opponent(state: torch.Tensor) -> int:
+    os._exit(1)
+
+
+def test_vec_env_worker_errors_close_the_env() -> None:
+    env = ShooterVecEnv(broken_opponent, num_envs=4, num_workers=2, half_sized_game=True)
+    env.reset()
+    with pytest.raises(RuntimeError) as error:
+        env.step([3, 3, 3, 3])
+    # Every worker's error is reported
+    assert "Worker 0" in str(error.value) and "Worker 1" in str(error.value)
+    assert "broken opponent" in str(error.value)
+    assert env.closed
+    with pytest.raises(AssertionError, match="closed"):
+        env.reset()
+
+    env = ShooterVecEnv(dying_opponent, num_envs=2, num_workers=2, half_sized_game=True)
+    env.reset()
+    with pytest.raises(RuntimeError, match="died"):
+        env.step([3, 3])
+    assert env.closed